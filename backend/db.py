@@ -15,6 +15,10 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set. Please check your .env file.")
 
+# Opt-in for folding duplicate (user_id, task_id) submissions when uq_submissions_user_task
+# is first created; without it startup stops if duplicates exist
+DEDUPE_SUBMISSIONS_ON_STARTUP = os.getenv("DEDUPE_SUBMISSIONS_ON_STARTUP", "false").lower() == "true"
+
 # Create async engine with proper pgbouncer compatibility
 # Remove query parameters from URL and set them in connect_args
 base_url = DATABASE_URL.split('?')[0]
@@ -85,6 +89,169 @@ async def init_db():
                 END $$;
             """))
 
+            # Content hash and size of submission files (content-addressed upload store)
+            await conn.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'submission_files' AND column_name = 'content_hash'
+                    ) THEN
+                        ALTER TABLE submission_files ADD COLUMN content_hash VARCHAR(64);
+                        ALTER TABLE submission_files ADD COLUMN size_bytes BIGINT;
+                        CREATE INDEX IF NOT EXISTS ix_submission_files_content_hash ON submission_files(content_hash);
+                    END IF;
+                END $$;
+            """))
+
+            # Image derivative URLs of submission files
+            await conn.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'submission_files' AND column_name = 'thumbnail_url'
+                    ) THEN
+                        ALTER TABLE submission_files ADD COLUMN thumbnail_url TEXT;
+                        ALTER TABLE submission_files ADD COLUMN webp_url TEXT;
+                    END IF;
+                END $$;
+            """))
+
+            # Perceptual hashes of submission images (duplicate proof detection)
+            await conn.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'submission_files' AND column_name = 'perceptual_hash'
+                    ) THEN
+                        ALTER TABLE submission_files ADD COLUMN perceptual_hash BIGINT;
+                        ALTER TABLE submission_files ADD COLUMN hashed_at TIMESTAMP;
+                    END IF;
+                END $$;
+            """))
+
+            # Daily submission counts for engagement stats; rows rolled up before the column existed are backfilled
+            await conn.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'analytics' AND column_name = 'submissions_today'
+                    ) THEN
+                        ALTER TABLE analytics ADD COLUMN submissions_today INTEGER DEFAULT 0;
+                        UPDATE analytics a SET submissions_today = s.submissions
+                        FROM (
+                            SELECT user_id, date_trunc('day', submission_date) AS day, count(*) AS submissions
+                            FROM submissions
+                            GROUP BY 1, 2
+                        ) s
+                        WHERE a.user_id = s.user_id AND a.date = s.day;
+                    END IF;
+                END $$;
+            """))
+
+            # Incremental loads of the duplicate image index
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_submission_files_hashed_at
+                ON submission_files (hashed_at) WHERE perceptual_hash IS NOT NULL;
+            """))
+
+            # Token version embedded in access tokens (stateless auth mode)
+            await conn.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'users' AND column_name = 'token_version'
+                    ) THEN
+                        ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0;
+                    END IF;
+                END $$;
+            """))
+
+            # Leaderboard index used by rank lookups (create_all does not add indexes to existing tables)
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_users_leaderboard
+                ON users (role, is_active, total_points, total_referrals, id);
+            """))
+
+            # Keyset pagination index for admin submission listings
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_submissions_date_id
+                ON submissions (submission_date, id);
+            """))
+
+            # Conflict target of the submission upsert. Workers starting together serialize on an
+            # advisory lock and re-check for the index once they hold it. Duplicates from before the
+            # upsert block the index: with DEDUPE_SUBMISSIONS_ON_STARTUP they are copied to
+            # submissions_duplicates_backup and folded into the newest submission per
+            # (user_id, task_id), whose files and upload sessions they take over; otherwise
+            # startup stops. Any other failure stops startup as well.
+            await conn.execute(
+                text("SELECT set_config('app.dedupe_submissions', :dedupe, true)"),
+                {"dedupe": "on" if DEDUPE_SUBMISSIONS_ON_STARTUP else "off"},
+            )
+            await conn.execute(text("""
+                DO $$
+                DECLARE
+                    duplicates INTEGER;
+                BEGIN
+                    PERFORM pg_advisory_xact_lock(hashtext('uq_submissions_user_task'));
+
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_indexes WHERE indexname = 'uq_submissions_user_task'
+                    ) THEN
+                        LOCK TABLE submissions IN SHARE ROW EXCLUSIVE MODE;
+
+                        CREATE TEMP TABLE submission_duplicates ON COMMIT DROP AS
+                        SELECT id, kept_id FROM (
+                            SELECT
+                                id,
+                                first_value(id) OVER (
+                                    PARTITION BY user_id, task_id
+                                    ORDER BY submission_date DESC NULLS LAST, updated_at DESC NULLS LAST, id DESC
+                                ) AS kept_id
+                            FROM submissions
+                        ) ranked
+                        WHERE id <> kept_id;
+
+                        SELECT count(*) INTO duplicates FROM submission_duplicates;
+                        IF duplicates > 0 THEN
+                            IF current_setting('app.dedupe_submissions', true) IS DISTINCT FROM 'on' THEN
+                                RAISE EXCEPTION 'uq_submissions_user_task: % duplicate submissions per (user_id, task_id)', duplicates
+                                    USING HINT = 'Set DEDUPE_SUBMISSIONS_ON_STARTUP=true to back them up to submissions_duplicates_backup and keep the newest';
+                            END IF;
+
+                            CREATE TABLE IF NOT EXISTS submissions_duplicates_backup AS
+                            SELECT s.*, d.kept_id, now() AS backed_up_at
+                            FROM submissions s JOIN submission_duplicates d ON d.id = s.id
+                            WITH NO DATA;
+                            INSERT INTO submissions_duplicates_backup
+                            SELECT s.*, d.kept_id, now()
+                            FROM submissions s JOIN submission_duplicates d ON d.id = s.id;
+
+                            UPDATE submission_files f SET submission_id = d.kept_id
+                            FROM submission_duplicates d WHERE f.submission_id = d.id;
+                            UPDATE upload_sessions u SET submission_id = d.kept_id
+                            FROM submission_duplicates d WHERE u.submission_id = d.id;
+                            DELETE FROM submissions s USING submission_duplicates d WHERE s.id = d.id;
+
+                            RAISE WARNING 'uq_submissions_user_task: moved % duplicate submissions to submissions_duplicates_backup, keeping the newest per (user_id, task_id)', duplicates;
+                        END IF;
+
+                        CREATE UNIQUE INDEX IF NOT EXISTS uq_submissions_user_task ON submissions (user_id, task_id);
+                    END IF;
+                END $$;
+            """))
+
+            # Conflict target of the analytics rollup upsert
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_analytics_user_date
+                ON analytics (user_id, date);
+            """))
+
             # Fix UUID column types if they are currently VARCHAR - handle foreign keys carefully
             # Temporarily commented out to debug startup issues
             # await conn.execute(text("""
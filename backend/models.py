@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, ForeignKey, JSON, Float
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, DateTime, Text, ForeignKey, JSON, Float, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -29,6 +29,8 @@ class User(Base):
     last_submission_date = Column(DateTime, nullable=True, index=True)
     is_active = Column(Boolean, default=True)
     status = Column(String, default="active")
+    # Embedded in access tokens; bumping it (see token_revocations) invalidates older tokens
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # JSON fields for flexible data
     profile_settings = Column(JSON, default=dict)
@@ -38,6 +40,11 @@ class User(Base):
     submissions = relationship("Submission", back_populates="user")
     analytics = relationship("Analytics", back_populates="user")
 
+    __table_args__ = (
+        # Leaderboard ordering; lets rank lookups count the users ahead via an index range scan
+        Index("ix_users_leaderboard", "role", "is_active", "total_points", "total_referrals", "id"),
+    )
+
 class SubmissionFile(Base):
     __tablename__ = "submission_files"
 
@@ -45,6 +52,15 @@ class SubmissionFile(Base):
     submission_id = Column(UUID(as_uuid=True), ForeignKey("submissions.id"), nullable=False, index=True)
     file_url = Column(Text, nullable=False)
     file_type = Column(String, nullable=True)
+    # SHA-256 of the content; local files live in the blob store under this hash
+    content_hash = Column(String(64), nullable=True, index=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    # WebP derivatives of image files, filled in by the submission_files job
+    thumbnail_url = Column(Text, nullable=True)
+    webp_url = Column(Text, nullable=True)
+    # 64-bit pHash of image files (signed) for near-duplicate detection
+    perceptual_hash = Column(BigInteger, nullable=True)
+    hashed_at = Column(DateTime, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
     submission = relationship("Submission", back_populates="files")
@@ -105,6 +121,13 @@ class Submission(Base):
     files = relationship("SubmissionFile", back_populates="submission")
     task = relationship("Task", back_populates="submissions")
 
+    __table_args__ = (
+        # Keyset pagination of admin listings on (submission_date, id)
+        Index("ix_submissions_date_id", "submission_date", "id"),
+        # One submission per user and task; the submission upsert targets it with ON CONFLICT
+        Index("uq_submissions_user_task", "user_id", "task_id", unique=True),
+    )
+
 class Analytics(Base):
     __tablename__ = "analytics"
     
@@ -115,6 +138,7 @@ class Analytics(Base):
     # Daily metrics
     points_earned_today = Column(Integer, default=0)
     tasks_completed_today = Column(Integer, default=0)
+    submissions_today = Column(Integer, default=0)  # every submission, completed or not
     referrals_made_today = Column(Integer, default=0)
     
     # Cumulative metrics
@@ -128,4 +152,122 @@ class Analytics(Base):
     engagement_score = Column(Float, default=0.0)
     
     # Relationships
-    user = relationship("User", back_populates="analytics")
\ No newline at end of file
+    user = relationship("User", back_populates="analytics")
+
+    __table_args__ = (
+        # One rollup row per user and UTC day; the rollup engine upserts on it
+        Index("uq_analytics_user_date", "user_id", "date", unique=True),
+    )
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # One row per process-local cache; writers bump the version so other workers notice staleness
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class TokenRevocation(Base):
+    __tablename__ = "token_revocations"
+
+    # Tokens for user_id carrying a version below min_token_version are rejected
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    min_token_version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class PointsLedger(Base):
+    __tablename__ = "points_ledger"
+
+    # Append-only history of point awards; compaction folds pending rows into users.total_points
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    points_delta = Column(Integer, nullable=False, default=0)
+    referrals_delta = Column(Integer, nullable=False, default=0)
+    submission_id = Column(UUID(as_uuid=True), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    compacted_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Windowed scores per user
+        Index("ix_points_ledger_user_created", "user_id", "created_at"),
+        # Rows not yet folded into users.total_points
+        Index("ix_points_ledger_pending", "id", postgresql_where=text("compacted_at IS NULL")),
+    )
+
+class LeaderboardRollup(Base):
+    __tablename__ = "leaderboard_rollups"
+
+    # Points and referrals earned per user in each day/week/month, maintained by ledger compaction
+    period_type = Column(String, primary_key=True)
+    period_start = Column(DateTime, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    points = Column(Integer, nullable=False, default=0)
+    referrals = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    # Last UTC day (midnight) a rollup has fully processed; later days are caught up on the next run
+    name = Column(String, primary_key=True)
+    closed_through = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class BackgroundJob(Base):
+    __tablename__ = "job_queue"
+
+    # Durable work queue; workers claim pending rows with FOR UPDATE SKIP LOCKED.
+    # Finished jobs are deleted; jobs out of attempts stay behind with status "dead".
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default="pending")  # pending, running, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_job_queue_status_run_after", "status", "run_after", "id"),
+    )
+
+class UploadBlob(Base):
+    __tablename__ = "upload_blobs"
+
+    # One row per stored content hash; ref_count is the number of SubmissionFile rows using it.
+    # touched_at is bumped whenever an upload is about to reuse the blob, so GC leaves it alone.
+    content_hash = Column(String(64), primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    touched_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_upload_blobs_orphaned", "touched_at", postgresql_where=text("ref_count <= 0")),
+    )
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    # Resumable upload of one file; bytes received so far sit in a .part file on disk.
+    # received_bytes only advances once a chunk is fully written.
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    submission_id = Column(UUID(as_uuid=True), ForeignKey("submissions.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    total_bytes = Column(BigInteger, nullable=False)
+    received_bytes = Column(BigInteger, nullable=False, default=0)
+    sha256 = Column(String(64), nullable=True)  # optional client-declared digest, checked on finalize
+    status = Column(String, nullable=False, default="open")  # open, finalized
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_upload_sessions_expires_at", "expires_at"),
+    )
@@ -1,27 +1,63 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, Body, Request
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, Body, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field, field_validator
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from db import get_db, init_db, AsyncSessionLocal
-from services.database_service import DatabaseService
+from db import get_db, init_db, AsyncSessionLocal, DATABASE_URL
+from services.database_service import DatabaseService, encode_submission_cursor
+from services.report_export import (
+    EXPORT_FORMATS, SUBMISSION_EXPORT_COLUMNS, AMBASSADOR_EXPORT_COLUMNS,
+    submission_export_record, ambassador_export_record, encode_export,
+)
+from services.analytics_rollup import ANALYTICS_ROLLUP_SECONDS, ANALYTICS_CLOSE_DAYS_CRON, analytics_rollup_tracker
+from services.scheduler import scheduler, IntervalTrigger, CronTrigger
+from services.job_queue import job_workers
+from services.storage import gather_uploads, stream_to_file
+from services.storage_backends import (
+    LOCAL_UPLOAD_URL_PREFIX, StorageBackend, connect_storage_backend, create_storage_backend, local_storage
+)
+from services.blob_store import (
+    BLOB_GC_SECONDS, BLOB_GC_GRACE_SECONDS, BLOB_GC_BATCH_SIZE, blob_store, hash_file
+)
+from services.image_derivatives import derivative_renderer, is_derivable
+from services.upload_sessions import (
+    UPLOAD_SESSION_CHUNK_BYTES, UPLOAD_SESSION_GC_SECONDS, UPLOAD_SESSION_MAX_BYTES, UPLOAD_SESSION_TTL_SECONDS,
+    ChunkTooLarge, remove_session_files, session_lock_path, session_part_path, upload_session_locks, write_chunk
+)
+from services.upload_serving import (
+    UPLOAD_CACHE_CONTROL, RangeNotSatisfiable, ZeroCopyFileResponse, blob_content_type_cache,
+    content_headers, etag_matches, last_modified, legacy_etag, parse_range, resolve_upload_path
+)
+from services.zip_stream import TruncatedEntryError, ZipStreamWriter, safe_name
+from services.perceptual_hash import (
+    PHASH_DUPLICATE_DISTANCE, PHASH_INDEX_REFRESH_SECONDS, PHASH_INDEX_OVERLAP_SECONDS, duplicate_image_index
+)
+from services.leaderboard_index import leaderboard_index
+from services.leaderboard_windows import leaderboard_cache, resolve_window
+from services.user_cache import AUTH_USER_CACHE, AUTH_USER_CACHE_VERSION_SECONDS, auth_user_cache
+from services.token_revocations import AUTH_MODE, TOKEN_REVOCATION_REFRESH_SECONDS, token_revocations
 from models import User, Task, Submission
 import os
+import asyncio
 import logging
-from pathlib import Path
-from typing import List, Optional
+from pathlib import Path, PurePosixPath
+from typing import List, Optional, Dict, Tuple
+from urllib.parse import urlparse
 import uuid
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import jwt
 import hashlib
 import base64
 from io import BytesIO
 from contextlib import asynccontextmanager
+from functools import partial
 import traceback
-from fastapi.responses import JSONResponse
+import shutil
+import mimetypes
+from fastapi.responses import JSONResponse, StreamingResponse
 from supabase import create_client, Client
 import uvicorn
 
@@ -47,6 +83,21 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_BUCKET = "submissions"
 
+# Admin submission listings are keyset-paginated; the next page's cursor is sent in X-Next-Cursor
+SUBMISSIONS_PAGE_SIZE = 100
+MAX_SUBMISSIONS_PAGE_SIZE = 500
+
+# Submitted files wait here until the submission_files job uploads them
+UPLOAD_STAGING_DIR = Path("uploads") / "staging"
+SUBMISSION_FILES_JOB = "submission_files"
+
+# How often the in-memory leaderboard index is reconciled against the users table
+LEADERBOARD_RECONCILE_SECONDS = int(os.getenv("LEADERBOARD_RECONCILE_SECONDS", "60"))
+
+# How often the points ledger is compacted into users.total_points, and how many rows per pass
+POINTS_COMPACTION_SECONDS = int(os.getenv("POINTS_COMPACTION_SECONDS", "5"))
+POINTS_COMPACTION_BATCH_SIZE = int(os.getenv("POINTS_COMPACTION_BATCH_SIZE", "5000"))
+
 # Create Supabase client (only if credentials are provided)
 supabase: Client = None
 if SUPABASE_URL and SUPABASE_KEY:
@@ -55,26 +106,47 @@ if SUPABASE_URL and SUPABASE_KEY:
         print("✅ Supabase client initialized successfully")
     except Exception as e:
         print(f"⚠️ Failed to initialize Supabase client: {e}")
-        print("📁 File uploads will be stored locally in uploads/ directory")
 else:
     print("⚠️ Supabase credentials not provided (SUPABASE_URL, SUPABASE_KEY)")
-    print("📁 File uploads will be stored locally in uploads/ directory")
+
+# Where submission files are stored (STORAGE_BACKEND); replaced by local storage at startup if unreachable
+storage_backend: StorageBackend = create_storage_backend(supabase, SUPABASE_BUCKET)
 
 # Create the main app with lifespan
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global storage_backend
     # Startup
+    scheduler_started = False
+    job_workers_started = False
+    storage_backend = await connect_storage_backend(storage_backend)
     try:
         db_connected = await init_db()
         if db_connected:
             await initialize_tasks()
+            await reconcile_leaderboard_index()
+            if AUTH_MODE == "stateless":
+                await refresh_token_revocations()
+            schedule_background_jobs()
+            scheduler.start(DATABASE_URL)
+            scheduler_started = True
+            register_job_handlers()
+            job_workers.start(AsyncSessionLocal)
+            job_workers_started = True
+            await backfill_leaderboard_rollups()
         else:
             print("⚠️ Starting server without database connection (fallback mode)")
     except Exception as e:
         print(f"⚠️ Database initialization failed: {e}")
         print("⚠️ Starting server without database connection (fallback mode)")
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    if job_workers_started:
+        await job_workers.shutdown()
+    if scheduler_started:
+        await scheduler.shutdown()
+    storage_backend.shutdown()
+    derivative_renderer.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -131,6 +203,13 @@ class TaskSubmissionCreate(BaseModel):
     status_text: str = ""
     people_connected: int = 0
 
+class UploadSessionCreate(BaseModel):
+    task_id: str
+    filename: str
+    content_type: str = "application/octet-stream"
+    size: int
+    sha256: Optional[str] = None
+
 class UserProfile(BaseModel):
     id: str
     email: str
@@ -183,13 +262,33 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return hash_password(password) == hashed
 
-def create_access_token(user_id) -> str:
+def create_access_token(user: User) -> str:
     payload = {
-        "sub": str(user_id),  # Convert UUID to string and use 'sub' as standard JWT claim
-        "exp": datetime.utcnow() + JWT_EXPIRATION_DELTA
+        "sub": str(user.id),  # Convert UUID to string and use 'sub' as standard JWT claim
+        "exp": datetime.utcnow() + JWT_EXPIRATION_DELTA,
+        # Claims that let stateless auth mode authorize without loading the user
+        "email": user.email,
+        "role": user.role,
+        "status": user.status,
+        "active": bool(user.is_active),
+        "reg": int(user.registration_date.replace(tzinfo=timezone.utc).timestamp()) if user.registration_date else None,
+        "ver": user.token_version or 0
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def user_from_claims(payload: dict) -> User:
+    """Transient User carrying only the fields embedded in the access token"""
+    registration_date = payload.get("reg")
+    return User(
+        id=UUID(payload["sub"]),
+        email=payload.get("email"),
+        role=payload.get("role"),
+        status=payload.get("status"),
+        is_active=payload.get("active", False),
+        registration_date=datetime.utcfromtimestamp(registration_date) if registration_date is not None else None,
+        token_version=payload["ver"]
+    )
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)):
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
@@ -197,10 +296,16 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        db_service = DatabaseService(db)
-        user = await db_service.get_user_by_id(user_id)
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
+        if AUTH_MODE == "stateless" and token_revocations.ready and "ver" in payload:
+            # Authorize from the token claims; status changes bump the version and revoke it
+            if token_revocations.is_revoked(user_id, payload["ver"]):
+                raise HTTPException(status_code=401, detail="Token revoked")
+            user = user_from_claims(payload)
+        else:
+            db_service = DatabaseService(db)
+            user = await db_service.get_user_for_auth(user_id)
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
 
         # Check if user is suspended (only for non-admin users)
         if user.role != "admin" and user.status == "suspended":
@@ -216,16 +321,345 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except (jwt.DecodeError, jwt.InvalidSignatureError, Exception):
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def get_current_user_record(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """Authenticated user with every column loaded, for endpoints that read beyond the token claims"""
+    if AUTH_MODE != "stateless":
+        return current_user
+    user = await DatabaseService(db).get_user_for_auth(current_user.id)
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+async def calculate_user_totals(user_id, db: AsyncSession) -> Tuple[int, int]:
+    """(total_points, total_referrals) including awards still in the points ledger"""
+    if leaderboard_index.ready:
+        totals = leaderboard_index.totals(user_id)
+        if totals is not None:
+            return totals
+
+    # Not listed (admins, inactive accounts) or index not seeded yet
+    return await DatabaseService(db).get_user_totals(user_id)
+
 async def calculate_user_rank(user_id: str, db: AsyncSession) -> int:
     """Calculate user's rank based on total points"""
+    if leaderboard_index.ready:
+        return leaderboard_index.rank(user_id) or len(leaderboard_index) + 1
+
     db_service = DatabaseService(db)
-    leaderboard = await db_service.get_leaderboard(1000)
-    
-    for i, user in enumerate(leaderboard):
-        if user.id == user_id:
-            return i + 1
-    
-    return len(leaderboard) + 1
+    return await db_service.get_user_rank(user_id)
+
+async def calculate_user_ranks(user_ids: List[str], db: AsyncSession) -> dict:
+    """Calculate ranks for several users at once, keyed by str(user_id)"""
+    if leaderboard_index.ready:
+        unranked_position = len(leaderboard_index) + 1
+        return {
+            str(user_id): leaderboard_index.rank(user_id) or unranked_position
+            for user_id in user_ids
+        }
+
+    db_service = DatabaseService(db)
+    return await db_service.get_user_ranks(user_ids)
+
+async def reconcile_leaderboard_index():
+    """Correct the in-memory leaderboard against the users table"""
+    leaderboard_index.begin_reconcile()
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await DatabaseService(session).get_leaderboard_snapshot()
+    except Exception:
+        leaderboard_index.cancel_reconcile()
+        raise
+    # Building the entries is the slow part; applying them only touches users that drifted
+    snapshot = await asyncio.to_thread(leaderboard_index.snapshot_entries, rows)
+    drifted = leaderboard_index.finish_reconcile(snapshot)
+    if drifted:
+        print(f"🔄 Leaderboard index reconciled: {drifted} entries corrected")
+
+async def refresh_token_revocations():
+    """Reload the revocation list used by stateless auth"""
+    async with AsyncSessionLocal() as session:
+        rows = await DatabaseService(session).get_token_revocations()
+    token_revocations.replace(rows)
+
+async def sync_auth_user_cache():
+    """Drop cached users when another worker bumped the auth_users cache version"""
+    async with AsyncSessionLocal() as session:
+        version = await DatabaseService(session).get_cache_version(AUTH_USER_CACHE)
+    auth_user_cache.sync_version(version)
+
+async def backfill_leaderboard_rollups():
+    """Build the windowed leaderboard rollups from history the first time this database starts"""
+    async with AsyncSessionLocal() as session:
+        if await DatabaseService(session).backfill_leaderboard_rollups():
+            print("✅ Leaderboard rollups backfilled from submission history")
+
+async def compact_points_ledger():
+    """Fold pending ledger rows into users.total_points until the ledger is caught up"""
+    folded = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            rows = await DatabaseService(session).compact_points_ledger(POINTS_COMPACTION_BATCH_SIZE)
+        folded += rows
+        if rows < POINTS_COMPACTION_BATCH_SIZE:
+            return folded
+
+async def collect_orphan_blobs():
+    """Delete stored blobs that no submission file references any more"""
+    removed = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            batch = await DatabaseService(session).collect_orphan_blobs(
+                blob_store.remove, BLOB_GC_GRACE_SECONDS, BLOB_GC_BATCH_SIZE
+            )
+        removed += batch
+        if batch < BLOB_GC_BATCH_SIZE:
+            break
+    if removed:
+        print(f"🧹 Removed {removed} unreferenced upload blobs")
+
+async def refresh_duplicate_image_index():
+    """Load perceptual hashes into this worker's index: all of them first, then those recorded since"""
+    since = None
+    if duplicate_image_index.ready and duplicate_image_index.loaded_through is not None:
+        since = duplicate_image_index.loaded_through - timedelta(seconds=PHASH_INDEX_OVERLAP_SECONDS)
+    async with AsyncSessionLocal() as session:
+        async for row in DatabaseService(session).stream_perceptual_hashes(since):
+            duplicate_image_index.add(row.id, row.submission_id, row.perceptual_hash, row.hashed_at)
+    if not duplicate_image_index.ready:
+        duplicate_image_index.ready = True
+        print(f"🖼️ Duplicate image index loaded with {len(duplicate_image_index)} hashes")
+
+async def expire_upload_sessions():
+    """Delete resumable upload sessions past their expiry along with their partial files"""
+    async with AsyncSessionLocal() as session:
+        session_ids = await DatabaseService(session).delete_expired_upload_sessions()
+    for session_id in session_ids:
+        await asyncio.to_thread(remove_session_files, session_id)
+    if session_ids:
+        print(f"🧹 Expired {len(session_ids)} upload sessions")
+
+async def close_analytics_days():
+    """Roll up every day since the analytics watermark through yesterday"""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    async with AsyncSessionLocal() as session:
+        closed = await DatabaseService(session).catch_up_analytics(today)
+    if closed:
+        print(f"📊 Analytics rollups caught up: {closed} days closed")
+
+async def refresh_todays_analytics():
+    """Refresh today's analytics rows for users who submitted through this worker"""
+    user_ids = analytics_rollup_tracker.drain()
+    if not user_ids:
+        return
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        async with AsyncSessionLocal() as session:
+            await DatabaseService(session).rollup_analytics_day(today, user_ids)
+    except Exception:
+        analytics_rollup_tracker.requeue(user_ids)
+        raise
+
+def schedule_background_jobs():
+    """Register the periodic jobs run by the scheduler.
+
+    Jobs that maintain process-local state run on every worker; jobs that
+    maintain shared tables run only on the leader.
+    """
+    if scheduler.jobs:
+        return
+    scheduler.add_job("leaderboard_reconcile", reconcile_leaderboard_index,
+                      IntervalTrigger(LEADERBOARD_RECONCILE_SECONDS), jitter_seconds=5)
+    scheduler.add_job("auth_user_cache_sync", sync_auth_user_cache,
+                      IntervalTrigger(AUTH_USER_CACHE_VERSION_SECONDS), jitter_seconds=1, run_at_start=True)
+    if AUTH_MODE == "stateless":
+        scheduler.add_job("token_revocation_refresh", refresh_token_revocations,
+                          IntervalTrigger(TOKEN_REVOCATION_REFRESH_SECONDS), jitter_seconds=2)
+    scheduler.add_job("analytics_refresh", refresh_todays_analytics,
+                      IntervalTrigger(ANALYTICS_ROLLUP_SECONDS), jitter_seconds=5)
+    scheduler.add_job("duplicate_index_refresh", refresh_duplicate_image_index,
+                      IntervalTrigger(PHASH_INDEX_REFRESH_SECONDS), jitter_seconds=5, run_at_start=True)
+    # Not leader-only: compaction must run even where no leader can be elected (transaction pooler
+    # without SCHEDULER_LEADER_DATABASE_URL); an advisory lock keeps it to one worker at a time
+    scheduler.add_job("points_compaction", compact_points_ledger,
+                      IntervalTrigger(POINTS_COMPACTION_SECONDS), jitter_seconds=1)
+    scheduler.add_job("blob_gc", collect_orphan_blobs,
+                      IntervalTrigger(BLOB_GC_SECONDS), jitter_seconds=60, leader_only=True)
+    scheduler.add_job("upload_session_expiry", expire_upload_sessions,
+                      IntervalTrigger(UPLOAD_SESSION_GC_SECONDS), jitter_seconds=30, leader_only=True)
+    scheduler.add_job("analytics_close_days", close_analytics_days,
+                      CronTrigger(ANALYTICS_CLOSE_DAYS_CRON), leader_only=True, run_at_start=True)
+
+async def stage_submission_files(files: List[UploadFile]) -> List[dict]:
+    """Write uploaded files to the staging directory; returns their job descriptors"""
+    staged = []
+    batch_dir = UPLOAD_STAGING_DIR / uuid.uuid4().hex
+    for file in files:
+        if not file.filename:
+            continue
+        if not staged:
+            await asyncio.to_thread(batch_dir.mkdir, parents=True, exist_ok=True)
+        # The key also names the stored file, so a retried job overwrites rather than duplicates
+        key = uuid.uuid4().hex
+        staged_path = batch_dir / key
+        sha256, size = await stream_to_file(file, staged_path)
+        staged.append({
+            "key": key,
+            "path": str(staged_path),
+            "filename": file.filename,
+            "content_type": file.content_type or "application/octet-stream",
+            "sha256": sha256,
+            "size": size,
+        })
+    return staged
+
+def discard_staged_files(staged: List[dict]) -> None:
+    for staged_file in staged:
+        Path(staged_file["path"]).unlink(missing_ok=True)
+    for batch_dir in {Path(staged_file["path"]).parent for staged_file in staged}:
+        try:
+            batch_dir.rmdir()
+        except OSError:
+            pass
+
+async def create_image_derivatives(images: List[Tuple[str, dict]]) -> Dict[str, Dict[str, str]]:
+    """Render thumbnail and WebP derivatives for (file URL, staged file) pairs on the process pool.
+
+    Content that already has derivatives reuses them. Derivatives are stored
+    next to the original, in the backend that holds it.
+    Returns derivative URLs by kind, keyed by file URL.
+    """
+    async with AsyncSessionLocal() as session:
+        existing = await DatabaseService(session).get_derivatives_by_hash(
+            list({staged_file["sha256"] for _, staged_file in images})
+        )
+
+    async def derive(file_url: str, staged_file: dict) -> Optional[Dict[str, str]]:
+        content_hash = staged_file["sha256"]
+        if content_hash in existing:
+            return existing[content_hash]
+        source = Path(staged_file["path"])
+        if not source.exists():
+            source = blob_store.path_for(content_hash)
+
+        output_dir = UPLOAD_STAGING_DIR / f"derive-{uuid.uuid4().hex}"
+        await asyncio.to_thread(output_dir.mkdir, parents=True, exist_ok=True)
+        try:
+            urls = {}
+            backend = storage_for_url(file_url)
+            for variant in await derivative_renderer.render(source, output_dir):
+                urls[variant["kind"]] = await backend.upload_derivative(Path(variant["path"]), content_hash, variant["kind"])
+            return urls
+        except Exception as e:
+            print(f"⚠️ Could not create derivatives for {staged_file['filename']}: {e}")
+            return None
+        finally:
+            await asyncio.to_thread(shutil.rmtree, output_dir, True)
+
+    results = await asyncio.gather(*(derive(file_url, staged_file) for file_url, staged_file in images))
+    return {file_url: urls for (file_url, _), urls in zip(images, results) if urls}
+
+async def hash_images(images: List[Tuple[str, dict]]) -> Dict[str, int]:
+    """Perceptual hashes of (file URL, staged file) pairs, computed on the process pool"""
+    async def phash(staged_file: dict) -> Optional[int]:
+        source = Path(staged_file["path"])
+        if not source.exists():
+            source = blob_store.path_for(staged_file["sha256"])
+        try:
+            return await derivative_renderer.hash_image(source)
+        except Exception as e:
+            print(f"⚠️ Could not hash image {staged_file['filename']}: {e}")
+            return None
+
+    results = await asyncio.gather(*(phash(staged_file) for _, staged_file in images))
+    return {file_url: value for (file_url, _), value in zip(images, results) if value is not None}
+
+async def process_submission_files(payload: dict):
+    """Job handler: move a submission's staged files to storage and record them.
+
+    Object keys derive from the staging keys (the local backend names files
+    by content hash instead), and rows are only added for URLs not yet
+    recorded, so a retry after a partial failure is safe. Returns the
+    stored files' URLs in staging order.
+    """
+    submission_id = payload["submission_id"]
+    staged = payload.get("files", [])
+
+    for staged_file in staged:
+        if not staged_file.get("sha256") and Path(staged_file["path"]).exists():
+            staged_file["sha256"], staged_file["size"] = await asyncio.to_thread(hash_file, Path(staged_file["path"]))
+
+    # Protect reused blobs from GC before storing; duplicates then cost a hash and a row
+    async with AsyncSessionLocal() as session:
+        await DatabaseService(session).touch_upload_blobs(
+            [(f["sha256"], f["size"]) for f in staged if f.get("sha256")]
+        )
+
+    async def store(staged_file: dict) -> str:
+        file_extension = staged_file["filename"].split(".")[-1] if "." in staged_file["filename"] else "bin"
+        unique_filename = f"{submission_id}_{staged_file['key']}.{file_extension}"
+        return await storage_backend.upload_file(
+            unique_filename, Path(staged_file["path"]), staged_file["content_type"], staged_file["sha256"]
+        )
+
+    file_urls = await gather_uploads([partial(store, staged_file) for staged_file in staged])
+
+    async with AsyncSessionLocal() as session:
+        db_service = DatabaseService(session)
+        recorded_urls = {f.file_url for f in await db_service.get_submission_files(submission_id)}
+        new_files = [
+            (file_url, staged_file)
+            for file_url, staged_file in zip(file_urls, staged)
+            if file_url not in recorded_urls
+        ]
+        if new_files:
+            await db_service.create_submission_files(
+                submission_id,
+                [url for url, _ in new_files],
+                [f["content_type"] for _, f in new_files],
+                content_hashes=[f.get("sha256") for _, f in new_files],
+                sizes=[f.get("size") for _, f in new_files]
+            )
+
+    # Thumbnail and WebP derivatives; an undecodable image must not fail the upload
+    images = [
+        (file_url, staged_file)
+        for file_url, staged_file in zip(file_urls, staged)
+        if staged_file.get("sha256") and is_derivable(staged_file["content_type"])
+    ]
+    if images:
+        derivatives = await create_image_derivatives(images)
+        perceptual_hashes = await hash_images(images)
+        async with AsyncSessionLocal() as session:
+            db_service = DatabaseService(session)
+            await db_service.set_file_derivatives(submission_id, derivatives)
+            hashed = await db_service.set_file_perceptual_hashes(submission_id, perceptual_hashes)
+        # Other workers pick these up on their next index refresh
+        for row in hashed:
+            duplicate_image_index.add(row.id, row.submission_id, row.perceptual_hash)
+
+    await asyncio.to_thread(discard_staged_files, staged)
+    print(f"✅ Stored {len(staged)} files for submission {submission_id}")
+    return file_urls
+
+def storage_for_url(file_url: str) -> StorageBackend:
+    """The backend holding a stored file; local files stay readable after switching backends"""
+    return local_storage if file_url.startswith(LOCAL_UPLOAD_URL_PREFIX) else storage_backend
+
+def register_job_handlers():
+    job_workers.register(SUBMISSION_FILES_JOB, process_submission_files)
+
+async def fetch_submissions_page(db_service: DatabaseService, response: Response, limit: int, **filters) -> List[Submission]:
+    """Fetch one page of admin submissions and set X-Next-Cursor when more remain"""
+    limit = max(1, min(limit, MAX_SUBMISSIONS_PAGE_SIZE))
+    try:
+        submissions = await db_service.get_detailed_submissions(limit=limit + 1, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(submissions) > limit:
+        submissions = submissions[:limit]
+        response.headers["X-Next-Cursor"] = encode_submission_cursor(submissions[-1])
+    return submissions
 
 def get_current_day_from_registration(registration_date: datetime) -> int:
     """Calculate current day based on registration date"""
@@ -423,8 +857,9 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     user = await db_service.get_user_by_id(user_id)
     
     # Create access token
-    token = create_access_token(user.id)
+    token = create_access_token(user)
     rank = await calculate_user_rank(user.id, db)
+    total_points, total_referrals = await calculate_user_totals(user.id, db)
     
     return {
         "message": "Registration successful",
@@ -437,8 +872,8 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             group_leader_name=user.group_leader_name,
             role=user.role,
             current_day=user.current_day,
-            total_points=user.total_points,
-            total_referrals=user.total_referrals,
+            total_points=total_points,
+            total_referrals=total_referrals,
             rank_position=rank,
             registration_date=user.registration_date,
             status=user.status
@@ -471,8 +906,9 @@ async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=403, detail="Your account is inactive. Please contact support.")
 
     # Create access token
-    token = create_access_token(user.id)
+    token = create_access_token(user)
     rank = await calculate_user_rank(user.id, db)
+    total_points, total_referrals = await calculate_user_totals(user.id, db)
 
     return {
         "message": "Login successful",
@@ -485,8 +921,8 @@ async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
             group_leader_name=user.group_leader_name,
             role=user.role,
             current_day=user.current_day,
-            total_points=user.total_points,
-            total_referrals=user.total_referrals,
+            total_points=total_points,
+            total_referrals=total_referrals,
             rank_position=rank,
             registration_date=user.registration_date,
             status=user.status
@@ -494,8 +930,9 @@ async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
     }
 
 @api_router.get("/profile")
-async def get_profile(current_user: User = Depends(get_current_user)):
-    rank = await calculate_user_rank(current_user.id, AsyncSessionLocal())
+async def get_profile(current_user: User = Depends(get_current_user_record), db: AsyncSession = Depends(get_db)):
+    rank = await calculate_user_rank(current_user.id, db)
+    total_points, total_referrals = await calculate_user_totals(current_user.id, db)
     
     return UserProfile(
         id=str(current_user.id),
@@ -505,8 +942,8 @@ async def get_profile(current_user: User = Depends(get_current_user)):
         group_leader_name=current_user.group_leader_name,
         role=current_user.role,
         current_day=current_user.current_day,
-        total_points=current_user.total_points,
-        total_referrals=current_user.total_referrals,
+        total_points=total_points,
+        total_referrals=total_referrals,
         rank_position=rank,
         registration_date=current_user.registration_date,
         status=current_user.status
@@ -537,6 +974,8 @@ async def update_profile(
 
     await db.commit()
     await db.refresh(user_obj)
+    leaderboard_index.apply_user(user_obj)
+    auth_user_cache.invalidate(str(user_obj.id))
 
     return {
         "status": "success",
@@ -601,9 +1040,74 @@ async def get_all_tasks(current_user: User = Depends(get_current_user), db: Asyn
     return sorted(tasks_with_status, key=lambda x: x["day"])
 
 @api_router.get("/leaderboard")
-async def get_leaderboard(limit: int = 10, db: AsyncSession = Depends(get_db)):
-    db_service = DatabaseService(db)
-    return await db_service.get_leaderboard(limit)
+async def get_leaderboard(
+    limit: int = 10,
+    window: str = "all",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    college: Optional[str] = None,
+    group_leader: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    if window != "all" or college or group_leader:
+        return await get_scoped_leaderboard(limit, window, start_date, end_date, college, group_leader, db)
+
+    if leaderboard_index.ready:
+        return leaderboard_index.top(limit)
+
+    # Index not seeded yet (e.g. startup failed to reach the database) - read the table
+    rows = await DatabaseService(db).get_scoped_leaderboard(limit)
+    return [
+        {
+            "id": str(row.id),
+            "name": row.name,
+            "college": row.college,
+            "group_leader_name": row.group_leader_name or "",
+            "total_points": row.total_points or 0,
+            "total_referrals": row.total_referrals or 0,
+            "rank": i + 1
+        }
+        for i, row in enumerate(rows)
+    ]
+
+async def get_scoped_leaderboard(
+    limit: int,
+    window: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    college: Optional[str],
+    group_leader: Optional[str],
+    db: AsyncSession
+) -> List[dict]:
+    """Leaderboard for a time window and/or college/group leader, from rollups and cached by (scope, window)"""
+    try:
+        period_type, start, end = resolve_window(window, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    cache_key = (period_type, start, end, college or None, group_leader or None, limit)
+    entries = leaderboard_cache.get(cache_key)
+    if entries is not None:
+        return entries
+
+    token = leaderboard_cache.begin_load()
+    rows = await DatabaseService(db).get_scoped_leaderboard(
+        limit, college=college, group_leader=group_leader, period_type=period_type, start=start, end=end
+    )
+    entries = [
+        {
+            "id": str(row.id),
+            "name": row.name,
+            "college": row.college,
+            "group_leader_name": row.group_leader_name or "",
+            "total_points": row.total_points or 0,
+            "total_referrals": row.total_referrals or 0,
+            "rank": i + 1
+        }
+        for i, row in enumerate(rows)
+    ]
+    leaderboard_cache.set(cache_key, entries, token)
+    return entries
 
 @api_router.post("/submit-task")
 async def submit_task_text(
@@ -628,9 +1132,6 @@ async def submit_task_text(
     # Calculate points (base + bonus for people connected)
     points_earned = task.points_reward + (submission.people_connected * 10)
     
-    # Check if already submitted
-    existing_submission = await db_service.get_submission_by_user_and_task(current_user.id, submission.task_id)
-    
     submission_data = {
         "user_id": current_user.id,
         "task_id": submission.task_id,
@@ -642,26 +1143,8 @@ async def submit_task_text(
         "submission_date": datetime.utcnow()
     }
     
-    if existing_submission:
-        # Update existing submission
-        old_points = existing_submission.points_earned
-        point_difference = points_earned - old_points
-        
-        await db_service.update_submission(existing_submission.id, submission_data)
-        
-        # Update user points and referrals
-        await db_service.update_user_points(
-            current_user.id, 
-            point_difference, 
-            submission.people_connected - existing_submission.people_connected
-        )
-    else:
-        # Create new submission
-        submission_data["id"] = uuid.uuid4()
-        await db_service.create_submission(submission_data)
-        
-        # Update user points and referrals
-        await db_service.update_user_points(current_user.id, points_earned, submission.people_connected)
+    # Insert or replace the submission and adjust user points and referrals in one transaction
+    await db_service.upsert_submission(submission_data)
     
     return {"message": "Task submitted successfully", "points_earned": points_earned}
 
@@ -691,13 +1174,14 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user), db
     
     # Calculate rank
     rank = await calculate_user_rank(user.id, db)
+    total_points, total_referrals = await calculate_user_totals(user.id, db)
     
     # Calculate completion percentage based on available tasks
     completion_percentage = (total_tasks_completed / max(total_available_tasks, 1)) * 100
     
     return {
-        "total_points": user.total_points,
-        "total_referrals": user.total_referrals,
+        "total_points": total_points,
+        "total_referrals": total_referrals,
         "current_day": current_day,
         "total_tasks_completed": total_tasks_completed,
         "total_available_tasks": total_available_tasks,
@@ -785,142 +1269,32 @@ async def submit_task_with_files(
         "submission_date": datetime.utcnow(),
     }
 
-    # 4) Upsert submission
-    existing = await db_service.get_submission_by_user_and_task(current_user.id, task_id)
-    submission_id = None
-
-    if existing:
-        old_points = existing.points_earned
-        point_diff = points_earned - old_points
+    # 4) Stage files (optional for Day 0 orientation tasks); storage upload runs in the job queue
+    try:
+        staged = await stage_submission_files(files or [])
+    except Exception as e:
+        print(f"❌ File staging error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save files: {str(e)}")
 
-        await db_service.update_submission(existing.id, submission_data)
-        await db_service.update_user_points(
-            current_user.id,
-            point_diff,
-            people_connected - existing.people_connected
+    # 5) Upsert submission, adjust user points and referrals, and enqueue the file job in one transaction
+    try:
+        await db_service.upsert_submission(
+            submission_data,
+            follow_up_job=(SUBMISSION_FILES_JOB, {"files": staged}) if staged else None
         )
-        submission_id = existing.id
-    else:
-        submission_id = uuid.uuid4()
-        submission_data["id"] = submission_id
-        await db_service.create_submission(submission_data)
-        await db_service.update_user_points(current_user.id, points_earned, people_connected)
-
-    # 5) Upload files (Supabase or local fallback)
-    file_urls = []
-
-    # For Day 0 (orientation) tasks, files are optional
-    if files is None:
-        files = []
-
-    # Try Supabase first, fall back to local storage if it fails
-    use_local_storage = False
-
-    if supabase is not None:
-        # Upload to Supabase Storage
-        try:
-            for file in files:
-                if not file.filename:
-                    continue
-
-                # Generate unique file name
-                file_extension = file.filename.split(".")[-1] if "." in file.filename else "bin"
-                unique_filename = f"{submission_id}_{uuid.uuid4()}.{file_extension}"
-
-                # Read file content
-                file_content = await file.read()
-
-                # Upload to Supabase Storage
-                upload_response = supabase.storage.from_(SUPABASE_BUCKET).upload(unique_filename, file_content)
-
-                # Get the public URL for the uploaded file
-                public_url = supabase.storage.from_(SUPABASE_BUCKET).get_public_url(unique_filename)
-                print("Image public URL:", public_url)
-
-                file_urls.append({
-                    "filename": file.filename,
-                    "url": public_url
-                })
-
-                # Create SubmissionFile record in the database
-                try:
-                    await db_service.create_submission_files(
-                        str(submission_id),
-                        [public_url],
-                        [file.content_type or 'application/octet-stream']
-                    )
-                    print(f"✅ Created SubmissionFile record for: {file.filename}")
-                except Exception as e:
-                    print(f"⚠️ Could not create SubmissionFile record: {e}")
-                    # Continue without failing
-
-        except Exception as e:
-            print(f"❌ File upload error: {e}")
-            # If Supabase fails, fall back to local storage
-            if "Bucket not found" in str(e) or "bucket" in str(e).lower():
-                print(f"📁 Falling back to local storage due to Supabase error")
-                use_local_storage = True
-            else:
-                raise HTTPException(status_code=500, detail=f"Failed to upload files: {str(e)}")
-    else:
-        use_local_storage = True
-
-    if use_local_storage:
-        # Fallback to local storage
-        uploads_dir = Path("uploads")
-        uploads_dir.mkdir(exist_ok=True)
-
-        # Clear any partial uploads from Supabase attempt
-        file_urls = []
-
-        try:
-            for file in files:
-                if not file.filename:
-                    continue
-
-                # Reset file pointer if it was read during Supabase attempt
-                await file.seek(0)
-
-                # Generate unique file name
-                file_extension = file.filename.split(".")[-1] if "." in file.filename else "bin"
-                unique_filename = f"{submission_id}_{uuid.uuid4()}.{file_extension}"
-
-                # Save to local uploads directory
-                file_path = uploads_dir / unique_filename
-
-                # Read and save file content
-                file_content = await file.read()
-                with open(file_path, "wb") as f:
-                    f.write(file_content)
-
-                local_url = f"/uploads/{unique_filename}"
-                file_urls.append({
-                    "filename": file.filename,
-                    "url": local_url
-                })
-
-                # Create SubmissionFile record in the database for local files too
-                try:
-                    await db_service.create_submission_files(
-                        str(submission_id),
-                        [local_url],
-                        [file.content_type or 'application/octet-stream']
-                    )
-                    print(f"✅ Created SubmissionFile record for local file: {file.filename}")
-                except Exception as e:
-                    print(f"⚠️ Could not create SubmissionFile record for local file: {e}")
-
-                print(f"📁 File saved locally: {file_path}")
-
-        except Exception as e:
-            print(f"❌ Local file save error: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to save files locally: {str(e)}")
+    except Exception:
+        await asyncio.to_thread(discard_staged_files, staged)
+        raise
+    if staged:
+        job_workers.notify()
 
     return {
         "message": "Task submitted successfully",
         "points_earned": points_earned,
-        "saved_files": [f["filename"] for f in file_urls],
-        "file_urls": file_urls,
+        "saved_files": [f["filename"] for f in staged],
+        # URLs are recorded once the background job stores the files
+        "file_urls": [],
+        "files_processing": bool(staged),
     }
 
 # Admin endpoints for file management
@@ -934,53 +1308,220 @@ async def upload_submission(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    if supabase is None:
-        raise HTTPException(status_code=503, detail="File upload service not available. Please configure Supabase credentials.")
-    
-    file_urls = []
-    
     try:
-        for file in files:
-            if not file.filename:
-                continue
-                
-            # Generate unique file name
-            file_extension = file.filename.split(".")[-1] if "." in file.filename else "bin"
-            unique_filename = f"{submission_id}_{uuid.uuid4()}.{file_extension}"
-            
-            # Read file content
-            file_content = await file.read()
-            
-            # Upload to Supabase Storage
-            upload_response = supabase.storage.from_(SUPABASE_BUCKET).upload(unique_filename, file_content)
-            
-            # Old (incorrect) code:
-            # file_url = upload_response.get('key')
+        UUID(submission_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid submission ID format")
 
-            # New (correct) code:
-            file_url = getattr(upload_response, 'key', None)
-            # Or, if your client uses .data:
-            # file_url = upload_response.data.get('Key') if hasattr(upload_response, 'data') else None
-            
-            file_urls.append(file_url)
-            
-            # Insert into submission_files table
-            try:
-                supabase.table("submission_files").insert({
-                    "submission_id": submission_id,
-                    "file_url": file_url,
-                    "filename": file.filename,
-                    "created_at": datetime.utcnow().isoformat()
-                }).execute()
-            except Exception as e:
-                print(f"⚠️ Could not insert into submission_files table: {e}")
-                
+    # Same path as submitted files, run inline so the URLs can be returned
+    staged = await stage_submission_files(files)
+    try:
+        file_urls = await process_submission_files({"submission_id": submission_id, "files": staged})
     except Exception as e:
         print(f"❌ File upload error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to upload files: {str(e)}")
+    finally:
+        await asyncio.to_thread(discard_staged_files, staged)
     
     return {"message": "Files uploaded successfully", "file_urls": file_urls}
 
+# Resumable uploads: create a session, PATCH chunks at Upload-Offset, then finalize
+def upload_session_status(upload_session) -> dict:
+    return {
+        "id": str(upload_session.id),
+        "submission_id": str(upload_session.submission_id),
+        "filename": upload_session.filename,
+        "offset": upload_session.received_bytes,
+        "size": upload_session.total_bytes,
+        "status": upload_session.status,
+        "chunk_size": UPLOAD_SESSION_CHUNK_BYTES,
+        "expires_at": upload_session.expires_at.isoformat(),
+    }
+
+def parse_upload_session_id(session_id: str) -> UUID:
+    try:
+        return UUID(session_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+async def get_owned_upload_session(db_service: DatabaseService, session_id: UUID, user: User):
+    upload_session = await db_service.get_upload_session(session_id)
+    if upload_session is None or str(upload_session.user_id) != str(user.id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return upload_session
+
+@api_router.post("/upload-sessions")
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    if session_data.size <= 0:
+        raise HTTPException(status_code=400, detail="File size must be positive")
+    if session_data.size > UPLOAD_SESSION_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Files are limited to {UPLOAD_SESSION_MAX_BYTES} bytes")
+    sha256 = session_data.sha256.lower() if session_data.sha256 else None
+    if sha256 and (len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256)):
+        raise HTTPException(status_code=400, detail="sha256 must be 64 hex characters")
+    try:
+        task_uuid = UUID(session_data.task_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid task ID format")
+
+    db_service = DatabaseService(db)
+    submission = await db_service.get_submission_by_user_and_task(current_user.id, task_uuid)
+    if submission is None:
+        raise HTTPException(status_code=404, detail="Submit the task before uploading files to it")
+
+    now = datetime.utcnow()
+    upload_session = await db_service.create_upload_session({
+        "user_id": current_user.id,
+        "submission_id": submission.id,
+        "filename": session_data.filename,
+        "content_type": session_data.content_type or "application/octet-stream",
+        "total_bytes": session_data.size,
+        "sha256": sha256,
+        "created_at": now,
+        "updated_at": now,
+        "expires_at": now + timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS),
+    })
+    return upload_session_status(upload_session)
+
+@api_router.get("/upload-sessions/{session_id}")
+async def get_upload_session(
+    session_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    upload_session = await get_owned_upload_session(DatabaseService(db), parse_upload_session_id(session_id), current_user)
+    response.headers["Upload-Offset"] = str(upload_session.received_bytes)
+    return upload_session_status(upload_session)
+
+@api_router.patch("/upload-sessions/{session_id}")
+async def append_upload_chunk(
+    session_id: str,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        offset = int(request.headers["upload-offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Upload-Offset header is required")
+
+    session_id = parse_upload_session_id(session_id)
+    async with upload_session_locks.hold(session_id):
+        # Short-lived sessions: no database connection is held while the body streams in
+        async with AsyncSessionLocal() as session:
+            upload_session = await get_owned_upload_session(DatabaseService(session), session_id, current_user)
+        if upload_session.status != "open":
+            raise HTTPException(status_code=409, detail="Upload session is already finalized")
+        if offset != upload_session.received_bytes:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload-Offset must be {upload_session.received_bytes}",
+                headers={"Upload-Offset": str(upload_session.received_bytes)}
+            )
+
+        try:
+            written = await write_chunk(
+                session_part_path(upload_session.id), offset, request.stream(),
+                limit=upload_session.total_bytes - offset
+            )
+        except ChunkTooLarge:
+            raise HTTPException(status_code=413, detail="Chunk runs past the declared file size")
+
+        if written:
+            async with AsyncSessionLocal() as session:
+                advanced = await DatabaseService(session).advance_upload_session(
+                    upload_session.id, offset, offset + written
+                )
+            if not advanced:
+                raise HTTPException(status_code=409, detail="Upload session changed during the request")
+            upload_session.received_bytes = offset + written
+
+    response.headers["Upload-Offset"] = str(upload_session.received_bytes)
+    return upload_session_status(upload_session)
+
+@api_router.post("/upload-sessions/{session_id}/finalize")
+async def finalize_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Return the connection authentication used; short-lived sessions below keep
+    # no transaction open while the file is hashed
+    await db.close()
+    session_id = parse_upload_session_id(session_id)
+    async with upload_session_locks.hold(session_id):
+        async with AsyncSessionLocal() as session:
+            upload_session = await get_owned_upload_session(DatabaseService(session), session_id, current_user)
+        if upload_session.status != "open":
+            raise HTTPException(status_code=409, detail="Upload session is already finalized")
+        if upload_session.received_bytes != upload_session.total_bytes:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: {upload_session.received_bytes} of {upload_session.total_bytes} bytes received"
+            )
+
+        part_path = session_part_path(upload_session.id)
+        sha256, size = await asyncio.to_thread(hash_file, part_path)
+        if size != upload_session.total_bytes or (upload_session.sha256 and sha256 != upload_session.sha256):
+            async with AsyncSessionLocal() as session:
+                await DatabaseService(session).delete_upload_session(upload_session.id)
+            await asyncio.to_thread(remove_session_files, upload_session.id)
+            raise HTTPException(status_code=422, detail="Uploaded file does not match the declared size or sha256")
+
+        # Hand the assembled file to the same pipeline as multipart submissions
+        key = uuid.uuid4().hex
+        staged_path = UPLOAD_STAGING_DIR / uuid.uuid4().hex / key
+        await asyncio.to_thread(staged_path.parent.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(part_path.replace, staged_path)
+        staged_file = {
+            "key": key,
+            "path": str(staged_path),
+            "filename": upload_session.filename,
+            "content_type": upload_session.content_type,
+            "sha256": sha256,
+            "size": size,
+        }
+        async with AsyncSessionLocal() as session:
+            finalized = await DatabaseService(session).finalize_upload_session(
+                upload_session.id, SUBMISSION_FILES_JOB,
+                {"submission_id": str(upload_session.submission_id), "files": [staged_file]}
+            )
+        if not finalized:
+            await asyncio.to_thread(staged_path.replace, part_path)
+            raise HTTPException(status_code=409, detail="Upload session changed during the request")
+        await asyncio.to_thread(session_lock_path(upload_session.id).unlink, missing_ok=True)
+
+    job_workers.notify()
+    return {
+        "message": "Upload complete",
+        "submission_id": str(upload_session.submission_id),
+        "filename": upload_session.filename,
+        "sha256": sha256,
+        "size": size,
+        "files_processing": True,
+    }
+
+@api_router.delete("/upload-sessions/{session_id}")
+async def abort_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    db_service = DatabaseService(db)
+    session_id = parse_upload_session_id(session_id)
+    async with upload_session_locks.hold(session_id):
+        upload_session = await get_owned_upload_session(db_service, session_id, current_user)
+        if upload_session.status != "open":
+            raise HTTPException(status_code=409, detail="Upload session is already finalized")
+        await db_service.delete_upload_session(upload_session.id)
+        await asyncio.to_thread(remove_session_files, upload_session.id)
+    return {"message": "Upload session aborted"}
+
 @api_router.get("/admin/user_submissions/{user_id}")
 async def get_user_submissions_with_files(
     user_id: str,
@@ -1051,38 +1592,27 @@ async def get_all_ambassadors(
     db_service = DatabaseService(db)
 
     try:
-        # Get all ambassador users
-        ambassadors = await db_service.get_all_users()
+        # Get all ambassadors with their submission totals in one query
+        aggregates = await db_service.get_ambassador_aggregates()
 
-        # Filter only ambassadors and calculate their stats
         ambassador_data = []
-        for user in ambassadors:
-            if user.role == "ambassador":
-                # Get user's submissions and calculate stats
-                submissions = await db_service.get_user_submissions(user.id)
-                total_points = sum(sub.points_earned or 0 for sub in submissions)
-                tasks_completed = len([sub for sub in submissions if sub.status == "completed"])
-
-                # Debug logging
-                print(f"🔍 User {user.name}: {len(submissions)} submissions, {tasks_completed} completed")
-                if submissions:
-                    print(f"   Sample statuses: {[sub.status for sub in submissions[:3]]}")
-
-                ambassador_data.append({
-                    "id": str(user.id),
-                    "user_id": str(user.id),
-                    "name": user.name,
-                    "email": user.email,
-                    "college": user.college,
-                    "group_leader_name": user.group_leader_name,
-                    "status": user.status or "active",
-                    "is_active": user.is_active,
-                    "registration_date": user.registration_date.isoformat() if user.registration_date else None,
-                    "last_login": user.last_login.isoformat() if user.last_login else None,
-                    "tasks_completed": tasks_completed,
-                    "total_points": total_points,
-                    "total_submissions": len(submissions)
-                })
+        for stats in aggregates:
+            user = stats["user"]
+            ambassador_data.append({
+                "id": str(user.id),
+                "user_id": str(user.id),
+                "name": user.name,
+                "email": user.email,
+                "college": user.college,
+                "group_leader_name": user.group_leader_name,
+                "status": user.status or "active",
+                "is_active": user.is_active,
+                "registration_date": user.registration_date.isoformat() if user.registration_date else None,
+                "last_login": user.last_login.isoformat() if user.last_login else None,
+                "tasks_completed": stats["completed_count"],
+                "total_points": stats["points_sum"],
+                "total_submissions": stats["submission_count"]
+            })
 
         # Sort by total points descending
         ambassador_data.sort(key=lambda x: x["total_points"], reverse=True)
@@ -1095,8 +1625,16 @@ async def get_all_ambassadors(
 
 @api_router.get("/admin/submissions")
 async def get_all_submissions(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    group_leader: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    task_id: str = None,
+    status: str = None,
+    cursor: str = None,
+    limit: int = SUBMISSIONS_PAGE_SIZE
 ):
     # Verify admin access
     if current_user.role != "admin":
@@ -1105,33 +1643,34 @@ async def get_all_submissions(
     db_service = DatabaseService(db)
 
     try:
-        # Get all submissions with user details
-        all_submissions = []
-        users = await db_service.get_all_users()
-
-        for user in users:
-            if user.role == "ambassador":
-                submissions = await db_service.get_user_submissions(user.id)
-                for submission in submissions:
-                    all_submissions.append({
-                        "id": str(submission.id),
-                        "user_id": str(user.id),
-                        "user_name": user.name,
-                        "user_email": user.email,
-                        "task_id": submission.task_id,
-                        "status_text": submission.status_text,
-                        "people_connected": submission.people_connected,
-                        "points_earned": submission.points_earned,
-                        "submission_date": submission.submission_date.isoformat() if submission.submission_date else None,
-                        "updated_at": submission.updated_at.isoformat() if submission.updated_at else None,
-                        "file_urls": submission.proof_files or []
-                    })
+        # One page of submissions with user details, newest first
+        submissions = await fetch_submissions_page(
+            db_service, response, limit,
+            group_leader=group_leader, start_date=start_date, end_date=end_date,
+            task_id=task_id, status=status, cursor=cursor
+        )
 
-        # Sort by submission date descending
-        all_submissions.sort(key=lambda x: x["submission_date"] or x["created_at"] or "", reverse=True)
+        all_submissions = []
+        for submission in submissions:
+            user = submission.user
+            all_submissions.append({
+                "id": str(submission.id),
+                "user_id": str(user.id),
+                "user_name": user.name,
+                "user_email": user.email,
+                "task_id": submission.task_id,
+                "status_text": submission.status_text,
+                "people_connected": submission.people_connected,
+                "points_earned": submission.points_earned,
+                "submission_date": submission.submission_date.isoformat() if submission.submission_date else None,
+                "updated_at": submission.updated_at.isoformat() if submission.updated_at else None,
+                "file_urls": submission.proof_files or []
+            })
 
         return all_submissions
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching submissions: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch submissions data")
@@ -1148,57 +1687,22 @@ async def get_admin_dashboard_stats(
     db_service = DatabaseService(db)
 
     try:
-        # Get all users and submissions
-        all_users = await db_service.get_all_users()
-        ambassadors = [user for user in all_users if user.role == "ambassador"]
-        active_ambassadors = [user for user in ambassadors if user.is_active and (user.status != "suspended")]
-
-        # Get all submissions
-        all_submissions = []
-        total_points = 0
-
-        for user in ambassadors:
-            submissions = await db_service.get_user_submissions(user.id)
-            all_submissions.extend(submissions)
-            total_points += sum(sub.points_earned or 0 for sub in submissions)
-
-        # Calculate time-based stats
-        from datetime import datetime, timedelta
-        now = datetime.utcnow()
-        today = now.date()
-        week_ago = now - timedelta(days=7)
-
-        # Today's submissions
-        today_submissions = [
-            sub for sub in all_submissions
-            if sub.submission_date and sub.submission_date.date() == today
-        ]
-
-        # This week's submissions
-        week_submissions = [
-            sub for sub in all_submissions
-            if sub.submission_date and sub.submission_date >= week_ago
-        ]
-
-        # Pending approvals (submissions that need review)
-        pending_submissions = [
-            sub for sub in all_submissions
-            if sub.status_text in ["submitted", "pending", "in_progress"]
-        ]
+        # Pending approvals are submissions that still need review
+        totals = await db_service.get_admin_dashboard_totals(["submitted", "pending", "in_progress"])
 
         # Get total available tasks
         tasks = await db_service.get_all_tasks()
         total_available_tasks = len([task for task in tasks if task.is_active])
 
         return {
-            "total_ambassadors": len(ambassadors),
-            "active_ambassadors": len(active_ambassadors),
-            "total_tasks_assigned": len(ambassadors) * total_available_tasks,
-            "tasks_completed_today": len(today_submissions),
-            "total_tasks_submitted": len(all_submissions),
-            "tasks_submitted_this_week": len(week_submissions),
-            "total_points_distributed": total_points,
-            "pending_approvals": len(pending_submissions),
+            "total_ambassadors": totals.total_ambassadors,
+            "active_ambassadors": totals.active_ambassadors,
+            "total_tasks_assigned": totals.total_ambassadors * total_available_tasks,
+            "tasks_completed_today": totals.submissions_today,
+            "total_tasks_submitted": totals.total_submissions,
+            "tasks_submitted_this_week": totals.submissions_this_week,
+            "total_points_distributed": totals.points_sum,
+            "pending_approvals": totals.pending_submissions,
             "system_health": 98,  # Could be calculated based on error rates, uptime, etc.
             "total_available_tasks": total_available_tasks
         }
@@ -1209,8 +1713,16 @@ async def get_admin_dashboard_stats(
 
 @api_router.get("/admin/all_submissions_with_files")
 async def get_all_submissions_with_files(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    group_leader: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    task_id: str = None,
+    status: str = None,
+    cursor: str = None,
+    limit: int = SUBMISSIONS_PAGE_SIZE
 ):
     # Verify admin access
     if current_user.role != "admin":
@@ -1219,31 +1731,35 @@ async def get_all_submissions_with_files(
     db_service = DatabaseService(db)
 
     try:
-        # Get all users and their submissions
+        # One page of submissions with user details, newest first
+        submissions = await fetch_submissions_page(
+            db_service, response, limit,
+            group_leader=group_leader, start_date=start_date, end_date=end_date,
+            task_id=task_id, status=status, cursor=cursor
+        )
+
         all_submissions_with_files = []
-        users = await db_service.get_all_users()
-
-        for user in users:
-            if user.role == "ambassador":
-                submissions = await db_service.get_user_submissions(user.id)
-                for submission in submissions:
-                    all_submissions_with_files.append({
-                        "id": str(submission.id),
-                        "user_id": str(user.id),
-                        "user_name": user.name,
-                        "user_email": user.email,
-                        "user_college": user.college,
-                        "task_id": submission.task_id,
-                        "status_text": submission.status_text,
-                        "people_connected": submission.people_connected,
-                        "points_earned": submission.points_earned,
-                        "submission_date": submission.submission_date.isoformat() if submission.submission_date else None,
-                        "updated_at": submission.updated_at.isoformat() if submission.updated_at else None,
-                        "file_urls": submission.proof_files or []
-                    })
+        for submission in submissions:
+            user = submission.user
+            all_submissions_with_files.append({
+                "id": str(submission.id),
+                "user_id": str(user.id),
+                "user_name": user.name,
+                "user_email": user.email,
+                "user_college": user.college,
+                "task_id": submission.task_id,
+                "status_text": submission.status_text,
+                "people_connected": submission.people_connected,
+                "points_earned": submission.points_earned,
+                "submission_date": submission.submission_date.isoformat() if submission.submission_date else None,
+                "updated_at": submission.updated_at.isoformat() if submission.updated_at else None,
+                "file_urls": submission.proof_files or []
+            })
 
         return all_submissions_with_files
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching submissions with files: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch submissions with files")
@@ -1351,8 +1867,7 @@ async def get_growth_analytics(
             "monthly_data": monthly_data,
             "avg_task_completion": 75,  # Could be calculated from actual data
             "total_points_awarded": sum(
-                sum(sub.points_earned or 0 for sub in await db_service.get_user_submissions(user.id))
-                for user in ambassadors
+                stats["points_sum"] for stats in await db_service.get_ambassador_rollup_totals()
             ),
             "system_uptime": 99.8,
             "peak_active_hours": "2:00 PM - 6:00 PM",
@@ -1375,9 +1890,8 @@ async def get_performance_analytics(
     db_service = DatabaseService(db)
 
     try:
-        # Get all ambassadors and their submissions
-        all_users = await db_service.get_all_users()
-        ambassadors = [user for user in all_users if user.role == "ambassador"]
+        # Get all ambassadors with the cumulative totals of their latest analytics rollup
+        aggregates = await db_service.get_ambassador_rollup_totals()
 
         # Calculate performance metrics
         performance_data = []
@@ -1385,10 +1899,10 @@ async def get_performance_analytics(
         average_performers = 0
         low_performers = 0
 
-        for user in ambassadors:
-            submissions = await db_service.get_user_submissions(user.id)
-            total_points = sum(sub.points_earned or 0 for sub in submissions)
-            tasks_completed = len([sub for sub in submissions if sub.status == "completed"])
+        for stats in aggregates:
+            user = stats["user"]
+            total_points = stats["points_sum"]
+            tasks_completed = stats["completed_count"]
 
             # Categorize performance (you can adjust these thresholds)
             if total_points >= 2000:
@@ -1452,7 +1966,7 @@ async def get_performance_analytics(
                 for college, data in top_colleges
             ],
             "overall_stats": {
-                "total_ambassadors": len(ambassadors),
+                "total_ambassadors": len(aggregates),
                 "avg_points_per_ambassador": sum(d["total_points"] for d in performance_data) / len(performance_data) if performance_data else 0,
                 "completion_rate": (sum(d["tasks_completed"] for d in performance_data) / (len(performance_data) * 30)) * 100 if performance_data else 0  # Assuming 30 total tasks
             }
@@ -1474,11 +1988,9 @@ async def get_engagement_analytics(
     db_service = DatabaseService(db)
 
     try:
-        from datetime import datetime, timedelta
-
-        # Get all users and submissions
-        all_users = await db_service.get_all_users()
-        ambassadors = [user for user in all_users if user.role == "ambassador"]
+        # Daily counts and retention come from two grouped queries
+        stats = await db_service.get_engagement_stats(days=30)
+        total_ambassadors = stats["total_ambassadors"]
 
         # Calculate daily engagement for the last 30 days
         now = datetime.utcnow()
@@ -1486,28 +1998,13 @@ async def get_engagement_analytics(
 
         for i in range(30):
             day = now - timedelta(days=i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-
-            daily_submissions = 0
-            active_users = 0
-
-            for user in ambassadors:
-                submissions = await db_service.get_user_submissions(user.id)
-                day_submissions = [
-                    sub for sub in submissions
-                    if sub.submission_date and day_start <= sub.submission_date < day_end
-                ]
-
-                if day_submissions:
-                    daily_submissions += len(day_submissions)
-                    active_users += 1
+            daily_submissions, active_users = stats["daily"].get(day.date(), (0, 0))
 
             daily_engagement.append({
                 "date": day.strftime("%Y-%m-%d"),
                 "submissions": daily_submissions,
                 "active_users": active_users,
-                "engagement_rate": (active_users / len(ambassadors)) * 100 if ambassadors else 0
+                "engagement_rate": (active_users / total_ambassadors) * 100 if total_ambassadors else 0
             })
 
         daily_engagement.reverse()  # Show oldest to newest
@@ -1516,35 +2013,16 @@ async def get_engagement_analytics(
         peak_hours = "2:00 PM - 6:00 PM"  # This could be calculated from actual submission times
 
         # Calculate retention metrics
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-
-        active_this_week = 0
-        active_this_month = 0
-
-        for user in ambassadors:
-            submissions = await db_service.get_user_submissions(user.id)
-            recent_submissions = [
-                sub for sub in submissions
-                if sub.submission_date and sub.submission_date >= week_ago
-            ]
-            month_submissions = [
-                sub for sub in submissions
-                if sub.submission_date and sub.submission_date >= month_ago
-            ]
-
-            if recent_submissions:
-                active_this_week += 1
-            if month_submissions:
-                active_this_month += 1
+        active_this_week = stats["active_this_week"]
+        active_this_month = stats["active_this_month"]
 
         return {
             "daily_engagement": daily_engagement,
             "peak_hours": peak_hours,
             "retention_metrics": {
-                "weekly_active_rate": (active_this_week / len(ambassadors)) * 100 if ambassadors else 0,
-                "monthly_active_rate": (active_this_month / len(ambassadors)) * 100 if ambassadors else 0,
-                "total_ambassadors": len(ambassadors)
+                "weekly_active_rate": (active_this_week / total_ambassadors) * 100 if total_ambassadors else 0,
+                "monthly_active_rate": (active_this_month / total_ambassadors) * 100 if total_ambassadors else 0,
+                "total_ambassadors": total_ambassadors
             },
             "engagement_summary": {
                 "avg_daily_submissions": sum(d["submissions"] for d in daily_engagement) / len(daily_engagement) if daily_engagement else 0,
@@ -1557,6 +2035,69 @@ async def get_engagement_analytics(
         print(f"❌ Error fetching engagement analytics: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch engagement analytics")
 
+@api_router.get("/admin/scheduler/jobs")
+async def get_scheduler_jobs(current_user: User = Depends(get_current_user)):
+    # Verify admin access
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {
+        "is_leader": scheduler.is_leader,
+        "jobs": scheduler.get_stats()
+    }
+
+@api_router.get("/admin/jobs")
+async def get_job_queue(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Verify admin access
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    db_service = DatabaseService(db)
+    summary = await db_service.get_job_queue_summary()
+    return {
+        "workers": job_workers.get_stats(),
+        "counts": summary["counts"],
+        "dead_letters": [
+            {
+                "id": job.id,
+                "kind": job.kind,
+                "payload": job.payload,
+                "attempts": job.attempts,
+                "last_error": job.last_error,
+                "created_at": job.created_at,
+                "updated_at": job.updated_at,
+            }
+            for job in summary["dead_letters"]
+        ]
+    }
+
+@api_router.post("/admin/jobs/{job_id}/retry")
+async def retry_dead_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Verify admin access
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    db_service = DatabaseService(db)
+    if not await db_service.retry_dead_job(job_id):
+        raise HTTPException(status_code=404, detail="Dead-lettered job not found")
+    job_workers.notify()
+    return {"message": "Job requeued"}
+
+@api_router.get("/admin/storage/metrics")
+async def get_storage_metrics(current_user: User = Depends(get_current_user)):
+    # Verify admin access
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return storage_backend.get_metrics()
+
 # Community Management Endpoints
 @api_router.get("/admin/community/stats")
 async def get_community_stats(
@@ -1619,7 +2160,7 @@ async def get_announcements(
 # Admin Profile Management Endpoints
 @api_router.get("/admin/profile")
 async def get_admin_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db)
 ):
     # Verify admin access
@@ -1670,21 +2211,17 @@ async def get_admin_stats(
     db_service = DatabaseService(db)
 
     try:
-        # Get all users and calculate stats
-        all_users = await db_service.get_all_users()
-        ambassadors = [user for user in all_users if user.role == "ambassador"]
+        # Get all ambassadors with their submission totals
+        aggregates = await db_service.get_ambassador_aggregates()
 
         # Calculate total submissions
-        total_submissions = 0
-        for user in ambassadors:
-            submissions = await db_service.get_user_submissions(user.id)
-            total_submissions += len(submissions)
+        total_submissions = sum(stats["submission_count"] for stats in aggregates)
 
         # Get all tasks
         all_tasks = await db_service.get_all_tasks()
 
         admin_stats = {
-            "users_managed": len(ambassadors),
+            "users_managed": len(aggregates),
             "reports_generated": total_submissions,  # Using submissions as reports metric
             "system_actions": len(all_tasks) + total_submissions,  # Tasks created + submissions
             "uptime_maintained": 99.8  # Static for now
@@ -1761,13 +2298,42 @@ async def change_admin_password(
         raise HTTPException(status_code=500, detail="Failed to change password")
 
 # Admin Reports Endpoints
+async def find_duplicate_submissions(db_service: DatabaseService, submissions) -> Dict[UUID, Dict[str, int]]:
+    """Near-duplicate images in other submissions: submission id -> {other submission id: closest distance}.
+
+    Matched files are checked against the database, since another worker may
+    have deleted them; ones that are gone are dropped from this worker's index.
+    """
+    matches = []
+    for submission in submissions:
+        for file in submission.files or []:
+            if file.perceptual_hash is not None:
+                for match in duplicate_image_index.find_duplicates(file.perceptual_hash, submission.id):
+                    matches.append((submission.id, match))
+
+    existing = await db_service.get_existing_submission_file_ids([match["file_id"] for _, match in matches])
+    duplicates: Dict[UUID, Dict[str, int]] = {}
+    for submission_id, match in matches:
+        if match["file_id"] not in existing:
+            duplicate_image_index.remove(match["file_id"])
+            continue
+        closest = duplicates.setdefault(submission_id, {})
+        if match["distance"] < closest.get(match["submission_id"], PHASH_DUPLICATE_DISTANCE + 1):
+            closest[match["submission_id"]] = match["distance"]
+    return duplicates
+
 @api_router.get("/admin/reports/submissions")
 async def get_submissions_report(
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     group_leader: str = None,
     start_date: str = None,
-    end_date: str = None
+    end_date: str = None,
+    task_id: str = None,
+    status: str = None,
+    cursor: str = None,
+    limit: int = SUBMISSIONS_PAGE_SIZE
 ):
     # Verify admin access
     if current_user.role != "admin":
@@ -1776,70 +2342,69 @@ async def get_submissions_report(
     db_service = DatabaseService(db)
 
     try:
-        from datetime import datetime
-
-        # Get all users and their submissions
-        all_users = await db_service.get_all_users()
-        ambassadors = [user for user in all_users if user.role == "ambassador"]
+        # Filters are applied in SQL; one page is returned per request
+        submissions = await fetch_submissions_page(
+            db_service, response, limit,
+            group_leader=group_leader, start_date=start_date, end_date=end_date,
+            task_id=task_id, status=status, cursor=cursor
+        )
 
-        # Filter by group leader if specified
-        if group_leader and group_leader != "all":
-            ambassadors = [user for user in ambassadors if user.group_leader_name == group_leader]
+        duplicate_matches = await find_duplicate_submissions(db_service, submissions)
 
         all_submissions = []
-        for user in ambassadors:
-            submissions = await db_service.get_user_submissions(user.id)
-
-            for submission in submissions:
-                # Filter by date range if specified
-                if start_date or end_date:
-                    submission_date = submission.submission_date
-                    if submission_date:
-                        if start_date and submission_date < datetime.fromisoformat(start_date):
-                            continue
-                        if end_date and submission_date > datetime.fromisoformat(end_date):
-                            continue
-
-                # Get task details
-                task = await db_service.get_task_by_id(submission.task_id)
-
-                # Get the first image file URL from submission files
-                image_url = None
-                if hasattr(submission, 'files') and submission.files:
-                    # Get the first image file
-                    for file in submission.files:
-                        if file.file_url:
-                            image_url = file.file_url
-                            break
-
-                # Fallback to proof_image if no files found
-                if not image_url and submission.proof_image:
-                    image_url = submission.proof_image
-
-                submission_data = {
-                    "id": str(submission.id),
-                    "task_id": str(submission.task_id),
-                    "task_title": task.title if task else f"Day {submission.day} Task",
-                    "task_day": submission.day,
-                    "user_id": str(user.id),
-                    "user_name": user.name,
-                    "user_email": user.email,
-                    "user_college": user.college,
-                    "group_leader_name": user.group_leader_name or "No Group Leader",
-                    "status_text": submission.status_text or "",
-                    "people_connected": submission.people_connected or 0,
-                    "points_earned": submission.points_earned or 0,
-                    "submission_date": submission.submission_date.isoformat() if submission.submission_date else None,
-                    "is_completed": submission.status == "completed",
-                    "submission_text": submission.status_text,
-                    "image_url": image_url,
-                    "created_at": submission.submission_date.isoformat() if submission.submission_date else None,
-                    "updated_at": submission.updated_at.isoformat() if submission.updated_at else None
-                }
-                all_submissions.append(submission_data)
+        for submission in submissions:
+            user = submission.user
+            task = submission.task
+
+            # Get the first image file URL (and its thumbnail) from submission files
+            image_url = None
+            thumbnail_url = None
+            if hasattr(submission, 'files') and submission.files:
+                # Get the first image file
+                for file in submission.files:
+                    if file.file_url:
+                        image_url = file.file_url
+                        thumbnail_url = file.thumbnail_url
+                        break
+
+            # Fallback to proof_image if no files found
+            if not image_url and submission.proof_image:
+                image_url = submission.proof_image
+
+            duplicates = duplicate_matches.get(submission.id, {})
+
+            submission_data = {
+                "id": str(submission.id),
+                "task_id": str(submission.task_id),
+                "task_title": task.title if task else f"Day {submission.day} Task",
+                "task_day": submission.day,
+                "user_id": str(user.id),
+                "user_name": user.name,
+                "user_email": user.email,
+                "user_college": user.college,
+                "group_leader_name": user.group_leader_name or "No Group Leader",
+                "status_text": submission.status_text or "",
+                "people_connected": submission.people_connected or 0,
+                "points_earned": submission.points_earned or 0,
+                "submission_date": submission.submission_date.isoformat() if submission.submission_date else None,
+                "is_completed": submission.status == "completed",
+                "submission_text": submission.status_text,
+                "image_url": image_url,
+                "thumbnail_url": thumbnail_url,
+                "possible_duplicate": bool(duplicates),
+                "duplicate_of": [
+                    {"submission_id": other_id, "distance": distance}
+                    for other_id, distance in sorted(duplicates.items(), key=lambda entry: entry[1])
+                ],
+                "created_at": submission.submission_date.isoformat() if submission.submission_date else None,
+                "updated_at": submission.updated_at.isoformat() if submission.updated_at else None
+            }
+            all_submissions.append(submission_data)
 
         return all_submissions
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching submissions report: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch submissions report")
@@ -1856,19 +2421,18 @@ async def get_ambassadors_report(
     db_service = DatabaseService(db)
 
     try:
-        # Get all ambassadors
-        all_users = await db_service.get_all_users()
-        ambassadors = [user for user in all_users if user.role == "ambassador"]
+        # Get all ambassadors with their submission totals
+        aggregates = await db_service.get_ambassador_aggregates()
 
         ambassador_reports = []
-        for user in ambassadors:
-            submissions = await db_service.get_user_submissions(user.id)
+        for stats in aggregates:
+            user = stats["user"]
 
             # Calculate metrics
-            total_points = sum(sub.points_earned or 0 for sub in submissions)
-            total_people_connected = sum(sub.people_connected or 0 for sub in submissions)
-            completed_tasks = len([sub for sub in submissions if sub.status == "completed"])
-            current_day = max([sub.day for sub in submissions], default=0)
+            total_points = stats["points_sum"]
+            total_people_connected = stats["people_connected_sum"]
+            completed_tasks = stats["completed_count"]
+            current_day = stats["max_day"]
 
             ambassador_data = {
                 "id": str(user.id),
@@ -1880,10 +2444,10 @@ async def get_ambassadors_report(
                 "rank_position": 0,  # Will be calculated after sorting
                 "current_day": current_day,
                 "total_referrals": total_people_connected,  # Using people_connected as referrals
-                "events_hosted": len([sub for sub in submissions if "event" in (sub.status_text or "").lower()]),
+                "events_hosted": stats["event_submissions"],
                 "students_reached": total_people_connected,
                 "revenue_generated": total_points * 10,  # Estimated revenue
-                "social_media_posts": len([sub for sub in submissions if "social" in (sub.status_text or "").lower()]),
+                "social_media_posts": stats["social_submissions"],
                 "engagement_rate": min(95, (completed_tasks / max(current_day, 1)) * 100),  # Completion rate as engagement
                 "followers_growth": total_people_connected,
                 "campaign_days": current_day,
@@ -1904,39 +2468,192 @@ async def get_ambassadors_report(
         print(f"❌ Error fetching ambassadors report: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch ambassadors report")
 
+def export_response(records, columns: List[str], export_format: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        encode_export(records, columns, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+@api_router.get("/admin/reports/submissions/export")
+async def export_submissions_report(
+    current_user: User = Depends(get_current_user),
+    format: str = "csv",
+    group_leader: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    task_id: str = None,
+    status: str = None
+):
+    # Verify admin access
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+
+    if task_id and task_id != "all":
+        try:
+            UUID(task_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid task ID format")
+
+    filters = {
+        "group_leader": group_leader,
+        "start_date": start_date,
+        "end_date": end_date,
+        "task_id": task_id,
+        "status": status,
+    }
+
+    async def records():
+        # Request-scoped sessions are closed before the body is sent, so the stream owns its session
+        async with AsyncSessionLocal() as session:
+            async for row in DatabaseService(session).stream_submission_report_rows(**filters):
+                yield submission_export_record(row)
+
+    return export_response(records(), SUBMISSION_EXPORT_COLUMNS, format, "submissions_report")
+
+@api_router.get("/admin/reports/ambassadors/export")
+async def export_ambassadors_report(
+    current_user: User = Depends(get_current_user),
+    format: str = "csv"
+):
+    # Verify admin access
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+
+    async def records():
+        async with AsyncSessionLocal() as session:
+            async for row in DatabaseService(session).stream_ambassador_report_rows():
+                yield ambassador_export_record(row)
+
+    return export_response(records(), AMBASSADOR_EXPORT_COLUMNS, format, "ambassadors_report")
+
+def submission_file_entry_name(row) -> str:
+    """Archive path of a submission file: <group leader>/<ambassador>/<day and task>/<file name>"""
+    file_name = PurePosixPath(urlparse(row.file_url).path).name
+    if row.content_hash and file_name.startswith(row.content_hash):
+        # Blob names are bare hashes; shorten them and restore an extension
+        file_name = row.content_hash[:16] + (mimetypes.guess_extension(row.file_type or "") or "")
+    return "/".join((
+        safe_name(row.group_leader_name, "No Group Leader"),
+        safe_name(f"{row.user_name} ({row.user_email})", "unknown"),
+        safe_name(f"day{row.day:02d} {row.task_title or ''}" if row.day is not None else row.task_title, "untitled"),
+        safe_name(file_name, str(row.id)),
+    ))
+
+@api_router.get("/admin/reports/submissions/files.zip")
+async def download_submission_files(
+    current_user: User = Depends(get_current_user),
+    group_leader: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    task_id: str = None,
+    status: str = None
+):
+    """Stream every file of the filtered submissions as one ZIP archive, built as it is sent"""
+    # Verify admin access
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if task_id and task_id != "all":
+        try:
+            UUID(task_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid task ID format")
+
+    filters = {
+        "group_leader": group_leader,
+        "start_date": start_date,
+        "end_date": end_date,
+        "task_id": task_id,
+        "status": status,
+    }
+
+    async def archive():
+        writer = ZipStreamWriter()
+        failed = []
+        # Request-scoped sessions are closed before the body is sent, so the stream owns its session
+        async with AsyncSessionLocal() as session:
+            async for row in DatabaseService(session).stream_submission_file_rows(**filters):
+                name = submission_file_entry_name(row)
+                try:
+                    async for data in writer.add(name, storage_for_url(row.file_url).read(row.file_url, row.content_hash), row.uploaded_at):
+                        yield data
+                except TruncatedEntryError as e:
+                    print(f"⚠️ Submission archive entry for {row.file_url} was cut short: {e.cause}")
+                    failed.append(f"{e.name}\t{row.file_url}\ttruncated: {e.cause}")
+                except Exception as e:
+                    # The archive is already being sent, so a file that cannot be read is listed rather than fatal
+                    print(f"⚠️ Could not add {row.file_url} to submission archive: {e}")
+                    failed.append(f"{name}\t{row.file_url}\t{e}")
+        if failed:
+            yield writer.add_bytes("MISSING_FILES.txt", ("\n".join(failed) + "\n").encode())
+        yield writer.finish()
+
+    return StreamingResponse(
+        archive(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="submission_files.zip"'}
+    )
+
 @api_router.get("/admin/reports/metrics")
 async def get_report_metrics(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    group_leader: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    task_id: str = None,
+    status: str = None
 ):
     # Verify admin access
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
 
+    if task_id and task_id != "all":
+        try:
+            UUID(task_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid task ID format")
+
     db_service = DatabaseService(db)
 
     try:
-        # Get all users and submissions
-        all_users = await db_service.get_all_users()
-        ambassadors = [user for user in all_users if user.role == "ambassador"]
+        # Get all ambassadors with their submission totals
+        aggregates = await db_service.get_ambassador_aggregates()
         all_tasks = await db_service.get_all_tasks()
 
-        total_submissions = 0
-        total_points = 0
-        total_people_connected = 0
-
-        for user in ambassadors:
-            submissions = await db_service.get_user_submissions(user.id)
-            total_submissions += len(submissions)
-            total_points += sum(sub.points_earned or 0 for sub in submissions)
-            total_people_connected += sum(sub.people_connected or 0 for sub in submissions)
+        filters = {
+            "group_leader": group_leader,
+            "start_date": start_date,
+            "end_date": end_date,
+            "task_id": task_id,
+            "status": status,
+        }
+        if any(value and value != "all" for value in filters.values()):
+            # Same filters as /admin/reports/submissions, so totals match the report's pages
+            totals = await db_service.get_submission_totals(**filters)
+        else:
+            totals = {
+                "submission_count": sum(stats["submission_count"] for stats in aggregates),
+                "points_sum": sum(stats["points_sum"] for stats in aggregates),
+                "people_connected_sum": sum(stats["people_connected_sum"] for stats in aggregates),
+            }
+        total_submissions = totals["submission_count"]
+        total_points = totals["points_sum"]
+        total_people_connected = totals["people_connected_sum"]
 
         # Calculate completion rate
-        total_possible_submissions = len(ambassadors) * len(all_tasks)
+        total_possible_submissions = len(aggregates) * len(all_tasks)
         completion_rate = (total_submissions / max(total_possible_submissions, 1)) * 100
 
         metrics = {
-            "totalAmbassadors": len(ambassadors),
+            "totalAmbassadors": len(aggregates),
             "totalTasks": len(all_tasks),
             "totalPoints": total_points,
             "totalPeopleConnected": total_people_connected,
@@ -2042,7 +2759,8 @@ async def create_task(
             "title": task_data["title"],
             "description": task_data["description"],
             "day": int(task_data["day"]),
-            "points": int(task_data["points"]),
+            "points_reward": int(task_data["points"]),
+            "task_type": task_data.get("task_type", "general"),
             "is_active": task_data.get("status", "active") == "active",
             "created_by": current_user.email
         }
@@ -2089,7 +2807,7 @@ async def update_task(
         if "day" in task_data:
             update_data["day"] = int(task_data["day"])
         if "points" in task_data:
-            update_data["points"] = int(task_data["points"])
+            update_data["points_reward"] = int(task_data["points"])
         if "status" in task_data:
             update_data["is_active"] = task_data["status"] == "active"
 
@@ -2182,7 +2900,7 @@ async def delete_task(
 @api_router.post("/change-password")
 async def change_password(
     data: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db)
 ):
     # Verify old password
@@ -2204,6 +2922,61 @@ async def change_password(
 #     await init_db()
 #     await initialize_tasks()
 
+async def blob_content_type(content_hash: str) -> str:
+    media_type = blob_content_type_cache.get(content_hash)
+    if media_type is None:
+        async with AsyncSessionLocal() as session:
+            media_type = await DatabaseService(session).get_file_type_by_hash(content_hash) or "application/octet-stream"
+        blob_content_type_cache.set(content_hash, media_type)
+    return media_type
+
+# Locally stored submission files (content-addressed blobs, derivatives and legacy flat uploads)
+@app.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"])
+async def serve_upload(file_path: str, request: Request):
+    path = await asyncio.to_thread(resolve_upload_path, file_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    stat = await asyncio.to_thread(path.stat)
+
+    # Blob names are their content hash (derivatives: <hash>.<kind>.webp), so they are their own ETag
+    content_hash, _, derivative = path.name.partition(".")
+    if blob_store.root.resolve() in path.parents and len(content_hash) == 64:
+        etag = f'"{path.name}"'
+        media_type = "image/webp" if derivative else await blob_content_type(content_hash)
+    else:
+        etag = await legacy_etag(path, stat)
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": UPLOAD_CACHE_CONTROL,
+        "Last-Modified": last_modified(stat),
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+        **content_headers(media_type),
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # A Range is only honoured if the client's copy (If-Range) is still current
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, stat.st_size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+
+    send_body = request.method != "HEAD"
+    if byte_range is None:
+        return ZeroCopyFileResponse(path, 0, stat.st_size, headers=headers, media_type=media_type, send_body=send_body)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return ZeroCopyFileResponse(
+        path, start, end - start + 1, status_code=206, headers=headers, media_type=media_type, send_body=send_body
+    )
+
 # Include the router in the main app (move this AFTER CORS middleware)
 app.include_router(api_router)
 
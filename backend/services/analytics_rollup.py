@@ -0,0 +1,36 @@
+import os
+from typing import List, Set
+
+# How often today's rows are refreshed for users who submitted
+ANALYTICS_ROLLUP_SECONDS = int(os.getenv("ANALYTICS_ROLLUP_SECONDS", "30"))
+# When the leader closes finished days (UTC cron); any days missed during downtime are closed too
+ANALYTICS_CLOSE_DAYS_CRON = os.getenv("ANALYTICS_CLOSE_DAYS_CRON", "5 * * * *")
+ANALYTICS_ROLLUP = "analytics"
+
+# Weights of the 0-100 engagement score: completion rate, plus a streak bonus capped at a week
+ENGAGEMENT_COMPLETION_WEIGHT = 0.7
+ENGAGEMENT_STREAK_WEIGHT = 30
+ENGAGEMENT_STREAK_CAP_DAYS = 7
+
+
+class AnalyticsRollupTracker:
+    """Users whose analytics row for today is out of date in this process"""
+
+    def __init__(self):
+        self._user_ids: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def mark(self, user_id) -> None:
+        self._user_ids.add(str(user_id))
+
+    def drain(self) -> List[str]:
+        user_ids, self._user_ids = self._user_ids, set()
+        return list(user_ids)
+
+    def requeue(self, user_ids: List[str]) -> None:
+        self._user_ids.update(user_ids)
+
+
+analytics_rollup_tracker = AnalyticsRollupTracker()
@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from typing import Tuple
+
+# Content-addressed store for locally kept upload files
+UPLOAD_BLOB_DIR = Path(os.getenv("UPLOAD_BLOB_DIR", "uploads/blobs"))
+UPLOAD_BLOB_URL_PREFIX = "/uploads/blobs"
+# Unreferenced blobs are deleted once they have been untouched this long
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+BLOB_GC_SECONDS = int(os.getenv("BLOB_GC_SECONDS", "3600"))
+BLOB_GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH_SIZE", "1000"))
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> Tuple[str, int]:
+    """SHA-256 hex digest and size of a file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class LocalBlobStore:
+    """Files stored once per SHA-256 under two levels of 256-way shard directories.
+
+    `uploads/blobs/ab/cd/abcd...` keeps each directory small even with millions
+    of blobs. Which blobs are still in use is tracked in the upload_blobs table.
+    """
+
+    def __init__(self, root: Path = UPLOAD_BLOB_DIR, url_prefix: str = UPLOAD_BLOB_URL_PREFIX):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def relative_path(self, content_hash: str) -> str:
+        return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+    def path_for(self, content_hash: str) -> Path:
+        return self.root / self.relative_path(content_hash)
+
+    def url_for(self, content_hash: str) -> str:
+        return f"{self.url_prefix}/{self.relative_path(content_hash)}"
+
+    def _put(self, source: Path, content_hash: str) -> bool:
+        destination = self.path_for(content_hash)
+        if destination.exists():
+            source.unlink(missing_ok=True)
+            return False
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        # Same filesystem as the staging directory, so this is an atomic rename
+        os.replace(source, destination)
+        return True
+
+    async def put(self, source: Path, content_hash: str) -> bool:
+        """Move a fully written file into the store; returns False if the content was already stored.
+
+        The caller must have touched the blob's upload_blobs row first so GC
+        cannot delete an existing copy while it is being reused.
+        """
+        return await asyncio.to_thread(self._put, source, content_hash)
+
+    def derivative_path(self, content_hash: str, kind: str) -> Path:
+        return self.root / f"{self.relative_path(content_hash)}.{kind}.webp"
+
+    def derivative_url(self, content_hash: str, kind: str) -> str:
+        return f"{self.url_prefix}/{self.relative_path(content_hash)}.{kind}.webp"
+
+    async def put_derivative(self, source: Path, content_hash: str, kind: str) -> str:
+        """Move a rendered derivative next to its blob; returns its URL"""
+        destination = self.derivative_path(content_hash, kind)
+        await asyncio.to_thread(destination.parent.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(os.replace, source, destination)
+        return self.derivative_url(content_hash, kind)
+
+    def _remove(self, content_hash: str) -> None:
+        path = self.path_for(content_hash)
+        path.unlink(missing_ok=True)
+        # Derivatives are named <hash>.<kind>.webp and go with the blob
+        for derivative in path.parent.glob(f"{content_hash}.*"):
+            derivative.unlink(missing_ok=True)
+
+    async def remove(self, content_hash: str) -> None:
+        await asyncio.to_thread(self._remove, content_hash)
+
+
+blob_store = LocalBlobStore()
@@ -1,10 +1,63 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, desc
-from sqlalchemy.orm import selectinload
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-from models import User, Task, Submission, Analytics, SubmissionFile
+from sqlalchemy import select, update, delete, and_, or_, desc, func, literal_column, tuple_, literal, values, column, String, Text, BigInteger, true
+from sqlalchemy.orm import selectinload, aliased
+from typing import List, Optional, Dict, Any, AsyncIterator, Set, Tuple, Callable, Awaitable
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models import User, Task, Submission, Analytics, SubmissionFile, CacheVersion, TokenRevocation, PointsLedger, LeaderboardRollup, RollupWatermark, BackgroundJob, UploadBlob, UploadSession
+from services.leaderboard_index import leaderboard_index
+from services.perceptual_hash import duplicate_image_index
+from services.user_cache import AUTH_USER_CACHE, auth_user_cache
+from services.token_revocations import token_revocations
+from services.leaderboard_windows import ROLLUP_PERIODS
+from services.analytics_rollup import (
+    ANALYTICS_ROLLUP, ENGAGEMENT_COMPLETION_WEIGHT, ENGAGEMENT_STREAK_WEIGHT, ENGAGEMENT_STREAK_CAP_DAYS,
+    analytics_rollup_tracker
+)
+from services.task_catalog import TaskCatalog, task_catalog_cache, TASK_CATALOG_CACHE
 import uuid
+import base64
+from collections import Counter
+
+def parse_iso_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO-8601 query parameter into a naive UTC datetime; invalid values are ignored"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def encode_submission_cursor(submission: Submission) -> str:
+    """Opaque keyset cursor pointing just past the given submission"""
+    raw = f"{submission.submission_date.isoformat()}|{submission.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_submission_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_part, id_part = raw.split("|", 1)
+        return datetime.fromisoformat(date_part), uuid.UUID(id_part)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+# Rows fetched per round trip when streaming report exports
+STREAM_BATCH_SIZE = 500
+
+# Advisory lock key and cache_versions marker for the leaderboard rollups backfill
+LEADERBOARD_ROLLUPS = "leaderboard_rollups"
+UPLOAD_BLOBS = "upload_blobs"
+# Advisory lock key letting one worker at a time compact the points ledger
+POINTS_COMPACTION = "points_compaction"
+
+# Columns the in-memory leaderboard index needs from a users write
+LEADERBOARD_COLUMNS = (
+    User.id, User.name, User.college, User.group_leader_name,
+    User.role, User.is_active, User.total_points, User.total_referrals,
+)
 
 class DatabaseService:
     def __init__(self, session: AsyncSession):
@@ -16,6 +69,7 @@ class DatabaseService:
         self.session.add(user)
         await self.session.commit()
         await self.session.refresh(user)
+        leaderboard_index.apply_user(user)
         return user.id
     
     async def get_user_by_email(self, email: str) -> Optional[User]:
@@ -29,7 +83,81 @@ class DatabaseService:
             select(User).where(User.id == user_id)
         )
         return result.scalar_one_or_none()
+
+    async def get_user_for_auth(self, user_id: str) -> Optional[User]:
+        """Get a user through the auth cache.
+
+        Cache hits return a transient (session-less) User built from the cached
+        columns; use get_user_by_id when the row will be modified through the ORM.
+        """
+        key = str(user_id)
+        fields = auth_user_cache.get(key)
+        if fields is not None:
+            return User(**fields)
+
+        token = auth_user_cache.begin_load()
+        user = await self.get_user_by_id(user_id)
+        if user is not None:
+            auth_user_cache.set(
+                key,
+                {column.key: getattr(user, column.key) for column in User.__table__.columns},
+                token
+            )
+        return user
+
+    def _user_written(self, user_id, row=None) -> None:
+        """Refresh process-local user state after a committed users write"""
+        auth_user_cache.invalidate(str(user_id))
+        if row is not None:
+            leaderboard_index.apply_user(row)
     
+    @staticmethod
+    def _pending_ledger(name: str = "pending_ledger"):
+        """Per-user sums of ledger rows not yet compacted into users"""
+        return (
+            select(
+                PointsLedger.user_id,
+                func.sum(PointsLedger.points_delta).label("points"),
+                func.sum(PointsLedger.referrals_delta).label("referrals")
+            )
+            .where(PointsLedger.compacted_at.is_(None))
+            .group_by(PointsLedger.user_id)
+            .subquery(name)
+        )
+
+    @classmethod
+    def _standings(cls, name: str = "standings"):
+        """Active ambassadors with totals including pending ledger rows, as the leaderboard index counts them"""
+        pending = cls._pending_ledger(f"{name}_pending")
+        return (
+            select(
+                User.id,
+                (User.total_points + func.coalesce(pending.c.points, 0)).label("total_points"),
+                (User.total_referrals + func.coalesce(pending.c.referrals, 0)).label("total_referrals")
+            )
+            .outerjoin(pending, pending.c.user_id == User.id)
+            .where(and_(User.role == "ambassador", User.is_active == True))
+            .subquery(name)
+        )
+
+    async def get_user_totals(self, user_id) -> Tuple[int, int]:
+        """(total_points, total_referrals) of a user, including ledger rows not yet compacted"""
+        pending = (
+            PointsLedger.user_id == User.id,
+            PointsLedger.compacted_at.is_(None)
+        )
+        result = await self.session.execute(
+            select(
+                User.total_points + select(func.coalesce(func.sum(PointsLedger.points_delta), 0))
+                    .where(*pending).scalar_subquery(),
+                User.total_referrals + select(func.coalesce(func.sum(PointsLedger.referrals_delta), 0))
+                    .where(*pending).scalar_subquery()
+            )
+            .where(User.id == user_id)
+        )
+        row = result.first()
+        return (row[0] or 0, row[1] or 0) if row is not None else (0, 0)
+
     async def update_user(self, user_id: str, update_data: dict) -> bool:
         result = await self.session.execute(
             update(User)
@@ -37,20 +165,52 @@ class DatabaseService:
             .values(**update_data, updated_at=datetime.utcnow())
         )
         await self.session.commit()
+        self._user_written(user_id)
         return result.rowcount > 0
     
-    # Task operations
-    async def get_tasks_by_day(self, day: int) -> List[Task]:
+    # Cache version operations
+    async def get_cache_version(self, name: str) -> int:
         result = await self.session.execute(
-            select(Task).where(and_(Task.day == day, Task.is_active == True))
+            select(CacheVersion.version).where(CacheVersion.name == name)
         )
-        return result.scalars().all()
+        return result.scalar_one_or_none() or 0
+
+    async def bump_cache_version(self, name: str) -> None:
+        """Increment a cache's version in the current transaction (caller commits)"""
+        await self.session.execute(
+            pg_insert(CacheVersion)
+            .values(name=name, version=1, updated_at=datetime.utcnow())
+            .on_conflict_do_update(
+                index_elements=[CacheVersion.name],
+                set_={"version": CacheVersion.version + 1, "updated_at": datetime.utcnow()}
+            )
+        )
+
+    # Task operations
+    async def get_task_catalog(self) -> TaskCatalog:
+        """Process-local snapshot of all tasks, reloaded only when the catalog version changes"""
+        if task_catalog_cache.is_fresh():
+            return task_catalog_cache.snapshot
+
+        generation = task_catalog_cache.begin_load()
+        version = await self.get_cache_version(TASK_CATALOG_CACHE)
+        catalog = task_catalog_cache.snapshot
+        if catalog is not None and catalog.version == version:
+            task_catalog_cache.mark_checked()
+            return catalog
+
+        result = await self.session.execute(select(Task).order_by(Task.day))
+        catalog = TaskCatalog.build(result.scalars().all(), version)
+        task_catalog_cache.store(catalog, generation)
+        return catalog
+
+    async def get_tasks_by_day(self, day: int) -> List[Task]:
+        catalog = await self.get_task_catalog()
+        return list(catalog.active_by_day.get(day, ()))
     
     async def get_all_active_tasks(self) -> List[Task]:
-        result = await self.session.execute(
-            select(Task).where(Task.is_active == True).order_by(Task.day)
-        )
-        return result.scalars().all()
+        catalog = await self.get_task_catalog()
+        return list(catalog.active_tasks)
     
     async def create_task(self, task_data: dict) -> Task:
         task = Task(**task_data)
@@ -116,6 +276,448 @@ class DatabaseService:
         await self.session.commit()
         return result.rowcount > 0
     
+    async def upsert_submission(
+        self,
+        submission_data: dict,
+        follow_up_job: Optional[Tuple[str, Dict[str, Any]]] = None
+    ) -> Optional[uuid.UUID]:
+        """Insert or replace the user's submission for a task and append the points and
+        referrals difference to the points ledger in the same transaction. Returns the submission id.
+
+        follow_up_job (kind, payload) is enqueued in that transaction too, with the
+        submission id added to its payload.
+        """
+        user_id = submission_data["user_id"]
+        task_id = submission_data["task_id"]
+
+        # Serialize submissions for the same (user, task) so the previous values read below
+        # cannot be stale (concurrent double-submits would otherwise both count as first submissions)
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(
+                func.hashtext(str(user_id)),
+                func.hashtext(str(uuid.UUID(str(task_id))))
+            ))
+        )
+
+        previous = (
+            select(Submission.points_earned, Submission.people_connected)
+            .where(and_(Submission.user_id == user_id, Submission.task_id == task_id))
+            .cte("previous")
+        )
+        previous_points = func.coalesce(select(previous.c.points_earned).scalar_subquery(), 0)
+        previous_referrals = func.coalesce(select(previous.c.people_connected).scalar_subquery(), 0)
+
+        insert_stmt = pg_insert(Submission).values(id=uuid.uuid4(), **submission_data)
+        upserted = (
+            insert_stmt.on_conflict_do_update(
+                index_elements=[Submission.user_id, Submission.task_id],
+                set_={
+                    **{key: insert_stmt.excluded[key] for key in submission_data if key not in ("user_id", "task_id")},
+                    "updated_at": datetime.utcnow(),
+                }
+            )
+            .returning(Submission.id)
+            .cte("upserted")
+        )
+        recorded = (
+            pg_insert(PointsLedger)
+            .from_select(
+                ["user_id", "points_delta", "referrals_delta", "submission_id", "created_at"],
+                select(
+                    literal(user_id, PointsLedger.user_id.type),
+                    submission_data["points_earned"] - previous_points,
+                    submission_data["people_connected"] - previous_referrals,
+                    upserted.c.id,
+                    literal(datetime.utcnow(), PointsLedger.created_at.type)
+                )
+            )
+            .returning(PointsLedger.submission_id, PointsLedger.points_delta, PointsLedger.referrals_delta)
+            .cte("recorded")
+        )
+
+        result = await self.session.execute(select(recorded))
+        row = result.first()
+        if row is not None and follow_up_job is not None:
+            kind, payload = follow_up_job
+            await self.enqueue_job(kind, {**payload, "submission_id": str(row.submission_id)}, commit=False)
+        await self.session.commit()
+        if row is None:
+            return None
+        self._user_written(user_id)
+        leaderboard_index.apply_delta(user_id, row.points_delta, row.referrals_delta)
+        analytics_rollup_tracker.mark(user_id)
+        return row.submission_id
+
+    async def compact_points_ledger(self, batch_size: int) -> int:
+        """Fold up to batch_size pending ledger rows into users.total_points/total_referrals.
+
+        Marking the rows compacted, adding them to the users and to leaderboard_rollups happens
+        in one statement; rows locked by a concurrent compaction are skipped. Every worker
+        runs this, so a worker that finds another one compacting folds nothing. The locks are
+        transaction-scoped and work through a transaction pooler. Returns the number of rows folded.
+        """
+        acquired = await self.session.execute(select(func.pg_try_advisory_xact_lock(func.hashtext(POINTS_COMPACTION))))
+        if not acquired.scalar():
+            await self.session.rollback()
+            return 0
+        # Shared with other compactions, exclusive with the rollup backfill
+        await self.session.execute(select(func.pg_advisory_xact_lock_shared(func.hashtext(LEADERBOARD_ROLLUPS))))
+
+        pending = (
+            select(PointsLedger.id)
+            .where(PointsLedger.compacted_at.is_(None))
+            .order_by(PointsLedger.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        batch = (
+            update(PointsLedger)
+            .where(PointsLedger.id.in_(pending.scalar_subquery()))
+            .values(compacted_at=datetime.utcnow())
+            .returning(
+                PointsLedger.user_id, PointsLedger.created_at,
+                PointsLedger.points_delta, PointsLedger.referrals_delta
+            )
+            .cte("batch")
+        )
+        rolled = self._add_to_rollups(
+            batch.c.user_id, batch.c.created_at, batch.c.points_delta, batch.c.referrals_delta
+        ).cte("rolled")
+        totals = (
+            select(
+                batch.c.user_id,
+                func.sum(batch.c.points_delta).label("points"),
+                func.sum(batch.c.referrals_delta).label("referrals")
+            )
+            .group_by(batch.c.user_id)
+            .cte("totals")
+        )
+        folded = (
+            update(User)
+            .where(User.id == totals.c.user_id)
+            .values(
+                total_points=User.total_points + totals.c.points,
+                total_referrals=User.total_referrals + totals.c.referrals
+            )
+            .returning(User.id)
+            .cte("folded")
+        )
+
+        result = await self.session.execute(
+            select(
+                folded.c.id,
+                select(func.count()).select_from(batch).scalar_subquery().label("ledger_rows"),
+                select(func.count()).select_from(rolled).scalar_subquery().label("rollup_rows")
+            )
+        )
+        rows = result.all()
+        if rows:
+            # Other workers clear their auth caches when they see the new version
+            await self.bump_cache_version(AUTH_USER_CACHE)
+        await self.session.commit()
+        # The leaderboard index already counts ledger rows, so only the auth cache is stale
+        for row in rows:
+            auth_user_cache.invalidate(str(row.id))
+        return rows[0].ledger_rows if rows else 0
+
+    @staticmethod
+    def _add_to_rollups(user_id, created_at, points, referrals):
+        """INSERT ... SELECT adding the given awards to every rollup period they fall in"""
+        periods = values(column("period_type", String), name="periods").data([(p,) for p in ROLLUP_PERIODS])
+        period_start = func.date_trunc(periods.c.period_type, created_at)
+        awards = (
+            select(
+                periods.c.period_type,
+                period_start,
+                user_id,
+                func.sum(points),
+                func.sum(referrals),
+                literal(datetime.utcnow(), LeaderboardRollup.updated_at.type)
+            )
+            .select_from(periods)
+            .where(created_at.isnot(None))
+            .group_by(periods.c.period_type, period_start, user_id)
+        )
+        insert_stmt = pg_insert(LeaderboardRollup).from_select(
+            ["period_type", "period_start", "user_id", "points", "referrals", "updated_at"], awards
+        )
+        return insert_stmt.on_conflict_do_update(
+            index_elements=[LeaderboardRollup.period_type, LeaderboardRollup.period_start, LeaderboardRollup.user_id],
+            set_={
+                "points": LeaderboardRollup.points + insert_stmt.excluded.points,
+                "referrals": LeaderboardRollup.referrals + insert_stmt.excluded.referrals,
+                "updated_at": insert_stmt.excluded.updated_at,
+            }
+        ).returning(LeaderboardRollup.user_id)
+
+    async def backfill_leaderboard_rollups(self) -> bool:
+        """Build leaderboard_rollups from history once per database. Returns False if already built.
+
+        History is compacted ledger rows plus submissions that predate the ledger
+        (no ledger row references them). Pending ledger rows are added by compaction.
+        """
+        await self.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(LEADERBOARD_ROLLUPS))))
+        if await self.get_cache_version(LEADERBOARD_ROLLUPS) > 0:
+            await self.session.rollback()
+            return False
+
+        legacy = (
+            select(
+                Submission.user_id.label("user_id"),
+                Submission.submission_date.label("created_at"),
+                Submission.points_earned.label("points"),
+                Submission.people_connected.label("referrals")
+            )
+            .where(~select(PointsLedger.id).where(PointsLedger.submission_id == Submission.id).exists())
+        )
+        compacted = (
+            select(
+                PointsLedger.user_id, PointsLedger.created_at,
+                PointsLedger.points_delta, PointsLedger.referrals_delta
+            )
+            .where(PointsLedger.compacted_at.isnot(None))
+        )
+        history = legacy.union_all(compacted).subquery("history")
+
+        await self.session.execute(delete(LeaderboardRollup))
+        await self.session.execute(
+            self._add_to_rollups(history.c.user_id, history.c.created_at, history.c.points, history.c.referrals)
+        )
+        await self.bump_cache_version(LEADERBOARD_ROLLUPS)
+        await self.session.commit()
+        return True
+
+    async def get_scoped_leaderboard(
+        self,
+        limit: int,
+        college: Optional[str] = None,
+        group_leader: Optional[str] = None,
+        period_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[Any]:
+        """Leaderboard rows (id, name, college, group_leader_name, total_points, total_referrals)
+        for active ambassadors, optionally within a college/group leader and a rollup window.
+
+        Without a period, lifetime totals are ranked; otherwise the window's rollups.
+        """
+        conditions = [User.role == "ambassador", User.is_active == True]
+        if college:
+            conditions.append(User.college == college)
+        if group_leader:
+            conditions.append(User.group_leader_name == group_leader)
+
+        if period_type is None:
+            pending = self._pending_ledger()
+            points = User.total_points + func.coalesce(pending.c.points, 0)
+            referrals = User.total_referrals + func.coalesce(pending.c.referrals, 0)
+            stmt = select(User.id).outerjoin(pending, pending.c.user_id == User.id).where(and_(*conditions))
+        else:
+            window = (
+                select(
+                    LeaderboardRollup.user_id,
+                    func.sum(LeaderboardRollup.points).label("points"),
+                    func.sum(LeaderboardRollup.referrals).label("referrals")
+                )
+                .where(and_(
+                    LeaderboardRollup.period_type == period_type,
+                    LeaderboardRollup.period_start >= start,
+                    LeaderboardRollup.period_start < end
+                ))
+                .group_by(LeaderboardRollup.user_id)
+                .subquery("window_totals")
+            )
+            points, referrals = window.c.points, window.c.referrals
+            stmt = select(User.id).join(window, window.c.user_id == User.id).where(and_(*conditions))
+
+        result = await self.session.execute(
+            stmt.with_only_columns(
+                User.id, User.name, User.college, User.group_leader_name,
+                points.label("total_points"), referrals.label("total_referrals")
+            )
+            .order_by(desc(points), desc(referrals), User.id)
+            .limit(limit)
+        )
+        return result.all()
+
+    # Job queue operations
+    async def enqueue_job(self, kind: str, payload: Dict[str, Any], max_attempts: int = 5,
+                          run_after: Optional[datetime] = None, commit: bool = True) -> int:
+        """Add a job to the durable work queue; commit=False leaves it in the caller's transaction"""
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            pg_insert(BackgroundJob)
+            .values(kind=kind, payload=payload, max_attempts=max_attempts,
+                    run_after=run_after or now, created_at=now, updated_at=now)
+            .returning(BackgroundJob.id)
+        )
+        job_id = result.scalar_one()
+        if commit:
+            await self.session.commit()
+        return job_id
+
+    async def claim_jobs(self, worker_id: str, kinds: List[str], limit: int, lease_seconds: int) -> List[BackgroundJob]:
+        """Claim due jobs for this worker. Jobs held by another worker are skipped; running
+        jobs whose lease expired (their worker died) are claimed again."""
+        now = datetime.utcnow()
+        due = (
+            select(BackgroundJob.id)
+            .where(and_(
+                BackgroundJob.kind.in_(kinds),
+                or_(
+                    and_(BackgroundJob.status == "pending", BackgroundJob.run_after <= now),
+                    and_(BackgroundJob.status == "running",
+                         BackgroundJob.locked_at < now - timedelta(seconds=lease_seconds))
+                )
+            ))
+            .order_by(BackgroundJob.run_after, BackgroundJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id.in_(due.scalar_subquery()))
+            .values(status="running", attempts=BackgroundJob.attempts + 1,
+                    locked_at=now, locked_by=worker_id, updated_at=now)
+            .returning(BackgroundJob)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = result.scalars().all()
+        await self.session.commit()
+        return jobs
+
+    @staticmethod
+    def _held_by(job_id: int, worker_id: str):
+        # A worker whose lease expired must not touch the job once another worker has claimed it
+        return and_(BackgroundJob.id == job_id, BackgroundJob.locked_by == worker_id)
+
+    async def extend_job_lease(self, job_id: int, worker_id: str) -> bool:
+        """Renew a running job's lease; False if the worker no longer holds it"""
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            update(BackgroundJob)
+            .where(self._held_by(job_id, worker_id))
+            .values(locked_at=now, updated_at=now)
+        )
+        await self.session.commit()
+        return result.rowcount > 0
+
+    async def complete_job(self, job_id: int, worker_id: str) -> bool:
+        """Delete a finished job; False if the worker no longer holds it"""
+        result = await self.session.execute(delete(BackgroundJob).where(self._held_by(job_id, worker_id)))
+        await self.session.commit()
+        return result.rowcount > 0
+
+    async def fail_job(self, job_id: int, worker_id: str, error: str, retry_at: Optional[datetime]) -> bool:
+        """Schedule a retry at retry_at, or dead-letter the job when retry_at is None.
+        False if the worker no longer holds the job."""
+        result = await self.session.execute(
+            update(BackgroundJob)
+            .where(self._held_by(job_id, worker_id))
+            .values(
+                status="pending" if retry_at else "dead",
+                run_after=retry_at or BackgroundJob.run_after,
+                locked_at=None,
+                locked_by=None,
+                last_error=error[:2000],
+                updated_at=datetime.utcnow()
+            )
+        )
+        await self.session.commit()
+        return result.rowcount > 0
+
+    async def get_job_queue_summary(self) -> Dict[str, Any]:
+        """Job counts per status and kind, plus the dead-lettered jobs"""
+        counts = await self.session.execute(
+            select(BackgroundJob.kind, BackgroundJob.status, func.count().label("jobs"))
+            .group_by(BackgroundJob.kind, BackgroundJob.status)
+        )
+        dead = await self.session.execute(
+            select(BackgroundJob)
+            .where(BackgroundJob.status == "dead")
+            .order_by(desc(BackgroundJob.updated_at))
+            .limit(100)
+        )
+        return {
+            "counts": [{"kind": row.kind, "status": row.status, "jobs": row.jobs} for row in counts],
+            "dead_letters": dead.scalars().all(),
+        }
+
+    async def retry_dead_job(self, job_id: int) -> bool:
+        """Put a dead-lettered job back in the queue with a fresh set of attempts"""
+        result = await self.session.execute(
+            update(BackgroundJob)
+            .where(and_(BackgroundJob.id == job_id, BackgroundJob.status == "dead"))
+            .values(status="pending", attempts=0, run_after=datetime.utcnow(), updated_at=datetime.utcnow())
+        )
+        await self.session.commit()
+        return result.rowcount > 0
+
+    # Resumable upload session operations
+    async def create_upload_session(self, session_data: dict) -> UploadSession:
+        upload_session = UploadSession(**session_data)
+        self.session.add(upload_session)
+        await self.session.commit()
+        await self.session.refresh(upload_session)
+        return upload_session
+
+    async def get_upload_session(self, session_id: str) -> Optional[UploadSession]:
+        result = await self.session.execute(select(UploadSession).where(UploadSession.id == session_id))
+        return result.scalar_one_or_none()
+
+    async def advance_upload_session(self, session_id: str, expected_offset: int, new_offset: int) -> bool:
+        """Move an open session's offset forward, only if no other request moved it first"""
+        result = await self.session.execute(
+            update(UploadSession)
+            .where(and_(
+                UploadSession.id == session_id,
+                UploadSession.status == "open",
+                UploadSession.received_bytes == expected_offset
+            ))
+            .values(received_bytes=new_offset, updated_at=datetime.utcnow())
+        )
+        await self.session.commit()
+        return result.rowcount > 0
+
+    async def finalize_upload_session(self, session_id: str, job_kind: str, job_payload: Dict[str, Any]) -> bool:
+        """Close a complete session and enqueue the job that attaches its file, in one transaction"""
+        result = await self.session.execute(
+            update(UploadSession)
+            .where(and_(
+                UploadSession.id == session_id,
+                UploadSession.status == "open",
+                UploadSession.received_bytes == UploadSession.total_bytes
+            ))
+            .values(status="finalized", updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            await self.session.rollback()
+            return False
+        await self.enqueue_job(job_kind, job_payload, commit=False)
+        await self.session.commit()
+        return True
+
+    async def delete_upload_session(self, session_id: str) -> bool:
+        result = await self.session.execute(delete(UploadSession).where(UploadSession.id == session_id))
+        await self.session.commit()
+        return result.rowcount > 0
+
+    async def delete_expired_upload_sessions(self, limit: int = 1000) -> List[uuid.UUID]:
+        """Delete sessions past their expiry (finalized ones included); returns their ids"""
+        expired = (
+            select(UploadSession.id)
+            .where(UploadSession.expires_at < datetime.utcnow())
+            .limit(limit)
+        )
+        result = await self.session.execute(
+            delete(UploadSession)
+            .where(UploadSession.id.in_(expired.scalar_subquery()))
+            .returning(UploadSession.id)
+        )
+        session_ids = result.scalars().all()
+        await self.session.commit()
+        return session_ids
+
     # Submission file operations
     async def create_submission_file(self, file_data: dict) -> str:
         """Create a new submission file record"""
@@ -125,24 +727,210 @@ class DatabaseService:
         await self.session.refresh(submission_file)
         return submission_file.id
     
-    async def create_submission_files(self, submission_id: str, file_urls: List[str], file_types: List[str] = None) -> List[str]:
-        """Create multiple submission file records for a submission"""
-        file_ids = []
+    async def create_submission_files(
+        self,
+        submission_id: str,
+        file_urls: List[str],
+        file_types: List[str] = None,
+        content_hashes: List[Optional[str]] = None,
+        sizes: List[Optional[int]] = None
+    ) -> List[str]:
+        """Create the file records for a submission in one multi-row INSERT.
+
+        Content hashes, when given, add a reference to each file's upload blob in the same transaction.
+        """
+        if not file_urls:
+            return []
         file_types = file_types or [None] * len(file_urls)
-        
-        for i, file_url in enumerate(file_urls):
-            file_data = {
-                "submission_id": submission_id,
-                "file_url": file_url,
-                "file_type": file_types[i] if i < len(file_types) else None
-            }
-            submission_file = SubmissionFile(**file_data)
-            self.session.add(submission_file)
-            file_ids.append(submission_file.id)
-        
+        content_hashes = content_hashes or [None] * len(file_urls)
+        sizes = sizes or [None] * len(file_urls)
+        now = datetime.utcnow()
+
+        result = await self.session.execute(
+            pg_insert(SubmissionFile)
+            .values([
+                {
+                    "id": uuid.uuid4(),
+                    "submission_id": submission_id,
+                    "file_url": file_url,
+                    "file_type": file_types[i] if i < len(file_types) else None,
+                    "content_hash": content_hashes[i],
+                    "size_bytes": sizes[i],
+                    "uploaded_at": now,
+                }
+                for i, file_url in enumerate(file_urls)
+            ])
+            .returning(SubmissionFile.id)
+        )
+        file_ids = result.scalars().all()
+
+        references: Dict[str, List[int]] = {}
+        for content_hash, size in zip(content_hashes, sizes):
+            if content_hash:
+                entry = references.setdefault(content_hash, [size or 0, 0])
+                entry[1] += 1
+        if references:
+            stmt = pg_insert(UploadBlob).values([
+                {"content_hash": content_hash, "size_bytes": size, "ref_count": count, "created_at": now, "touched_at": now}
+                for content_hash, (size, count) in sorted(references.items())
+            ])
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[UploadBlob.content_hash],
+                    set_={"ref_count": UploadBlob.ref_count + stmt.excluded.ref_count, "touched_at": now}
+                )
+            )
+
         await self.session.commit()
         return file_ids
-    
+
+    async def get_derivatives_by_hash(self, content_hashes: List[str]) -> Dict[str, Dict[str, str]]:
+        """Derivative URLs already rendered for any file with one of these content hashes"""
+        if not content_hashes:
+            return {}
+        result = await self.session.execute(
+            select(SubmissionFile.content_hash, SubmissionFile.thumbnail_url, SubmissionFile.webp_url)
+            .where(and_(
+                SubmissionFile.content_hash.in_(content_hashes),
+                SubmissionFile.thumbnail_url.isnot(None)
+            ))
+            .distinct(SubmissionFile.content_hash)
+        )
+        return {
+            row.content_hash: {"thumbnail": row.thumbnail_url, "webp": row.webp_url}
+            for row in result
+        }
+
+    async def set_file_derivatives(self, submission_id: str, derivatives: Dict[str, Dict[str, str]]) -> int:
+        """Record derivative URLs for a submission's files, keyed by file URL, in one UPDATE"""
+        if not derivatives:
+            return 0
+        rendered = values(
+            column("file_url", Text), column("thumbnail_url", Text), column("webp_url", Text),
+            name="rendered"
+        ).data([(file_url, urls.get("thumbnail"), urls.get("webp")) for file_url, urls in derivatives.items()])
+        result = await self.session.execute(
+            update(SubmissionFile)
+            .where(and_(
+                SubmissionFile.submission_id == submission_id,
+                SubmissionFile.file_url == rendered.c.file_url
+            ))
+            .values(thumbnail_url=rendered.c.thumbnail_url, webp_url=rendered.c.webp_url)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def set_file_perceptual_hashes(self, submission_id: str, hashes: Dict[str, int]) -> List[Any]:
+        """Record image pHashes for a submission's files, keyed by file URL.
+
+        Returns (id, submission_id, perceptual_hash, hashed_at) of the updated rows.
+        """
+        if not hashes:
+            return []
+        hashed = values(
+            column("file_url", Text), column("perceptual_hash", BigInteger), name="hashed"
+        ).data(list(hashes.items()))
+        result = await self.session.execute(
+            update(SubmissionFile)
+            .where(and_(
+                SubmissionFile.submission_id == submission_id,
+                SubmissionFile.file_url == hashed.c.file_url
+            ))
+            .values(perceptual_hash=hashed.c.perceptual_hash, hashed_at=datetime.utcnow())
+            .returning(SubmissionFile.id, SubmissionFile.submission_id, SubmissionFile.perceptual_hash, SubmissionFile.hashed_at)
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await self.session.commit()
+        return rows
+
+    async def stream_perceptual_hashes(self, since: Optional[datetime] = None) -> AsyncIterator[Any]:
+        """Stream (id, submission_id, perceptual_hash, hashed_at) of hashed files, optionally hashed after `since`"""
+        query = (
+            select(SubmissionFile.id, SubmissionFile.submission_id, SubmissionFile.perceptual_hash, SubmissionFile.hashed_at)
+            .where(SubmissionFile.perceptual_hash.isnot(None))
+        )
+        if since is not None:
+            query = query.where(SubmissionFile.hashed_at > since)
+        result = await self.session.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for row in result:
+            yield row
+
+    async def get_file_type_by_hash(self, content_hash: str) -> Optional[str]:
+        """Content type recorded for any file with this content hash"""
+        result = await self.session.execute(
+            select(SubmissionFile.file_type)
+            .where(and_(SubmissionFile.content_hash == content_hash, SubmissionFile.file_type.isnot(None)))
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def touch_upload_blobs(self, blobs: List[Tuple[str, int]]) -> None:
+        """Mark blobs as in use before an upload stores or reuses them, so GC skips them.
+
+        Holds the upload_blobs lock shared; GC takes it exclusively while it deletes.
+        """
+        if not blobs:
+            return
+        now = datetime.utcnow()
+        await self.session.execute(select(func.pg_advisory_xact_lock_shared(func.hashtext(UPLOAD_BLOBS))))
+        stmt = pg_insert(UploadBlob).values([
+            {"content_hash": content_hash, "size_bytes": size, "ref_count": 0, "created_at": now, "touched_at": now}
+            for content_hash, size in sorted(dict(blobs).items())
+        ])
+        await self.session.execute(
+            stmt.on_conflict_do_update(index_elements=[UploadBlob.content_hash], set_={"touched_at": now})
+        )
+        await self.session.commit()
+
+    async def _release_upload_blobs(self, content_hashes: List[Optional[str]]) -> None:
+        """Drop one blob reference per deleted file; call inside the deleting transaction"""
+        counts: Dict[int, List[str]] = {}
+        for content_hash, count in Counter(h for h in content_hashes if h).items():
+            counts.setdefault(count, []).append(content_hash)
+        now = datetime.utcnow()
+        for count, hashes in counts.items():
+            await self.session.execute(
+                update(UploadBlob)
+                .where(UploadBlob.content_hash.in_(hashes))
+                .values(ref_count=UploadBlob.ref_count - count, touched_at=now)
+            )
+
+    async def collect_orphan_blobs(
+        self,
+        remove: Callable[[str], Awaitable[None]],
+        grace_seconds: int,
+        batch_size: int
+    ) -> int:
+        """Delete up to batch_size blobs that no file has referenced for grace_seconds.
+
+        `remove` deletes the stored content; rows are only dropped if every removal succeeds.
+        """
+        await self.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(UPLOAD_BLOBS))))
+        orphans = (
+            select(UploadBlob.content_hash)
+            .where(and_(
+                UploadBlob.ref_count <= 0,
+                UploadBlob.touched_at < datetime.utcnow() - timedelta(seconds=grace_seconds)
+            ))
+            .limit(batch_size)
+        )
+        result = await self.session.execute(
+            delete(UploadBlob)
+            .where(UploadBlob.content_hash.in_(orphans.scalar_subquery()))
+            .returning(UploadBlob.content_hash)
+        )
+        content_hashes = result.scalars().all()
+        try:
+            for content_hash in content_hashes:
+                await remove(content_hash)
+        except Exception:
+            await self.session.rollback()
+            raise
+        await self.session.commit()
+        return len(content_hashes)
+
     async def get_submission_files(self, submission_id: str) -> List[SubmissionFile]:
         """Get all files for a specific submission"""
         result = await self.session.execute(
@@ -159,21 +947,34 @@ class DatabaseService:
         )
         return result.scalar_one_or_none()
     
-    async def delete_submission_file(self, file_id: str) -> bool:
-        """Delete a submission file by ID"""
+    async def get_existing_submission_file_ids(self, file_ids: List[str]) -> Set[str]:
+        """The subset of file_ids that still have a submission_files row"""
+        if not file_ids:
+            return set()
+        result = await self.session.execute(
+            select(SubmissionFile.id).where(SubmissionFile.id.in_(set(file_ids)))
+        )
+        return {str(file_id) for file_id in result.scalars().all()}
+
+    async def _delete_submission_files(self, condition) -> int:
         result = await self.session.execute(
-            delete(SubmissionFile).where(SubmissionFile.id == file_id)
+            delete(SubmissionFile).where(condition).returning(SubmissionFile.id, SubmissionFile.content_hash)
         )
+        rows = result.all()
+        await self._release_upload_blobs([row.content_hash for row in rows])
         await self.session.commit()
-        return result.rowcount > 0
+        # Other workers drop these when a match against them is next checked
+        for row in rows:
+            duplicate_image_index.remove(row.id)
+        return len(rows)
+
+    async def delete_submission_file(self, file_id: str) -> bool:
+        """Delete a submission file by ID"""
+        return await self._delete_submission_files(SubmissionFile.id == file_id) > 0
     
     async def delete_submission_files_by_submission(self, submission_id: str) -> int:
         """Delete all files for a specific submission"""
-        result = await self.session.execute(
-            delete(SubmissionFile).where(SubmissionFile.submission_id == submission_id)
-        )
-        await self.session.commit()
-        return result.rowcount
+        return await self._delete_submission_files(SubmissionFile.submission_id == submission_id)
     
     async def update_submission_file(self, file_id: str, update_data: dict) -> bool:
         """Update a submission file record"""
@@ -186,14 +987,86 @@ class DatabaseService:
         return result.rowcount > 0
     
     # Analytics operations
-    async def get_leaderboard(self, limit: int = 50) -> List[User]:
+    async def get_user_rank(self, user_id: str) -> int:
+        """Get a user's 1-based leaderboard position by counting the ambassadors ahead of them.
+
+        Users that are not on the leaderboard (admins, inactive accounts) are ranked
+        after every listed ambassador.
+        """
+        standings = self._standings()
+        target = self._standings("target")
+        target = select(target).where(target.c.id == user_id).subquery("target_row")
+        ahead = (
+            select(func.count())
+            .select_from(standings)
+            .where(or_(
+                standings.c.total_points > target.c.total_points,
+                and_(standings.c.total_points == target.c.total_points,
+                     standings.c.total_referrals > target.c.total_referrals),
+                and_(standings.c.total_points == target.c.total_points,
+                     standings.c.total_referrals == target.c.total_referrals,
+                     standings.c.id < target.c.id),
+            ))
+            .scalar_subquery()
+        )
+        result = await self.session.execute(select(ahead).select_from(target))
+        position = result.scalar_one_or_none()
+        if position is not None:
+            return position + 1
+
+        return await self.count_leaderboard_users() + 1
+
+    async def get_user_ranks(self, user_ids: List[str]) -> Dict[str, int]:
+        """Get leaderboard positions for several users in a single query, keyed by str(user_id)"""
+        if not user_ids:
+            return {}
+
+        standings = self._standings()
+        ranked = (
+            select(
+                standings.c.id,
+                func.row_number().over(
+                    order_by=(desc(standings.c.total_points), desc(standings.c.total_referrals), standings.c.id)
+                ).label("rank"),
+            )
+            .subquery()
+        )
         result = await self.session.execute(
-            select(User)
+            select(ranked.c.id, ranked.c.rank).where(ranked.c.id.in_(user_ids))
+        )
+        ranks = {str(row.id): row.rank for row in result}
+
+        missing = [str(user_id) for user_id in user_ids if str(user_id) not in ranks]
+        if missing:
+            unranked_position = await self.count_leaderboard_users() + 1
+            for user_id in missing:
+                ranks[user_id] = unranked_position
+        return ranks
+
+    async def get_leaderboard_snapshot(self) -> List[Any]:
+        """Lightweight rows for every active ambassador, used to seed and reconcile the leaderboard index.
+
+        Totals include ledger rows not yet compacted into users.
+        """
+        pending = self._pending_ledger()
+        result = await self.session.execute(
+            select(
+                *[column for column in LEADERBOARD_COLUMNS if column.key not in ("total_points", "total_referrals")],
+                (User.total_points + func.coalesce(pending.c.points, 0)).label("total_points"),
+                (User.total_referrals + func.coalesce(pending.c.referrals, 0)).label("total_referrals")
+            )
+            .outerjoin(pending, pending.c.user_id == User.id)
             .where(and_(User.role == "ambassador", User.is_active == True))
-            .order_by(desc(User.total_points), desc(User.total_referrals))
-            .limit(limit)
         )
-        return result.scalars().all()
+        return result.all()
+
+    async def count_leaderboard_users(self) -> int:
+        result = await self.session.execute(
+            select(func.count())
+            .select_from(User)
+            .where(and_(User.role == "ambassador", User.is_active == True))
+        )
+        return result.scalar_one()
 
     async def get_all_ambassadors(self) -> List[User]:
         result = await self.session.execute(
@@ -203,43 +1076,469 @@ class DatabaseService:
         )
         return result.scalars().all()
 
-    async def get_detailed_submissions(self, group_leader: str = None, start_date: str = None, end_date: str = None) -> List[Submission]:
-        query = select(Submission).options(
-            selectinload(Submission.user),
-            selectinload(Submission.task),
-            selectinload(Submission.files)
+    @staticmethod
+    def _ambassador_aggregate_columns() -> tuple:
+        return (
+            func.count(Submission.id).label("submission_count"),
+            func.count(Submission.id).filter(Submission.status == "completed").label("completed_count"),
+            func.coalesce(func.sum(Submission.points_earned), 0).label("points_sum"),
+            func.coalesce(func.sum(Submission.people_connected), 0).label("people_connected_sum"),
+            func.coalesce(func.max(Submission.day), 0).label("max_day"),
+            func.count(Submission.id).filter(Submission.status_text.ilike("%event%")).label("event_submissions"),
+            func.count(Submission.id).filter(Submission.status_text.ilike("%social%")).label("social_submissions"),
+        )
+
+    async def get_ambassador_aggregates(self) -> List[Dict[str, Any]]:
+        """Every ambassador with their submission totals, from one LEFT JOIN ... GROUP BY users.id"""
+        result = await self.session.execute(
+            select(User, *self._ambassador_aggregate_columns())
+            .outerjoin(Submission, Submission.user_id == User.id)
+            .where(User.role == "ambassador")
+            .group_by(User.id)
+            .order_by(desc(User.registration_date))
+        )
+        return [
+            {
+                "user": row.User,
+                "submission_count": row.submission_count,
+                "completed_count": row.completed_count,
+                "points_sum": row.points_sum,
+                "people_connected_sum": row.people_connected_sum,
+                "max_day": row.max_day,
+                "event_submissions": row.event_submissions,
+                "social_submissions": row.social_submissions,
+            }
+            for row in result
+        ]
+
+    async def get_admin_dashboard_totals(self, pending_statuses: List[str]) -> Any:
+        """Ambassador and submission counts for the admin dashboard, from one LEFT JOIN aggregate"""
+        now = datetime.utcnow()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        week_ago = now - timedelta(days=7)
+        result = await self.session.execute(
+            select(
+                func.count(func.distinct(User.id)).label("total_ambassadors"),
+                func.count(func.distinct(User.id)).filter(and_(
+                    User.is_active == True,
+                    or_(User.status.is_(None), User.status != "suspended")
+                )).label("active_ambassadors"),
+                func.count(Submission.id).label("total_submissions"),
+                func.count(Submission.id).filter(and_(
+                    Submission.submission_date >= today,
+                    Submission.submission_date < today + timedelta(days=1)
+                )).label("submissions_today"),
+                func.count(Submission.id).filter(Submission.submission_date >= week_ago).label("submissions_this_week"),
+                func.coalesce(func.sum(Submission.points_earned), 0).label("points_sum"),
+                func.count(Submission.id).filter(Submission.status_text.in_(pending_statuses)).label("pending_submissions"),
+            )
+            .select_from(User)
+            .outerjoin(Submission, Submission.user_id == User.id)
+            .where(User.role == "ambassador")
+        )
+        return result.one()
+
+    async def stream_ambassador_report_rows(self) -> AsyncIterator[Any]:
+        """Stream ambassador aggregates ranked by points through a server-side cursor"""
+        aggregates = self._ambassador_aggregate_columns()
+        points_sum = aggregates[2]
+        query = (
+            select(
+                User.id, User.name, User.email, User.college, User.group_leader_name,
+                User.status, User.registration_date, User.last_login,
+                *aggregates,
+                func.row_number().over(order_by=(desc(points_sum), User.id)).label("rank_position"),
+            )
+            .outerjoin(Submission, Submission.user_id == User.id)
+            .where(User.role == "ambassador")
+            .group_by(User.id)
+            .order_by(desc(points_sum), User.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
         )
+        result = await self.session.stream(query)
+        async for row in result:
+            yield row
 
-        conditions = []
+    @staticmethod
+    def _submission_filter_conditions(
+        group_leader: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        task_id: str = None,
+        status: str = None,
+    ) -> list:
+        conditions = [User.role == "ambassador", Submission.submission_date.isnot(None)]
 
         # Filter by group leader if specified
         if group_leader and group_leader != "all":
             conditions.append(User.group_leader_name == group_leader)
-            query = query.join(User, Submission.user_id == User.id)
 
         # Filter by date range if specified
-        if start_date:
-            try:
-                start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                conditions.append(Submission.submission_date >= start_dt)
-            except ValueError:
-                pass
+        start_dt = parse_iso_datetime(start_date)
+        if start_dt:
+            conditions.append(Submission.submission_date >= start_dt)
 
-        if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                conditions.append(Submission.submission_date <= end_dt)
-            except ValueError:
-                pass
+        end_dt = parse_iso_datetime(end_date)
+        if end_dt:
+            conditions.append(Submission.submission_date <= end_dt)
 
-        if conditions:
-            query = query.where(and_(*conditions))
+        if task_id and task_id != "all":
+            conditions.append(Submission.task_id == uuid.UUID(str(task_id)))
 
-        query = query.order_by(desc(Submission.submission_date))
+        if status and status != "all":
+            conditions.append(Submission.status == status)
+
+        return conditions
+
+    async def get_submission_totals(self, **filters) -> Dict[str, int]:
+        """Submission count, points and people connected over the report filters"""
+        result = await self.session.execute(
+            select(
+                func.count(Submission.id).label("submission_count"),
+                func.coalesce(func.sum(Submission.points_earned), 0).label("points_sum"),
+                func.coalesce(func.sum(Submission.people_connected), 0).label("people_connected_sum"),
+            )
+            .join(User, Submission.user_id == User.id)
+            .where(and_(*self._submission_filter_conditions(**filters)))
+        )
+        row = result.one()
+        return {
+            "submission_count": row.submission_count,
+            "points_sum": row.points_sum,
+            "people_connected_sum": row.people_connected_sum,
+        }
+
+    async def stream_submission_report_rows(self, **filters) -> AsyncIterator[Any]:
+        """Stream flat submission report rows (newest first) through a server-side cursor.
+
+        Accepts the same filters as get_detailed_submissions, minus paging.
+        """
+        first_file = (
+            select(SubmissionFile.file_url, SubmissionFile.thumbnail_url)
+            .where(SubmissionFile.submission_id == Submission.id)
+            .order_by(SubmissionFile.uploaded_at)
+            .limit(1)
+            .lateral("first_file")
+        )
+        query = (
+            select(
+                Submission.id, Submission.task_id, Submission.day, Submission.status,
+                Submission.status_text, Submission.people_connected, Submission.points_earned,
+                Submission.submission_date, Submission.updated_at,
+                Task.title.label("task_title"),
+                User.id.label("user_id"), User.name.label("user_name"), User.email.label("user_email"),
+                User.college.label("user_college"), User.group_leader_name,
+                func.coalesce(first_file.c.file_url, Submission.proof_image).label("image_url"),
+                first_file.c.thumbnail_url,
+            )
+            .join(User, Submission.user_id == User.id)
+            .outerjoin(Task, Submission.task_id == Task.id)
+            .outerjoin(first_file, true())
+            .where(and_(*self._submission_filter_conditions(**filters)))
+            .order_by(desc(Submission.submission_date), desc(Submission.id))
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        result = await self.session.stream(query)
+        async for row in result:
+            yield row
+
+    async def stream_submission_file_rows(self, **filters) -> AsyncIterator[Any]:
+        """Stream every file of the submissions matching the report filters, grouped by ambassador"""
+        query = (
+            select(
+                SubmissionFile.id, SubmissionFile.file_url, SubmissionFile.file_type,
+                SubmissionFile.content_hash, SubmissionFile.size_bytes, SubmissionFile.uploaded_at,
+                Submission.id.label("submission_id"), Submission.day, Submission.submission_date,
+                Task.title.label("task_title"),
+                User.name.label("user_name"), User.email.label("user_email"), User.group_leader_name,
+            )
+            .join(Submission, SubmissionFile.submission_id == Submission.id)
+            .join(User, Submission.user_id == User.id)
+            .outerjoin(Task, Submission.task_id == Task.id)
+            .where(and_(*self._submission_filter_conditions(**filters)))
+            .order_by(User.group_leader_name, User.email, Submission.day, SubmissionFile.uploaded_at, SubmissionFile.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        result = await self.session.stream(query)
+        async for row in result:
+            yield row
+
+    async def get_detailed_submissions(
+        self,
+        group_leader: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        task_id: str = None,
+        status: str = None,
+        cursor: str = None,
+        limit: int = None,
+    ) -> List[Submission]:
+        """Ambassador submissions, newest first, with user/task/files loaded.
+
+        Pages with a keyset on (submission_date, id): pass the cursor from
+        encode_submission_cursor(last row of the previous page) to continue.
+        Raises ValueError for a malformed cursor or task id.
+        """
+        query = (
+            select(Submission)
+            .join(User, Submission.user_id == User.id)
+            .options(
+                selectinload(Submission.user),
+                selectinload(Submission.task),
+                selectinload(Submission.files)
+            )
+        )
+
+        conditions = self._submission_filter_conditions(
+            group_leader=group_leader, start_date=start_date, end_date=end_date,
+            task_id=task_id, status=status
+        )
+
+        if cursor:
+            cursor_date, cursor_id = decode_submission_cursor(cursor)
+            conditions.append(
+                tuple_(Submission.submission_date, Submission.id) < tuple_(cursor_date, cursor_id)
+            )
+
+        query = query.where(and_(*conditions))
+        query = query.order_by(desc(Submission.submission_date), desc(Submission.id))
+
+        if limit:
+            query = query.limit(limit)
 
         result = await self.session.execute(query)
         return result.scalars().all()
-    
+
+    async def get_engagement_stats(self, days: int = 30) -> Dict[str, Any]:
+        """Daily submission/active-user counts and retention for ambassadors, read from analytics rollups.
+
+        Returns {"daily": {date: (submissions, active_users)}, "active_this_week",
+        "active_this_month", "total_ambassadors"}; days without submissions are absent.
+        """
+        now = datetime.utcnow()
+        window_start = (now - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        # Rollup rows are per day, so whole days are counted
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        week_start = today - timedelta(days=7)
+        month_start = today - timedelta(days=30)
+
+        daily_result = await self.session.execute(
+            select(
+                Analytics.date.label("day"),
+                func.coalesce(func.sum(Analytics.submissions_today), 0).label("submissions"),
+                func.count(Analytics.user_id).label("active_users"),
+            )
+            .join(User, Analytics.user_id == User.id)
+            .where(and_(User.role == "ambassador", Analytics.date >= window_start))
+            .group_by(Analytics.date)
+        )
+        daily = {
+            row.day.date(): (row.submissions, row.active_users)
+            for row in daily_result
+        }
+
+        retention_result = await self.session.execute(
+            select(
+                func.count(func.distinct(User.id)).label("total_ambassadors"),
+                func.count(func.distinct(Analytics.user_id))
+                    .filter(Analytics.date >= week_start).label("active_this_week"),
+                func.count(func.distinct(Analytics.user_id))
+                    .filter(Analytics.date >= month_start).label("active_this_month"),
+            )
+            .select_from(User)
+            .outerjoin(Analytics, and_(Analytics.user_id == User.id, Analytics.date >= month_start))
+            .where(User.role == "ambassador")
+        )
+        retention = retention_result.one()
+
+        return {
+            "daily": daily,
+            "active_this_week": retention.active_this_week,
+            "active_this_month": retention.active_this_month,
+            "total_ambassadors": retention.total_ambassadors,
+        }
+
+    async def get_ambassador_rollup_totals(self) -> List[Dict[str, Any]]:
+        """Every ambassador with the cumulative totals of their latest analytics rollup row"""
+        latest = (
+            select(Analytics)
+            .distinct(Analytics.user_id)
+            .order_by(Analytics.user_id, desc(Analytics.date))
+            .subquery("latest")
+        )
+        result = await self.session.execute(
+            select(
+                User,
+                func.coalesce(latest.c.total_points, 0).label("points_sum"),
+                func.coalesce(latest.c.total_tasks_completed, 0).label("completed_count"),
+                func.coalesce(latest.c.total_referrals, 0).label("referrals_sum"),
+                func.coalesce(latest.c.current_streak, 0).label("current_streak"),
+                func.coalesce(latest.c.completion_rate, 0).label("completion_rate"),
+                func.coalesce(latest.c.engagement_score, 0).label("engagement_score"),
+            )
+            .outerjoin(latest, latest.c.user_id == User.id)
+            .where(User.role == "ambassador")
+            .order_by(desc(User.registration_date))
+        )
+        return [
+            {
+                "user": row.User,
+                "points_sum": row.points_sum,
+                "completed_count": row.completed_count,
+                "referrals_sum": row.referrals_sum,
+                "current_streak": row.current_streak,
+                "completion_rate": row.completion_rate,
+                "engagement_score": row.engagement_score,
+            }
+            for row in result
+        ]
+
+    async def rollup_analytics_day(self, day: datetime, user_ids: Optional[List[str]] = None) -> int:
+        """Recompute the analytics rows for one UTC day from submissions, for every user active
+        that day (or only user_ids). Streaks extend the previous day's row, so days must be
+        rolled up in order. Returns the number of rows written.
+        """
+        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = day_start + timedelta(days=1)
+
+        conditions = [Submission.submission_date >= day_start, Submission.submission_date < day_end]
+        if user_ids:
+            conditions.append(Submission.user_id.in_([uuid.UUID(str(user_id)) for user_id in user_ids]))
+        activity = (
+            select(
+                Submission.user_id,
+                func.sum(Submission.points_earned).label("points"),
+                func.count(Submission.id).filter(Submission.is_completed == True).label("tasks"),
+                func.count(Submission.id).label("submissions"),
+                func.sum(Submission.people_connected).label("referrals")
+            )
+            .where(and_(*conditions))
+            .group_by(Submission.user_id)
+            .cte("activity")
+        )
+        totals = (
+            select(
+                Submission.user_id,
+                func.sum(Submission.points_earned).label("points"),
+                func.count(Submission.id).filter(Submission.is_completed == True).label("tasks"),
+                func.sum(Submission.people_connected).label("referrals")
+            )
+            .where(and_(
+                Submission.user_id.in_(select(activity.c.user_id)),
+                Submission.submission_date < day_end
+            ))
+            .group_by(Submission.user_id)
+            .cte("totals")
+        )
+        previous = aliased(Analytics, name="previous")
+
+        # Tasks unlocked by the end of the day, mirroring get_current_day_from_registration
+        user_day = func.extract("day", literal(day_end, Analytics.date.type) - User.registration_date) + 1
+        available = (
+            select(func.count(Task.id))
+            .where(and_(Task.is_active == True, Task.day <= user_day))
+            .scalar_subquery()
+        )
+        streak = func.coalesce(previous.current_streak, 0) + 1
+        completion_rate = func.least(
+            100.0, func.coalesce(totals.c.tasks, 0) * 100.0 / func.greatest(available, 1)
+        )
+        engagement_score = (
+            completion_rate * ENGAGEMENT_COMPLETION_WEIGHT
+            + func.least(streak, ENGAGEMENT_STREAK_CAP_DAYS) * ENGAGEMENT_STREAK_WEIGHT / float(ENGAGEMENT_STREAK_CAP_DAYS)
+        )
+
+        rows = (
+            select(
+                func.gen_random_uuid(),
+                activity.c.user_id,
+                literal(day_start, Analytics.date.type),
+                func.coalesce(activity.c.points, 0),
+                activity.c.tasks,
+                activity.c.submissions,
+                func.coalesce(activity.c.referrals, 0),
+                func.coalesce(totals.c.points, 0),
+                func.coalesce(totals.c.tasks, 0),
+                func.coalesce(totals.c.referrals, 0),
+                streak,
+                completion_rate,
+                engagement_score
+            )
+            .select_from(activity)
+            .join(User, User.id == activity.c.user_id)
+            .outerjoin(totals, totals.c.user_id == activity.c.user_id)
+            .outerjoin(previous, and_(
+                previous.user_id == activity.c.user_id,
+                previous.date == day_start - timedelta(days=1)
+            ))
+        )
+        insert_stmt = pg_insert(Analytics).from_select(
+            [
+                "id", "user_id", "date",
+                "points_earned_today", "tasks_completed_today", "submissions_today", "referrals_made_today",
+                "total_points", "total_tasks_completed", "total_referrals",
+                "current_streak", "completion_rate", "engagement_score",
+            ],
+            rows
+        )
+        result = await self.session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[Analytics.user_id, Analytics.date],
+                set_={
+                    key: insert_stmt.excluded[key]
+                    for key in (
+                        "points_earned_today", "tasks_completed_today", "submissions_today", "referrals_made_today",
+                        "total_points", "total_tasks_completed", "total_referrals",
+                        "current_streak", "completion_rate", "engagement_score",
+                    )
+                }
+            )
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def get_rollup_watermark(self, name: str) -> Optional[datetime]:
+        result = await self.session.execute(
+            select(RollupWatermark.closed_through).where(RollupWatermark.name == name)
+        )
+        return result.scalar_one_or_none()
+
+    async def set_rollup_watermark(self, name: str, closed_through: datetime) -> None:
+        """Advance a rollup watermark (never moves it backwards)"""
+        insert_stmt = pg_insert(RollupWatermark).values(
+            name=name, closed_through=closed_through, updated_at=datetime.utcnow()
+        )
+        await self.session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[RollupWatermark.name],
+                set_={
+                    "closed_through": func.greatest(RollupWatermark.closed_through, insert_stmt.excluded.closed_through),
+                    "updated_at": insert_stmt.excluded.updated_at,
+                }
+            )
+        )
+        await self.session.commit()
+
+    async def catch_up_analytics(self, today: datetime) -> int:
+        """Roll up every day after the analytics watermark through yesterday. Returns days closed."""
+        closed_through = await self.get_rollup_watermark(ANALYTICS_ROLLUP)
+        if closed_through is None:
+            result = await self.session.execute(select(func.min(Submission.submission_date)))
+            first_submission = result.scalar_one_or_none()
+            if first_submission is None:
+                return 0
+            day = first_submission.replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            day = closed_through + timedelta(days=1)
+
+        closed = 0
+        while day < today:
+            await self.rollup_analytics_day(day)
+            await self.set_rollup_watermark(ANALYTICS_ROLLUP, day)
+            day += timedelta(days=1)
+            closed += 1
+        return closed
+
     async def get_user_analytics(self, user_id: str, days: int = 30) -> List[Analytics]:
         start_date = datetime.utcnow() - timedelta(days=days)
         result = await self.session.execute(
@@ -250,16 +1549,20 @@ class DatabaseService:
         return result.scalars().all()
     
     async def update_user_points(self, user_id: str, points_change: int, referrals_change: int = 0) -> bool:
-        result = await self.session.execute(
-            update(User)
-            .where(User.id == user_id)
-            .values(
-                total_points=User.total_points + points_change,
-                total_referrals=User.total_referrals + referrals_change
+        """Award points through the ledger; folded into users.total_points by compaction"""
+        await self.session.execute(
+            pg_insert(PointsLedger).values(
+                user_id=user_id,
+                points_delta=points_change,
+                referrals_delta=referrals_change,
+                created_at=datetime.utcnow()
             )
         )
         await self.session.commit()
-        return result.rowcount > 0
+        self._user_written(user_id)
+        leaderboard_index.apply_delta(user_id, points_change, referrals_change)
+        analytics_rollup_tracker.mark(user_id)
+        return True
     
     async def update_user_current_day(self, user_id: str, new_day: int) -> bool:
         result = await self.session.execute(
@@ -268,6 +1571,7 @@ class DatabaseService:
             .values(current_day=new_day)
         )
         await self.session.commit()
+        self._user_written(user_id)
         return result.rowcount > 0
     
     async def update_user_password(self, user_id: str, new_password_hash: str) -> bool:
@@ -277,6 +1581,7 @@ class DatabaseService:
             .values(password_hash=new_password_hash)
         )
         await self.session.commit()
+        self._user_written(user_id)
         return result.rowcount > 0
 
     async def update_user_profile(self, user_id: str, profile_data: dict) -> bool:
@@ -284,9 +1589,12 @@ class DatabaseService:
             update(User)
             .where(User.id == user_id)
             .values(**profile_data)
+            .returning(*LEADERBOARD_COLUMNS)
         )
+        row = result.first()
         await self.session.commit()
-        return result.rowcount > 0
+        self._user_written(user_id, row)
+        return row is not None
 
     async def get_all_users(self) -> List[User]:
         result = await self.session.execute(
@@ -295,27 +1603,52 @@ class DatabaseService:
         return result.scalars().all()
 
     async def update_user_status(self, user_id: str, status: str) -> bool:
-        """Update user status (active, inactive, suspended)"""
+        """Update user status (active, inactive, suspended) and revoke tokens carrying the old status"""
         result = await self.session.execute(
             update(User)
             .where(User.id == user_id)
-            .values(status=status, is_active=(status == "active"))
+            .values(status=status, is_active=(status == "active"), token_version=User.token_version + 1)
+            .returning(*LEADERBOARD_COLUMNS, User.token_version)
         )
+        row = result.first()
+        if row is not None:
+            await self._record_token_revocation(row.id, row.token_version)
         await self.session.commit()
-        return result.rowcount > 0
+        self._user_written(user_id, row)
+        if row is not None:
+            token_revocations.revoke_below(row.id, row.token_version)
+        return row is not None
 
-    async def get_task_by_id(self, task_id: str) -> Task:
-        """Get a specific task by ID"""
+    async def _record_token_revocation(self, user_id, min_version: int) -> None:
+        """Reject the user's tokens below min_version on every worker (caller commits)"""
+        await self.session.execute(
+            pg_insert(TokenRevocation)
+            .values(user_id=user_id, min_token_version=min_version, updated_at=datetime.utcnow())
+            .on_conflict_do_update(
+                index_elements=[TokenRevocation.user_id],
+                set_={"min_token_version": min_version, "updated_at": datetime.utcnow()}
+            )
+        )
+
+    async def get_token_revocations(self):
+        """All (user_id, min_token_version) revocation rows"""
         result = await self.session.execute(
-            select(Task).where(Task.id == task_id)
+            select(TokenRevocation.user_id, TokenRevocation.min_token_version)
         )
-        return result.scalar_one_or_none()
+        return result.all()
+
+    async def get_task_by_id(self, task_id: str) -> Task:
+        """Get a specific task by ID (served from the task catalog)"""
+        catalog = await self.get_task_catalog()
+        return catalog.get(task_id)
 
     async def create_task(self, task_data: dict) -> str:
         """Create a new task"""
         new_task = Task(**task_data)
         self.session.add(new_task)
+        await self.bump_cache_version(TASK_CATALOG_CACHE)
         await self.session.commit()
+        task_catalog_cache.invalidate()
         await self.session.refresh(new_task)
         return str(new_task.id)
 
@@ -371,7 +1704,9 @@ class DatabaseService:
         # Update timestamp
         task.updated_at = datetime.utcnow()
 
+        await self.bump_cache_version(TASK_CATALOG_CACHE)
         await self.session.commit()
+        task_catalog_cache.invalidate()
         await self.session.refresh(task)
         return task
 
@@ -386,7 +1721,9 @@ class DatabaseService:
             return False
 
         await self.session.delete(task)
+        await self.bump_cache_version(TASK_CATALOG_CACHE)
         await self.session.commit()
+        task_catalog_cache.invalidate()
         return True
 
 
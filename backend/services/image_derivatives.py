@@ -0,0 +1,105 @@
+import asyncio
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from PIL import Image, ImageOps
+
+from services.perceptual_hash import perceptual_hash_file
+
+# Image decoding and encoding is CPU-bound, so it runs in separate processes
+IMAGE_DERIVATIVE_PROCESSES = int(os.getenv("IMAGE_DERIVATIVE_PROCESSES", "2"))
+# Larger images are refused before decoding; a small file can declare a huge canvas
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))
+
+# Derivative kind -> (longest side in pixels, WebP quality)
+DERIVATIVE_SPECS = {
+    "thumbnail": (320, 70),
+    "webp": (1600, 80),
+}
+DERIVATIVE_CONTENT_TYPE = "image/webp"
+
+# Pillow cannot rasterise vector images
+NON_RASTER_CONTENT_TYPES = {"image/svg+xml"}
+
+
+def is_derivable(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith("image/") and content_type not in NON_RASTER_CONTENT_TYPES
+
+
+def _init_worker(max_pixels: int) -> None:
+    # Pillow only warns between MAX_IMAGE_PIXELS and twice that; make it refuse at the limit
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    warnings.simplefilter("error", Image.DecompressionBombWarning)
+
+
+def render_derivatives(source_path: str, output_dir: str) -> List[Dict[str, Any]]:
+    """Write every DERIVATIVE_SPECS variant of an image to output_dir as WebP.
+
+    Runs in a worker process. Phone photos are rotated by their EXIF
+    orientation first; images are only ever scaled down.
+    """
+    rendered = []
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        for kind, (max_side, quality) in DERIVATIVE_SPECS.items():
+            variant = image.copy()
+            variant.thumbnail((max_side, max_side), Image.LANCZOS)
+            path = Path(output_dir) / f"{kind}.webp"
+            variant.save(path, "WEBP", quality=quality, method=4)
+            rendered.append({
+                "kind": kind,
+                "path": str(path),
+                "width": variant.width,
+                "height": variant.height,
+                "size": path.stat().st_size,
+            })
+    return rendered
+
+
+class DerivativeRenderer:
+    """Renders image derivatives and perceptual hashes on a lazily started process pool"""
+
+    def __init__(self, processes: int = IMAGE_DERIVATIVE_PROCESSES, max_pixels: int = IMAGE_MAX_PIXELS):
+        self.processes = processes
+        self.max_pixels = max_pixels
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            # spawn rather than fork: the server process has running threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.max_pixels,)
+            )
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); the pool is unusable, so the next call starts a new one
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def render(self, source_path: Path, output_dir: Path) -> List[Dict[str, Any]]:
+        return await self._run(render_derivatives, str(source_path), str(output_dir))
+
+    async def hash_image(self, source_path: Path) -> int:
+        return await self._run(perceptual_hash_file, str(source_path))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+derivative_renderer = DerivativeRenderer()
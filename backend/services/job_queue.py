@@ -0,0 +1,169 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.database_service import DatabaseService
+
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "2"))
+# Idle workers re-check the table this often; jobs enqueued by this process wake them immediately
+JOB_QUEUE_POLL_SECONDS = float(os.getenv("JOB_QUEUE_POLL_SECONDS", "2"))
+JOB_QUEUE_RETRY_BASE_SECONDS = float(os.getenv("JOB_QUEUE_RETRY_BASE_SECONDS", "10"))
+JOB_QUEUE_RETRY_MAX_SECONDS = float(os.getenv("JOB_QUEUE_RETRY_MAX_SECONDS", "3600"))
+# A running job whose worker has been silent this long is assumed dead and claimed again
+JOB_QUEUE_LEASE_SECONDS = int(os.getenv("JOB_QUEUE_LEASE_SECONDS", "600"))
+# Running handlers renew their lease this often, so long jobs are not claimed twice
+JOB_QUEUE_HEARTBEAT_SECONDS = float(os.getenv("JOB_QUEUE_HEARTBEAT_SECONDS", str(JOB_QUEUE_LEASE_SECONDS / 3)))
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff after the given number of failed attempts"""
+    seconds = JOB_QUEUE_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, JOB_QUEUE_RETRY_MAX_SECONDS))
+
+
+class JobQueueWorkers:
+    """In-process async workers draining the job_queue table.
+
+    Handlers are registered per job kind and receive the job payload. A handler
+    that raises is retried with exponential backoff until max_attempts, after
+    which the job is dead-lettered (kept with status "dead" for inspection).
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, JobHandler] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.processed = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self._session_factory = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    def notify(self) -> None:
+        """Wake idle workers after this process enqueued a job"""
+        self._wakeup.set()
+
+    def start(self, session_factory, concurrency: int = JOB_QUEUE_WORKERS) -> None:
+        self._session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"job-queue:{i}")
+            for i in range(concurrency)
+        ]
+        print(f"📬 Job queue started with {concurrency} workers")
+
+    async def _claim(self) -> Optional[Any]:
+        async with self._session_factory() as session:
+            jobs = await DatabaseService(session).claim_jobs(
+                self.worker_id, list(self.handlers), limit=1, lease_seconds=JOB_QUEUE_LEASE_SECONDS
+            )
+        return jobs[0] if jobs else None
+
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            # Cleared before claiming so a notify() during the claim is not lost
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"⚠️ Job queue claim failed: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_QUEUE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._execute(job)
+
+    async def _heartbeat(self, job) -> None:
+        """Renew the job's lease until cancelled when the handler returns"""
+        while True:
+            await asyncio.sleep(JOB_QUEUE_HEARTBEAT_SECONDS)
+            try:
+                async with self._session_factory() as session:
+                    held = await DatabaseService(session).extend_job_lease(job.id, self.worker_id)
+            except Exception as e:
+                print(f"⚠️ Could not renew lease of job {job.id}: {e}")
+                continue
+            if not held:
+                print(f"⚠️ Lost the lease of job {job.id} ({job.kind}); another worker may run it too")
+                return
+
+    async def _execute(self, job) -> None:
+        handler = self.handlers[job.kind]
+        heartbeat = asyncio.create_task(self._heartbeat(job), name=f"job-lease:{job.id}")
+        try:
+            try:
+                await handler(job.payload or {})
+            finally:
+                heartbeat.cancel()
+        except asyncio.CancelledError:
+            # Shutting down mid-job: the lease expires and another worker retries it
+            raise
+        except Exception as e:
+            self.failed += 1
+            error = f"{type(e).__name__}: {e}"
+            dead = job.attempts >= job.max_attempts
+            if dead:
+                self.dead_lettered += 1
+                print(f"☠️ Job {job.id} ({job.kind}) dead-lettered after {job.attempts} attempts: {error}")
+            else:
+                print(f"⚠️ Job {job.id} ({job.kind}) failed (attempt {job.attempts}/{job.max_attempts}): {error}")
+            try:
+                async with self._session_factory() as session:
+                    held = await DatabaseService(session).fail_job(
+                        job.id, self.worker_id, error, None if dead else datetime.utcnow() + retry_delay(job.attempts)
+                    )
+                if not held:
+                    print(f"⚠️ Failure of job {job.id} not recorded: its lease passed to another worker")
+            except Exception as record_error:
+                print(f"⚠️ Could not record failure of job {job.id}: {record_error}")
+            return
+
+        self.processed += 1
+        try:
+            async with self._session_factory() as session:
+                held = await DatabaseService(session).complete_job(job.id, self.worker_id)
+            if not held:
+                print(f"⚠️ Job {job.id} finished after its lease passed to another worker")
+        except Exception as e:
+            # Handlers are idempotent, so a job that runs again after its lease expires is harmless
+            print(f"⚠️ Could not mark job {job.id} complete: {e}")
+
+    async def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop claiming jobs and give running handlers `timeout` seconds to finish"""
+        self._stopping.set()
+        self._wakeup.set()
+        tasks, self._tasks = self._tasks, []
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        print("📬 Job queue stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": len(self._tasks),
+            "kinds": sorted(self.handlers),
+            "processed": self.processed,
+            "failed": self.failed,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+job_workers = JobQueueWorkers()
@@ -0,0 +1,252 @@
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key, value, levels: int):
+        self.key = key
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * levels
+        self.width: List[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """Sorted container with O(log n) insert, remove, rank and positional lookup.
+
+    Every link stores how many level-0 positions it skips, so the position of a
+    key can be accumulated while searching for it (Pugh's skiplist with link widths).
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self):
+        self._head = _Node(None, None, self.MAX_LEVELS)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_levels(self) -> int:
+        levels = 1
+        while levels < self.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        return levels
+
+    def insert(self, key, value) -> None:
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new_node = _Node(key, value, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key) -> None:
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index_of(self, key) -> Optional[int]:
+        """0-based position of key, or None if it is not present"""
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        candidate = node.next[0]
+        if candidate is None or candidate.key != key:
+            return None
+        return position
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        """Values at positions [start, stop)"""
+        if start >= self._size or stop <= start:
+            return []
+
+        # Walk down to the node just before `start`, then follow level-0 links
+        remaining = start
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+
+        values = []
+        node = node.next[0]
+        while node is not None and len(values) < stop - start:
+            values.append(node.value)
+            node = node.next[0]
+        return values
+
+
+class LeaderboardIndex:
+    """In-process leaderboard of active ambassadors.
+
+    Ordered like DatabaseService.get_leaderboard: total_points desc, total_referrals
+    desc, id asc. Seeded from the users table at startup, kept current by the
+    DatabaseService write paths and periodically reconciled against the table so
+    writes made by other workers (or lost on failed commits) cannot drift forever.
+    """
+
+    def __init__(self):
+        self._list = IndexableSkipList()
+        self._entries: Dict[str, Tuple[tuple, Dict[str, Any]]] = {}
+        self._dirty: Optional[set] = None
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._list)
+
+    @staticmethod
+    def _sort_key(entry: Dict[str, Any]) -> tuple:
+        return (-entry["total_points"], -entry["total_referrals"], entry["id"])
+
+    @staticmethod
+    def _entry_from_row(row) -> Dict[str, Any]:
+        return {
+            "id": str(row.id),
+            "name": row.name,
+            "college": row.college,
+            "group_leader_name": row.group_leader_name or "",
+            "total_points": row.total_points or 0,
+            "total_referrals": row.total_referrals or 0,
+        }
+
+    @staticmethod
+    def _is_listed(row) -> bool:
+        return row.role == "ambassador" and bool(row.is_active)
+
+    def _put(self, entry: Dict[str, Any]) -> None:
+        self._drop(entry["id"])
+        key = self._sort_key(entry)
+        self._list.insert(key, entry)
+        self._entries[entry["id"]] = (key, entry)
+
+    def _drop(self, user_id: str) -> None:
+        existing = self._entries.pop(user_id, None)
+        if existing is not None:
+            self._list.remove(existing[0])
+
+    def apply_user(self, row) -> None:
+        """Apply a users row (ORM object or RETURNING row) after a committed write"""
+        user_id = str(row.id)
+        if self._dirty is not None:
+            self._dirty.add(user_id)
+        if self._is_listed(row):
+            self._put(self._entry_from_row(row))
+        else:
+            self._drop(user_id)
+
+    def apply_delta(self, user_id, points_delta: int, referrals_delta: int = 0) -> None:
+        """Adjust a listed user's totals by a committed points ledger entry"""
+        user_id = str(user_id)
+        existing = self._entries.get(user_id)
+        if existing is None:
+            return
+        if self._dirty is not None:
+            self._dirty.add(user_id)
+        entry = dict(existing[1])
+        entry["total_points"] += points_delta
+        entry["total_referrals"] += referrals_delta
+        self._put(entry)
+
+    def remove_user(self, user_id) -> None:
+        user_id = str(user_id)
+        if self._dirty is not None:
+            self._dirty.add(user_id)
+        self._drop(user_id)
+
+    def rank(self, user_id) -> Optional[int]:
+        """1-based leaderboard position, or None if the user is not listed"""
+        existing = self._entries.get(str(user_id))
+        if existing is None:
+            return None
+        return self._list.index_of(existing[0]) + 1
+
+    def totals(self, user_id) -> Optional[Tuple[int, int]]:
+        """(total_points, total_referrals) of a listed user, or None if the user is not listed"""
+        existing = self._entries.get(str(user_id))
+        if existing is None:
+            return None
+        return existing[1]["total_points"], existing[1]["total_referrals"]
+
+    def top(self, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        entries = self._list.slice(offset, offset + max(limit, 0))
+        return [
+            {**entry, "rank": offset + i + 1}
+            for i, entry in enumerate(entries)
+        ]
+
+    def begin_reconcile(self) -> None:
+        """Start tracking writes that land while a table snapshot is being read"""
+        self._dirty = set()
+
+    def cancel_reconcile(self) -> None:
+        self._dirty = None
+
+    @classmethod
+    def snapshot_entries(cls, rows: Iterable) -> Dict[str, Dict[str, Any]]:
+        """Listed entries of a users table snapshot by id; touches no index state, so it can run on a thread"""
+        return {str(row.id): cls._entry_from_row(row) for row in rows if cls._is_listed(row)}
+
+    def finish_reconcile(self, snapshot: Dict[str, Dict[str, Any]]) -> int:
+        """Bring the index in line with snapshot_entries() and return how many entries had drifted.
+
+        Only drifted entries are reinserted, so a reconcile that finds nothing
+        wrong costs one dict comparison per user. Users written to since
+        begin_reconcile keep their live entry, since the snapshot may predate
+        those writes.
+        """
+        dirty = self._dirty or set()
+        self._dirty = None
+
+        drifted = 0
+        for user_id, entry in snapshot.items():
+            if user_id in dirty:
+                continue
+            existing = self._entries.get(user_id)
+            if existing is None or existing[1] != entry:
+                self._put(entry)
+                drifted += 1
+        for user_id in [user_id for user_id in self._entries if user_id not in snapshot and user_id not in dirty]:
+            self._drop(user_id)
+            drifted += 1
+
+        self.ready = True
+        return drifted
+
+
+leaderboard_index = LeaderboardIndex()
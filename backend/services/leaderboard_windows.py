@@ -0,0 +1,62 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from services.user_cache import TTLCache
+
+# Periods kept in leaderboard_rollups; week/month windows read one row per user,
+# custom ranges sum the daily rows
+ROLLUP_PERIODS = ("day", "week", "month")
+LEADERBOARD_WINDOWS = ("all", "week", "month", "custom")
+MAX_CUSTOM_WINDOW_DAYS = 366
+
+# Scoped/windowed leaderboard responses, keyed by (window, scope, limit)
+LEADERBOARD_CACHE_TTL_SECONDS = float(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "30"))
+LEADERBOARD_CACHE_SIZE = int(os.getenv("LEADERBOARD_CACHE_SIZE", "1000"))
+
+
+def _parse_day(value: str, name: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid {name}: expected an ISO date")
+    return datetime(parsed.year, parsed.month, parsed.day)
+
+
+def resolve_window(
+    window: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> Tuple[Optional[str], Optional[datetime], Optional[datetime]]:
+    """Map a window name to (rollup period, start, end); the period is None for lifetime totals.
+
+    Periods start at UTC midnight, weeks on Monday, matching date_trunc on the stored timestamps.
+    Custom windows cover whole days from start_date through end_date.
+    """
+    now = now or datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+
+    if window == "all":
+        return None, None, None
+    if window == "week":
+        start = today - timedelta(days=today.weekday())
+        return "week", start, start + timedelta(days=7)
+    if window == "month":
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return "month", start, end
+    if window == "custom":
+        if not start_date:
+            raise ValueError("start_date is required for a custom window")
+        start = _parse_day(start_date, "start_date")
+        end = _parse_day(end_date, "end_date") + timedelta(days=1) if end_date else today + timedelta(days=1)
+        if end <= start:
+            raise ValueError("end_date must not be before start_date")
+        if (end - start).days > MAX_CUSTOM_WINDOW_DAYS:
+            raise ValueError(f"Custom windows are limited to {MAX_CUSTOM_WINDOW_DAYS} days")
+        return "day", start, end
+    raise ValueError(f"Invalid window: expected one of {', '.join(LEADERBOARD_WINDOWS)}")
+
+
+leaderboard_cache = TTLCache(LEADERBOARD_CACHE_SIZE, LEADERBOARD_CACHE_TTL_SECONDS)
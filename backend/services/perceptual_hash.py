@@ -0,0 +1,173 @@
+import os
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Images whose 64-bit pHashes differ in at most this many bits are flagged as likely duplicates
+PHASH_DUPLICATE_DISTANCE = int(os.getenv("PHASH_DUPLICATE_DISTANCE", "6"))
+# How often each worker loads hashes recorded by other workers into its index
+PHASH_INDEX_REFRESH_SECONDS = int(os.getenv("PHASH_INDEX_REFRESH_SECONDS", "60"))
+# Re-read this far behind the index watermark so hashes committed late are not missed
+PHASH_INDEX_OVERLAP_SECONDS = 60
+
+_HASH_MASK = (1 << 64) - 1
+_DCT_SIZE = 32
+_DCT_KEEP = 8
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n).reshape(-1, 1)
+    matrix = np.cos(np.pi * (2 * np.arange(n) + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+
+def phash_image(image: Image.Image) -> int:
+    """64-bit DCT perceptual hash, as a signed integer so it fits a Postgres BIGINT.
+
+    The image is reduced to 32x32 grayscale; each bit says whether one of the
+    8x8 lowest DCT frequencies is above their median (the DC term excluded).
+    """
+    pixels = np.asarray(image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:_DCT_KEEP, :_DCT_KEEP].flatten()
+    bits = low > np.median(low[1:])
+    value = int.from_bytes(np.packbits(bits).tobytes(), "big")
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def perceptual_hash_file(path: str) -> int:
+    """pHash of an image file after EXIF rotation; runs in a worker process"""
+    with Image.open(path) as image:
+        return phash_image(ImageOps.exif_transpose(image))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & _HASH_MASK).bit_count()
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(bits: int, radius: int) -> Tuple[int, ...]:
+    """Every mask of at most `radius` set bits within a `bits`-wide chunk"""
+    return tuple(
+        sum(1 << bit for bit in flipped)
+        for count in range(radius + 1)
+        for flipped in combinations(range(bits), count)
+    )
+
+
+class MultiIndexHashTable:
+    """Near-neighbour index over 64-bit hashes under Hamming distance.
+
+    Each hash is split into four 16-bit chunks, and each chunk position has its
+    own table. Two hashes within distance d differ in at most d // 4 bits on
+    at least one chunk, so a query probes every table for chunk values within
+    that many bits of its own and verifies the candidates with the full
+    distance. At d = 6 that is 4 x 17 dictionary probes per lookup.
+    Removed entries are tombstoned in place and skipped by searches.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self):
+        self.tables: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(self.CHUNKS)]
+        self.values: List[int] = []
+        self.items: List[Any] = []
+        self._removed: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.values) - len(self._removed)
+
+    def _chunks(self, value: int) -> List[int]:
+        value &= _HASH_MASK
+        chunk_mask = (1 << self.CHUNK_BITS) - 1
+        return [(value >> (i * self.CHUNK_BITS)) & chunk_mask for i in range(self.CHUNKS)]
+
+    def add(self, value: int, item: Any) -> int:
+        """Index an item under value; returns its position, the handle for remove()"""
+        position = len(self.values)
+        self.values.append(value)
+        self.items.append(item)
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            table[chunk].append(position)
+        return position
+
+    def remove(self, position: int) -> None:
+        self._removed.add(position)
+        self.items[position] = None
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """(distance, item) pairs within max_distance of value"""
+        masks = _flip_masks(self.CHUNK_BITS, max_distance // self.CHUNKS)
+        seen: Set[int] = set()
+        matches = []
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            for mask in masks:
+                for position in table.get(chunk ^ mask, ()):
+                    if position in seen or position in self._removed:
+                        continue
+                    seen.add(position)
+                    distance = hamming_distance(value, self.values[position])
+                    if distance <= max_distance:
+                        matches.append((distance, self.items[position]))
+        return matches
+
+
+class DuplicateImageIndex:
+    """Per-process multi-index hash table of every hashed submission image.
+
+    Loaded from submission_files at startup and topped up periodically with
+    hashes recorded by other workers (by hashed_at). Files deleted in this
+    process are removed straight away; files deleted by other workers are
+    removed when a match against them turns out to no longer exist.
+    """
+
+    def __init__(self):
+        self.table = MultiIndexHashTable()
+        self.ready = False
+        self.loaded_through: Optional[datetime] = None
+        # file_id -> position in the table
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def add(self, file_id, submission_id, perceptual_hash: int, hashed_at: Optional[datetime] = None) -> None:
+        file_id = str(file_id)
+        if file_id not in self._positions:
+            self._positions[file_id] = self.table.add(perceptual_hash, (file_id, str(submission_id)))
+        if hashed_at is not None and (self.loaded_through is None or hashed_at > self.loaded_through):
+            self.loaded_through = hashed_at
+
+    def remove(self, file_id) -> None:
+        position = self._positions.pop(str(file_id), None)
+        if position is not None:
+            self.table.remove(position)
+
+    def find_duplicates(
+        self,
+        perceptual_hash: int,
+        submission_id,
+        max_distance: int = PHASH_DUPLICATE_DISTANCE
+    ) -> List[Dict[str, Any]]:
+        """Closest match per other submission, nearest first"""
+        submission_id = str(submission_id)
+        closest: Dict[str, Tuple[int, str]] = {}
+        for distance, (file_id, other_submission_id) in self.table.search(perceptual_hash, max_distance):
+            if other_submission_id != submission_id and distance < closest.get(other_submission_id, (max_distance + 1,))[0]:
+                closest[other_submission_id] = (distance, file_id)
+        return [
+            {"submission_id": other_submission_id, "file_id": file_id, "distance": distance}
+            for other_submission_id, (distance, file_id) in sorted(closest.items(), key=lambda entry: entry[1][0])
+        ]
+
+
+duplicate_image_index = DuplicateImageIndex()
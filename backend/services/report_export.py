@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+from uuid import UUID
+
+# Export format -> media type
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Encoded output is flushed to the client once this many characters are buffered
+FLUSH_THRESHOLD = 64 * 1024
+
+SUBMISSION_EXPORT_COLUMNS = [
+    "id", "task_id", "task_title", "task_day", "user_id", "user_name", "user_email",
+    "user_college", "group_leader_name", "status_text", "people_connected",
+    "points_earned", "submission_date", "is_completed", "image_url", "thumbnail_url", "updated_at",
+]
+
+AMBASSADOR_EXPORT_COLUMNS = [
+    "id", "name", "email", "college", "group_leader_name", "total_points",
+    "rank_position", "current_day", "total_referrals", "total_submissions",
+    "completed_tasks", "events_hosted", "social_media_posts", "status",
+    "last_activity", "join_date",
+]
+
+
+def submission_export_record(row) -> Dict[str, Any]:
+    """Shape a DatabaseService.stream_submission_report_rows row like /admin/reports/submissions"""
+    return {
+        "id": row.id,
+        "task_id": row.task_id,
+        "task_title": row.task_title or f"Day {row.day} Task",
+        "task_day": row.day,
+        "user_id": row.user_id,
+        "user_name": row.user_name,
+        "user_email": row.user_email,
+        "user_college": row.user_college,
+        "group_leader_name": row.group_leader_name or "No Group Leader",
+        "status_text": row.status_text or "",
+        "people_connected": row.people_connected or 0,
+        "points_earned": row.points_earned or 0,
+        "submission_date": row.submission_date,
+        "is_completed": row.status == "completed",
+        "image_url": row.image_url,
+        "thumbnail_url": row.thumbnail_url,
+        "updated_at": row.updated_at,
+    }
+
+
+def ambassador_export_record(row) -> Dict[str, Any]:
+    """Shape a DatabaseService.stream_ambassador_report_rows row like /admin/reports/ambassadors"""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "email": row.email,
+        "college": row.college,
+        "group_leader_name": row.group_leader_name or "No Group Leader",
+        "total_points": row.points_sum,
+        "rank_position": row.rank_position,
+        "current_day": row.max_day,
+        "total_referrals": row.people_connected_sum,
+        "total_submissions": row.submission_count,
+        "completed_tasks": row.completed_count,
+        "events_hosted": row.event_submissions,
+        "social_media_posts": row.social_submissions,
+        "status": row.status or "active",
+        "last_activity": row.last_login or row.registration_date,
+        "join_date": row.registration_date,
+    }
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+async def encode_export(records: AsyncIterator[Dict[str, Any]], columns: List[str], export_format: str) -> AsyncIterator[str]:
+    """Encode records as CSV or NDJSON, yielding buffered chunks as rows arrive"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+
+    if writer is not None:
+        writer.writerow(columns)
+        # Send the header straight away so the download starts immediately
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    async for record in records:
+        if writer is not None:
+            writer.writerow([_serialize(record.get(column)) for column in columns])
+        else:
+            buffer.write(json.dumps({column: _serialize(record.get(column)) for column in columns}))
+            buffer.write("\n")
+
+        if buffer.tell() >= FLUSH_THRESHOLD:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
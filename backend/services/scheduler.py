@@ -0,0 +1,384 @@
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+# Session-level advisory lock held by the worker that runs leader-only jobs
+SCHEDULER_LEADER_LOCK_KEY = int(os.getenv("SCHEDULER_LEADER_LOCK_KEY", "727001"))
+# Direct (or session-pooled) database URL for the leader lock; needed when DATABASE_URL is a transaction pooler
+SCHEDULER_LEADER_DATABASE_URL = os.getenv("SCHEDULER_LEADER_DATABASE_URL")
+SCHEDULER_LEADER_CHECK_SECONDS = float(os.getenv("SCHEDULER_LEADER_CHECK_SECONDS", "15"))
+# How long shutdown waits for running jobs before cancelling them
+SCHEDULER_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("SCHEDULER_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+
+
+class IntervalTrigger:
+    """Fire every `seconds`, measured from the previous scheduled fire time"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_fire(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def __repr__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+class CronTrigger:
+    """Five-field cron expression (minute hour day-of-month month day-of-week), evaluated in UTC.
+
+    Fields accept *, numbers, ranges (a-b), lists (a,b) and steps (*/n, a-b/n);
+    day-of-week runs 0-6 from Sunday (7 is also Sunday). As in cron, when both
+    day fields are restricted a day matching either one fires.
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Invalid cron expression '{expression}': expected 5 fields")
+        self.expression = expression
+        fields = [self._parse_field(part, low, high) for part, (low, high) in zip(parts, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months = fields[:4]
+        self.weekdays = {value % 7 for value in fields[4]}
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(part: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step_text = item.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid cron step in '{part}'")
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start_text, end_text = item.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field '{part}' out of range {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_fire(self, after: datetime) -> datetime:
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Bounded search: a valid expression matches within about four years (Feb 29)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+
+    def __repr__(self) -> str:
+        return f"cron '{self.expression}'"
+
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    failures: int = 0
+    skipped_overlaps: int = 0
+    skipped_not_leader: int = 0
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_duration_ms: Optional[float] = None
+    total_duration_ms: float = 0.0
+    last_error: Optional[str] = None
+    next_run_at: Optional[datetime] = None
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Awaitable[None]]
+    trigger: object
+    jitter_seconds: float = 0.0
+    leader_only: bool = False
+    run_at_start: bool = False
+    stats: JobStats = field(default_factory=JobStats)
+    running: bool = False
+
+
+def uses_transaction_pooler(database_url: str) -> bool:
+    """Whether a URL points at a transaction-mode pooler (pgbouncer=true, or Supabase's pooler port)"""
+    url = make_url(database_url)
+    return url.query.get("pgbouncer") == "true" or url.port == 6543
+
+
+def leader_database_url(database_url: str) -> Optional[str]:
+    """URL to hold the leader lock on, or None if only a transaction pooler is available"""
+    if SCHEDULER_LEADER_DATABASE_URL:
+        return SCHEDULER_LEADER_DATABASE_URL
+    return None if uses_transaction_pooler(database_url) else database_url
+
+
+class LeaderElector:
+    """Holds a Postgres session-level advisory lock on a dedicated connection.
+
+    Whichever worker holds the lock is the leader; the connection is probed every
+    check interval and leadership is dropped if it fails, letting another worker
+    take over. The connection comes from the elector's own unpooled engine, since
+    a session-level lock is only meaningful while that one server session lives.
+    """
+
+    def __init__(self, database_url: str, lock_key: int = SCHEDULER_LEADER_LOCK_KEY):
+        self.engine = create_async_engine(
+            make_url(database_url).set(query={}),
+            poolclass=NullPool,
+            connect_args={"statement_cache_size": 0},
+        )
+        self.lock_key = lock_key
+        self.is_leader = False
+        # Set once the first check has finished, whatever its outcome
+        self.decided = asyncio.Event()
+        self._connection = None
+        self._lock = asyncio.Lock()
+
+    async def check(self) -> bool:
+        # The connection must never be used by two checks at once
+        async with self._lock:
+            await self._check()
+        self.decided.set()
+        return self.is_leader
+
+    async def _check(self) -> None:
+        try:
+            if self._connection is None:
+                self._connection = await self.engine.connect()
+            if self.is_leader:
+                await self._connection.execute(text("SELECT 1"))
+                await self._connection.commit()
+            else:
+                result = await self._connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+                )
+                self.is_leader = bool(result.scalar())
+                # The lock is session-level and survives the commit; don't sit idle in a transaction
+                await self._connection.commit()
+                if self.is_leader:
+                    print("👑 Scheduler leadership acquired")
+        except Exception as e:
+            if self.is_leader:
+                print(f"⚠️ Scheduler leadership lost: {e}")
+            self.is_leader = False
+            await self._discard_connection()
+
+    async def _discard_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                await connection.invalidate()
+            except Exception:
+                pass
+
+    async def release(self) -> None:
+        async with self._lock:
+            await self._release()
+        await self.engine.dispose()
+
+    async def _release(self) -> None:
+        if self._connection is not None and self.is_leader:
+            try:
+                await self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+                await self._connection.commit()
+            except Exception as e:
+                print(f"⚠️ Could not release scheduler leadership: {e}")
+        self.is_leader = False
+        if self._connection is not None:
+            try:
+                await self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+class Scheduler:
+    """Runs periodic coroutines as asyncio tasks inside the app's lifespan.
+
+    Each job gets one task that sleeps until the trigger's next fire time (plus
+    jitter) and awaits the job, so runs of the same job never overlap; fire times
+    passed while a run was still going are counted as skipped. Leader-only jobs
+    are skipped on workers that do not hold the leader lock.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.elector: Optional[LeaderElector] = None
+        self._no_leader = False
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        trigger,
+        jitter_seconds: float = 0.0,
+        leader_only: bool = False,
+        run_at_start: bool = False
+    ) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Job '{name}' is already scheduled")
+        job = Job(name, func, trigger, jitter_seconds, leader_only, run_at_start)
+        self.jobs[name] = job
+        return job
+
+    def start(self, database_url: Optional[str] = None) -> None:
+        """Start every job; with a database URL, leader-only jobs run on the elected worker only"""
+        self._stopping = asyncio.Event()
+        if database_url is not None and any(job.leader_only for job in self.jobs.values()):
+            lock_url = leader_database_url(database_url)
+            if lock_url is None:
+                # A session lock taken through a transaction pooler is held by whichever server
+                # connection ran it, so several workers could each believe they lead
+                self._no_leader = True
+                print("⚠️ DATABASE_URL is a transaction pooler and SCHEDULER_LEADER_DATABASE_URL is not set; "
+                      "leader-only jobs will not run")
+            else:
+                self.elector = LeaderElector(lock_url)
+                self._tasks.append(asyncio.create_task(self._leader_loop(), name="scheduler:leader"))
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._job_loop(job), name=f"scheduler:{job.name}"))
+        print(f"⏱️ Scheduler started with {len(self.jobs)} jobs")
+
+    @property
+    def is_leader(self) -> bool:
+        # Without an elector (single worker, no leader-only jobs) this process is the leader
+        if self.elector is not None:
+            return self.elector.is_leader
+        return not self._no_leader
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleep unless shutdown starts first; returns False when stopping"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=max(seconds, 0))
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    async def _leader_loop(self) -> None:
+        while not self._stopping.is_set():
+            await self.elector.check()
+            if not await self._sleep(SCHEDULER_LEADER_CHECK_SECONDS):
+                return
+
+    async def _job_loop(self, job: Job) -> None:
+        if job.run_at_start:
+            if job.leader_only and self.elector is not None:
+                # Only the leader loop checks; wait for its first answer
+                await self.elector.decided.wait()
+            await self._run(job)
+
+        scheduled = datetime.utcnow()
+        while not self._stopping.is_set():
+            scheduled = job.trigger.next_fire(scheduled)
+            now = datetime.utcnow()
+            while scheduled < now:
+                # Fire times that passed while the previous run was still going
+                job.stats.skipped_overlaps += 1
+                scheduled = job.trigger.next_fire(scheduled)
+            job.stats.next_run_at = scheduled
+            delay = (scheduled - now).total_seconds() + random.uniform(0, job.jitter_seconds)
+            if not await self._sleep(delay):
+                return
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        if job.leader_only and not self.is_leader:
+            job.stats.skipped_not_leader += 1
+            return
+
+        job.running = True
+        job.stats.last_started_at = datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            await job.func()
+            job.stats.last_error = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.stats.failures += 1
+            job.stats.last_error = f"{type(e).__name__}: {e}"
+            print(f"⚠️ Scheduled job '{job.name}' failed: {e}")
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            job.running = False
+            job.stats.runs += 1
+            job.stats.last_duration_ms = round(elapsed_ms, 2)
+            job.stats.total_duration_ms += elapsed_ms
+            job.stats.last_finished_at = datetime.utcnow()
+
+    async def shutdown(self, timeout: float = SCHEDULER_SHUTDOWN_TIMEOUT_SECONDS) -> None:
+        """Stop scheduling, give running jobs `timeout` seconds to finish, then cancel them"""
+        self._stopping.set()
+        tasks, self._tasks = self._tasks, []
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self.elector is not None:
+            await self.elector.release()
+            self.elector = None
+        print("⏱️ Scheduler stopped")
+
+    def get_stats(self) -> List[dict]:
+        return [
+            {
+                "name": job.name,
+                "trigger": repr(job.trigger),
+                "leader_only": job.leader_only,
+                "running": job.running,
+                "runs": job.stats.runs,
+                "failures": job.stats.failures,
+                "skipped_overlaps": job.stats.skipped_overlaps,
+                "skipped_not_leader": job.stats.skipped_not_leader,
+                "last_started_at": job.stats.last_started_at.isoformat() if job.stats.last_started_at else None,
+                "last_finished_at": job.stats.last_finished_at.isoformat() if job.stats.last_finished_at else None,
+                "last_duration_ms": job.stats.last_duration_ms,
+                "avg_duration_ms": round(job.stats.total_duration_ms / job.stats.runs, 2) if job.stats.runs else None,
+                "last_error": job.stats.last_error,
+                "next_run_at": job.stats.next_run_at.isoformat() if job.stats.next_run_at else None,
+            }
+            for job in self.jobs.values()
+        ]
+
+
+scheduler = Scheduler()
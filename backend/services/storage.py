@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+# Storage clients are synchronous; each remote backend runs this many of their calls at once by default
+STORAGE_UPLOAD_THREADS = int(os.getenv("STORAGE_UPLOAD_THREADS", "8"))
+# Files of one submission uploaded in parallel, and uploads in flight across the process
+STORAGE_UPLOADS_PER_REQUEST = int(os.getenv("STORAGE_UPLOADS_PER_REQUEST", "4"))
+STORAGE_MAX_CONCURRENT_UPLOADS = int(os.getenv("STORAGE_MAX_CONCURRENT_UPLOADS", "16"))
+# Request bodies are copied to disk this many bytes at a time
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Number of recent uploads kept for the timing percentiles
+STORAGE_METRICS_WINDOW = int(os.getenv("STORAGE_METRICS_WINDOW", "500"))
+
+
+_upload_slots = asyncio.Semaphore(STORAGE_MAX_CONCURRENT_UPLOADS)
+
+
+async def stream_to_file(source, destination: Path, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[str, int]:
+    """Copy an async-readable upload to `destination` in fixed-size chunks.
+
+    Chunks are written on worker threads to a temporary file in the same
+    directory, which is renamed into place only once complete, so readers
+    never see a partial file. Returns the SHA-256 hex digest and the size.
+    """
+    temp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    handle = await asyncio.to_thread(open, temp_path, "wb")
+    try:
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            await asyncio.to_thread(handle.write, chunk)
+        await asyncio.to_thread(handle.close)
+        await asyncio.to_thread(os.replace, temp_path, destination)
+    except BaseException:
+        handle.close()
+        temp_path.unlink(missing_ok=True)
+        raise
+    return digest.hexdigest(), size
+
+
+async def gather_uploads(calls: List[Callable[[], Awaitable[Any]]], limit: int = STORAGE_UPLOADS_PER_REQUEST) -> List[Any]:
+    """Run one request's upload calls concurrently and return their results in call order.
+
+    At most `limit` of them run at a time, and they share the process-wide
+    STORAGE_MAX_CONCURRENT_UPLOADS slots with every other request.
+    """
+    request_slots = asyncio.Semaphore(limit)
+
+    async def bounded(call):
+        async with request_slots:
+            async with _upload_slots:
+                return await call()
+
+    return await asyncio.gather(*(bounded(call) for call in calls))
+
+
+class UploadMetrics:
+    """Counters and a sliding window of per-upload timings"""
+
+    def __init__(self, window: int = STORAGE_METRICS_WINDOW):
+        self.uploads = 0
+        self.failures = 0
+        self.bytes_uploaded = 0
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=window)
+
+    def record(self, path: str, size: int, duration_ms: float, queued_ms: float, ok: bool) -> None:
+        if ok:
+            self.uploads += 1
+            self.bytes_uploaded += size
+        else:
+            self.failures += 1
+        self.recent.append({
+            "path": path,
+            "bytes": size,
+            "duration_ms": round(duration_ms, 2),
+            "queued_ms": round(queued_ms, 2),
+            "ok": ok,
+            "finished_at": datetime.utcnow().isoformat(),
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        durations = sorted(entry["duration_ms"] for entry in self.recent if entry["ok"])
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not durations:
+                return None
+            return durations[min(len(durations) - 1, int(fraction * len(durations)))]
+
+        return {
+            "uploads": self.uploads,
+            "failures": self.failures,
+            "bytes_uploaded": self.bytes_uploaded,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": durations[-1] if durations else None,
+            "recent": list(self.recent)[-20:],
+        }
+
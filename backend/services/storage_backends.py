@@ -0,0 +1,370 @@
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from urllib.parse import quote, unquote, urlparse
+
+import boto3
+import requests
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+from services.blob_store import LocalBlobStore, blob_store, hash_file
+from services.image_derivatives import DERIVATIVE_CONTENT_TYPE
+from services.storage import STORAGE_UPLOAD_THREADS, UploadMetrics
+from services.upload_serving import resolve_upload_path
+
+# "local", "supabase" or "s3"; unset picks Supabase when its credentials are configured
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "").lower()
+# Blocking calls each backend runs at once; further calls queue (reported as queued_ms)
+SUPABASE_STORAGE_CONCURRENCY = int(os.getenv("SUPABASE_STORAGE_CONCURRENCY", str(STORAGE_UPLOAD_THREADS)))
+S3_STORAGE_CONCURRENCY = int(os.getenv("S3_STORAGE_CONCURRENCY", str(STORAGE_UPLOAD_THREADS)))
+
+# S3-compatible storage (AWS, MinIO, R2, ...). Credentials fall back to boto3's usual sources.
+S3_BUCKET = os.getenv("S3_BUCKET", "submissions")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
+# Base URL objects are served from, e.g. a CDN; defaults to the bucket URL
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")
+# Files above the threshold are sent as multipart uploads of S3_MULTIPART_CHUNK_SIZE parts,
+# S3_MULTIPART_CONCURRENCY parts at a time
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(16 * 1024 * 1024)))
+S3_MULTIPART_CHUNK_SIZE = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", "4"))
+
+# Bytes per chunk when streaming a stored file back out
+STORAGE_READ_CHUNK_SIZE = int(os.getenv("STORAGE_READ_CHUNK_SIZE", str(256 * 1024)))
+STORAGE_DOWNLOAD_TIMEOUT_SECONDS = int(os.getenv("STORAGE_DOWNLOAD_TIMEOUT_SECONDS", "30"))
+
+LOCAL_UPLOAD_URL_PREFIX = "/uploads/"
+
+
+async def file_chunks(path: Path, chunk_size: int = STORAGE_READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+    finally:
+        f.close()
+
+
+async def url_chunks(url: str, chunk_size: int = STORAGE_READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Download a file in chunks on worker threads, never holding more than one chunk"""
+    response = await asyncio.to_thread(requests.get, url, stream=True, timeout=STORAGE_DOWNLOAD_TIMEOUT_SECONDS)
+    try:
+        response.raise_for_status()
+        body = response.iter_content(chunk_size)
+        while chunk := await asyncio.to_thread(next, body, b""):
+            yield chunk
+    finally:
+        response.close()
+
+
+class StorageBackend(ABC):
+    """Where submission files are kept.
+
+    Drivers implement the blocking `_upload_file`, `_delete`, `_check` and `public_url`.
+    With `max_concurrency` the blocking calls run on the backend's own thread
+    pool, whose size is its concurrency limit; without it they share the
+    event loop's default threads. Uploads take a file on disk, so no driver
+    needs the whole file in memory.
+    """
+
+    name = "storage"
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.metrics = UploadMetrics()
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"storage-{self.name}")
+            if max_concurrency else None
+        )
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run a blocking call on this backend's threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def _timed(self, key: str, size: int, submitted: float, func: Callable):
+        started = time.perf_counter()
+        try:
+            result = func()
+        except Exception:
+            self.metrics.record(key, size, (time.perf_counter() - started) * 1000,
+                                (started - submitted) * 1000, ok=False)
+            raise
+        self.metrics.record(key, size, (time.perf_counter() - started) * 1000,
+                            (started - submitted) * 1000, ok=True)
+        return result
+
+    @abstractmethod
+    def _upload_file(self, key: str, path: Path, content_type: str) -> None:
+        ...
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def _check(self) -> None:
+        ...
+
+    @abstractmethod
+    def public_url(self, key: str) -> str:
+        ...
+
+    async def upload_file(self, key: str, path: Path, content_type: str, content_hash: Optional[str] = None) -> str:
+        """Store a file under `key`, replacing any object already there; returns its URL"""
+        size = (await asyncio.to_thread(path.stat)).st_size
+        await self.run(self._timed, key, size, time.perf_counter(), partial(self._upload_file, key, path, content_type))
+        return self.public_url(key)
+
+    async def upload_derivative(self, path: Path, content_hash: str, kind: str) -> str:
+        """Store a rendered derivative of the file with `content_hash`; returns its URL"""
+        return await self.upload_file(f"derivatives/{content_hash}.{kind}.webp", path, DERIVATIVE_CONTENT_TYPE)
+
+    async def delete(self, key: str) -> None:
+        """Remove the object stored under `key`; a missing object is not an error"""
+        await self.run(self._delete, key)
+
+    async def check(self) -> None:
+        """Raise if the backend cannot be reached or its bucket does not exist"""
+        await self.run(self._check)
+
+    async def read(self, url: str, content_hash: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Contents of a stored file, streamed in chunks"""
+        if urlparse(url).scheme not in ("http", "https"):
+            raise FileNotFoundError(url)
+        async for chunk in url_chunks(url):
+            yield chunk
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.metrics.summary()}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+class LocalStorageBackend(StorageBackend):
+    """Files kept on this machine in the content-addressed blob store.
+
+    Objects are named by content hash rather than by key, so identical
+    uploads are stored once; upload_blobs tracks which are still in use.
+    """
+
+    name = "local"
+
+    def __init__(self, blobs: LocalBlobStore = blob_store):
+        super().__init__()
+        self.blobs = blobs
+
+    def _upload_file(self, key: str, path: Path, content_type: str) -> None:
+        # `key` is the content hash here
+        self.blobs._put(path, key)
+
+    def _delete(self, key: str) -> None:
+        self.blobs._remove(key)
+
+    def _check(self) -> None:
+        self.blobs.root.mkdir(parents=True, exist_ok=True)
+
+    def public_url(self, key: str) -> str:
+        return self.blobs.url_for(key)
+
+    async def upload_file(self, key: str, path: Path, content_type: str, content_hash: Optional[str] = None) -> str:
+        exists = await asyncio.to_thread(path.exists)
+        if content_hash is None:
+            if not exists:
+                raise FileNotFoundError(path)
+            content_hash, _ = await asyncio.to_thread(hash_file, path)
+        if not exists:
+            # A retried job finds its staged file already moved into the store
+            return self.public_url(content_hash)
+        return await super().upload_file(content_hash, path, content_type)
+
+    async def upload_derivative(self, path: Path, content_hash: str, kind: str) -> str:
+        return await self.blobs.put_derivative(path, content_hash, kind)
+
+    async def _local_path(self, url: str, content_hash: Optional[str]) -> Path:
+        if content_hash:
+            path = self.blobs.path_for(content_hash)
+            if await asyncio.to_thread(path.is_file):
+                return path
+        path = await asyncio.to_thread(resolve_upload_path, url[len(LOCAL_UPLOAD_URL_PREFIX):])
+        if path is None:
+            raise FileNotFoundError(url)
+        return path
+
+    async def read(self, url: str, content_hash: Optional[str] = None) -> AsyncIterator[bytes]:
+        if not url.startswith(LOCAL_UPLOAD_URL_PREFIX):
+            raise FileNotFoundError(url)
+        async for chunk in file_chunks(await self._local_path(url, content_hash)):
+            yield chunk
+
+
+class SupabaseStorageBackend(StorageBackend):
+    """Supabase Storage through the synchronous client.
+
+    The client's HTTP session is shared by every call, so connections are
+    kept alive across uploads.
+    """
+
+    name = "supabase"
+
+    def __init__(self, client, bucket: str, max_concurrency: int = SUPABASE_STORAGE_CONCURRENCY):
+        super().__init__(max_concurrency)
+        self.client = client
+        self.bucket = bucket
+
+    def _bucket(self):
+        return self.client.storage.from_(self.bucket)
+
+    def _upload_file(self, key: str, path: Path, content_type: str) -> None:
+        with open(path, "rb") as f:
+            self._bucket().upload(key, f, {"content-type": content_type, "upsert": "true"})
+
+    def _delete(self, key: str) -> None:
+        self._bucket().remove([key])
+
+    def _check(self) -> None:
+        # Fails for a missing bucket; an empty listing is fine
+        self._bucket().list("", {"limit": 1})
+
+    def public_url(self, key: str) -> str:
+        return self._bucket().get_public_url(key)
+
+    async def read(self, url: str, content_hash: Optional[str] = None) -> AsyncIterator[bytes]:
+        if urlparse(url).scheme not in ("http", "https"):
+            # Rows written before uploads were stored by URL hold the object key
+            url = self.public_url(url)
+        async for chunk in url_chunks(url):
+            yield chunk
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"bucket": self.bucket, **super().get_metrics()}
+
+
+class S3StorageBackend(StorageBackend):
+    """Any S3-compatible object store, through boto3.
+
+    One client is shared by all threads, with a connection pool sized for
+    every upload and multipart part that can be in flight at once. Files
+    above S3_MULTIPART_THRESHOLD are uploaded in parallel parts, read from
+    disk a part at a time. Set S3_ENDPOINT_URL for MinIO and similar servers.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str = S3_BUCKET,
+        endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+        region: Optional[str] = S3_REGION,
+        public_url: Optional[str] = S3_PUBLIC_URL,
+        access_key_id: Optional[str] = S3_ACCESS_KEY_ID,
+        secret_access_key: Optional[str] = S3_SECRET_ACCESS_KEY,
+        max_concurrency: int = S3_STORAGE_CONCURRENCY
+    ):
+        super().__init__(max_concurrency)
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(
+                max_pool_connections=max_concurrency * S3_MULTIPART_CONCURRENCY,
+                retries={"max_attempts": 5, "mode": "standard"},
+                # Self-hosted servers rarely have wildcard DNS for virtual-hosted buckets
+                s3={"addressing_style": "path" if endpoint_url else "auto"},
+            ),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNK_SIZE,
+            max_concurrency=S3_MULTIPART_CONCURRENCY,
+        )
+        if public_url:
+            self.base_url = public_url.rstrip("/")
+        elif endpoint_url:
+            self.base_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.base_url = f"https://{bucket}.s3.{self.client.meta.region_name}.amazonaws.com"
+
+    def _upload_file(self, key: str, path: Path, content_type: str) -> None:
+        self.client.upload_file(
+            str(path), self.bucket, key,
+            ExtraArgs={"ContentType": content_type},
+            Config=self.transfer_config
+        )
+
+    def _delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def _check(self) -> None:
+        self.client.head_bucket(Bucket=self.bucket)
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}/{quote(key)}"
+
+    def _key_for(self, url: str) -> Optional[str]:
+        prefix = f"{self.base_url}/"
+        return unquote(url[len(prefix):]) if url.startswith(prefix) else None
+
+    async def read(self, url: str, content_hash: Optional[str] = None) -> AsyncIterator[bytes]:
+        key = self._key_for(url)
+        if key is None:
+            # Stored elsewhere before this backend was configured
+            async for chunk in url_chunks(url):
+                yield chunk
+            return
+        # Read through the API so private buckets work too
+        response = await self.run(self.client.get_object, Bucket=self.bucket, Key=key)
+        body = response["Body"]
+        try:
+            while chunk := await self.run(body.read, STORAGE_READ_CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"bucket": self.bucket, **super().get_metrics()}
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self.client.close()
+
+
+local_storage = LocalStorageBackend()
+
+
+def create_storage_backend(supabase_client=None, supabase_bucket: Optional[str] = None) -> StorageBackend:
+    """The backend selected by STORAGE_BACKEND"""
+    backend = STORAGE_BACKEND or ("supabase" if supabase_client is not None else "local")
+    if backend == "s3":
+        return S3StorageBackend()
+    if backend == "supabase" and supabase_client is not None:
+        return SupabaseStorageBackend(supabase_client, supabase_bucket)
+    if backend not in ("local", "supabase"):
+        print(f"⚠️ Unknown STORAGE_BACKEND {backend!r}; storing uploads locally")
+    return local_storage
+
+
+async def connect_storage_backend(backend: StorageBackend) -> StorageBackend:
+    """`backend` if it is reachable, otherwise local storage"""
+    try:
+        await backend.check()
+        print(f"✅ Storing uploads in {backend.name} storage")
+        return backend
+    except Exception as e:
+        print(f"⚠️ {backend.name} storage is not available ({e}); storing uploads locally")
+        if backend is not local_storage:
+            backend.shutdown()
+        return local_storage
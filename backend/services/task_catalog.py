@@ -0,0 +1,121 @@
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional, Tuple
+from uuid import UUID
+
+# Name of the task catalog's row in cache_versions
+TASK_CATALOG_CACHE = "task_catalog"
+
+# How long a worker trusts its snapshot before re-reading the version counter
+TASK_CATALOG_CHECK_SECONDS = float(os.getenv("TASK_CATALOG_CHECK_SECONDS", "5"))
+
+
+@dataclass(frozen=True)
+class CatalogTask:
+    """Read-only copy of a Task row, safe to share across requests and sessions"""
+    id: UUID
+    day: int
+    title: str
+    description: str
+    task_type: str
+    points_reward: int
+    is_active: bool
+    requirements: Any = None
+    submission_guidelines: Any = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    created_by: Optional[str] = None
+
+    @classmethod
+    def from_task(cls, task) -> "CatalogTask":
+        return cls(
+            id=task.id,
+            day=task.day,
+            title=task.title,
+            description=task.description,
+            task_type=task.task_type,
+            points_reward=task.points_reward,
+            is_active=bool(task.is_active),
+            requirements=task.requirements,
+            submission_guidelines=task.submission_guidelines,
+            created_at=task.created_at,
+            updated_at=task.updated_at,
+            created_by=task.created_by,
+        )
+
+
+@dataclass(frozen=True)
+class TaskCatalog:
+    """Immutable snapshot of every task, indexed by id and by day"""
+    version: int
+    tasks: Tuple[CatalogTask, ...]
+    active_tasks: Tuple[CatalogTask, ...]
+    by_id: Mapping[UUID, CatalogTask] = field(repr=False)
+    active_by_day: Mapping[int, Tuple[CatalogTask, ...]] = field(repr=False)
+
+    @classmethod
+    def build(cls, tasks: Iterable, version: int) -> "TaskCatalog":
+        snapshot = tuple(sorted((CatalogTask.from_task(task) for task in tasks), key=lambda t: t.day))
+        active = tuple(task for task in snapshot if task.is_active)
+        by_day = {}
+        for task in active:
+            by_day.setdefault(task.day, []).append(task)
+        return cls(
+            version=version,
+            tasks=snapshot,
+            active_tasks=active,
+            by_id=MappingProxyType({task.id: task for task in snapshot}),
+            active_by_day=MappingProxyType({day: tuple(day_tasks) for day, day_tasks in by_day.items()}),
+        )
+
+    def get(self, task_id) -> Optional[CatalogTask]:
+        if not isinstance(task_id, UUID):
+            try:
+                task_id = UUID(str(task_id))
+            except ValueError:
+                return None
+        return self.by_id.get(task_id)
+
+
+class TaskCatalogCache:
+    """Holds the current catalog snapshot for this worker.
+
+    Local task writes call invalidate(); writes from other workers are noticed
+    when the cache_versions counter no longer matches the snapshot's version.
+    """
+
+    def __init__(self, check_interval: float = TASK_CATALOG_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._snapshot: Optional[TaskCatalog] = None
+        self._checked_at = 0.0
+        self._generation = 0
+
+    @property
+    def snapshot(self) -> Optional[TaskCatalog]:
+        return self._snapshot
+
+    def is_fresh(self) -> bool:
+        return self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    def mark_checked(self) -> None:
+        self._checked_at = time.monotonic()
+
+    def begin_load(self) -> int:
+        """Token for store(); a load that overlaps an invalidate() is discarded"""
+        return self._generation
+
+    def store(self, catalog: TaskCatalog, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._snapshot = catalog
+        self.mark_checked()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+
+task_catalog_cache = TaskCatalogCache()
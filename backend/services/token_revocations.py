@@ -0,0 +1,52 @@
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+# "cached": every request loads the user (through the auth user cache)
+# "stateless": role/status/version come from the token; only the revocation list is consulted
+AUTH_MODE = os.getenv("AUTH_MODE", "cached").lower()
+
+# How often each worker reloads the token_revocations table
+TOKEN_REVOCATION_REFRESH_SECONDS = int(os.getenv("TOKEN_REVOCATION_REFRESH_SECONDS", "15"))
+
+
+class TokenRevocationList:
+    """Per-process copy of token_revocations: user id -> minimum accepted token version.
+
+    Only users whose tokens were ever revoked have an entry, so the set stays small.
+    Revocations made by this process apply immediately; those made by other workers
+    become visible on the next refresh.
+    """
+
+    def __init__(self):
+        self._min_versions: Dict[str, int] = {}
+        self.refreshed_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.refreshed_at is not None
+
+    def __len__(self) -> int:
+        return len(self._min_versions)
+
+    def is_revoked(self, user_id, token_version: int) -> bool:
+        return token_version < self._min_versions.get(str(user_id), 0)
+
+    def revoke_below(self, user_id, min_version: int) -> None:
+        """Apply a revocation committed by this process without waiting for a refresh"""
+        user_id = str(user_id)
+        if min_version > self._min_versions.get(user_id, 0):
+            self._min_versions[user_id] = min_version
+
+    def replace(self, rows: Iterable) -> None:
+        """Swap in a fresh table snapshot of (user_id, min_token_version) rows"""
+        snapshot = {str(row.user_id): row.min_token_version for row in rows}
+        # Keep local revocations the snapshot may not have seen yet
+        for user_id, min_version in self._min_versions.items():
+            if min_version > snapshot.get(user_id, 0):
+                snapshot[user_id] = min_version
+        self._min_versions = snapshot
+        self.refreshed_at = time.monotonic()
+
+
+token_revocations = TokenRevocationList()
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import os
+import re
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from services.user_cache import TTLCache
+
+UPLOADS_ROOT = Path(os.getenv("UPLOADS_ROOT", "uploads"))
+# Stored names never change content (content hashes or unique per upload), so clients may cache forever
+UPLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Bytes read per chunk when the server cannot send the file itself
+UPLOAD_SEND_CHUNK_SIZE = 256 * 1024
+
+# Content hashes of legacy flat uploads, keyed by (path, size, mtime)
+legacy_etag_cache = TTLCache(int(os.getenv("UPLOAD_ETAG_CACHE_SIZE", "10000")), 24 * 3600)
+# Content types of content-addressed blobs, keyed by hash
+blob_content_type_cache = TTLCache(int(os.getenv("UPLOAD_CONTENT_TYPE_CACHE_SIZE", "10000")), 3600)
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Content types are declared by the uploader; only raster images, which cannot run script,
+# are displayed inline. Everything else (HTML, SVG, PDF, ...) is sent as a sandboxed download.
+INLINE_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp", "image/avif", "image/bmp"}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+# Work areas under UPLOADS_ROOT holding files that are not published yet
+PRIVATE_UPLOAD_DIRS = ("staging", "sessions")
+
+
+def resolve_upload_path(relative: str) -> Optional[Path]:
+    """Map a /uploads/ URL path to a file inside UPLOADS_ROOT, refusing traversal and unpublished files"""
+    root = UPLOADS_ROOT.resolve()
+    path = (root / relative).resolve()
+    if root not in path.parents or path.name.startswith("."):
+        return None
+    if any((root / private) in path.parents for private in PRIVATE_UPLOAD_DIRS):
+        return None
+    return path if path.is_file() else None
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def legacy_etag(path: Path, stat: os.stat_result) -> str:
+    """Strong ETag of a file not named by its hash; hashed once per version of the file"""
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    etag = legacy_etag_cache.get(key)
+    if etag is None:
+        etag = f'"{await asyncio.to_thread(_hash_file, path)}"'
+        legacy_etag_cache.set(key, etag)
+    return etag
+
+
+def content_headers(media_type: str) -> Dict[str, str]:
+    """Headers that keep an uploaded file from running as a page on this origin"""
+    if media_type.split(";")[0].strip().lower() in INLINE_CONTENT_TYPES:
+        return {}
+    return {"Content-Disposition": "attachment", "Content-Security-Policy": "sandbox"}
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single byte range, or None to send the whole file.
+
+    Multi-range requests are answered with the whole file, which RFC 9110 permits.
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class ZeroCopyFileResponse(Response):
+    """Sends a byte range of a file, zero-copy where the server allows it.
+
+    Servers that implement the ASGI `http.response.zerocopy` extension get the
+    file descriptor and hand it to sendfile(2). Elsewhere the range is read in
+    UPLOAD_SEND_CHUNK_SIZE chunks on a worker thread, so memory use stays flat
+    regardless of file size.
+    """
+
+    def __init__(self, path: Path, offset: int, count: int, status_code: int = 200,
+                 headers: Optional[dict] = None, media_type: Optional[str] = None, send_body: bool = True):
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.send_body = send_body
+        self.headers["content-length"] = str(count)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        fd = await asyncio.to_thread(os.open, self.path, os.O_RDONLY)
+        try:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopy", "file": fd, "offset": self.offset, "count": self.count})
+                return
+            position, remaining = self.offset, self.count
+            while remaining > 0:
+                chunk = await asyncio.to_thread(os.pread, fd, min(UPLOAD_SEND_CHUNK_SIZE, remaining), position)
+                if not chunk:
+                    break
+                position += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; close the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+
+def last_modified(stat: os.stat_result) -> str:
+    return formatdate(stat.st_mtime, usegmt=True)
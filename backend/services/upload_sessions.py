@@ -0,0 +1,118 @@
+import asyncio
+import fcntl
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Tuple
+
+# Partial files of resumable uploads; like the staging directory it must be shared by all workers
+UPLOAD_SESSION_DIR = Path(os.getenv("UPLOAD_SESSION_DIR", "uploads/sessions"))
+UPLOAD_SESSION_MAX_BYTES = int(os.getenv("UPLOAD_SESSION_MAX_BYTES", str(2 * 1024 ** 3)))
+# Suggested PATCH size; clients may send any size
+UPLOAD_SESSION_CHUNK_BYTES = int(os.getenv("UPLOAD_SESSION_CHUNK_BYTES", str(8 * 1024 ** 2)))
+# Sessions not finalized within this time are deleted with their partial file
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600)))
+UPLOAD_SESSION_GC_SECONDS = int(os.getenv("UPLOAD_SESSION_GC_SECONDS", "900"))
+# How often a request waiting for another worker's lock on a session retries
+UPLOAD_SESSION_LOCK_POLL_SECONDS = 0.05
+
+
+class ChunkTooLarge(Exception):
+    pass
+
+
+def session_part_path(session_id) -> Path:
+    return UPLOAD_SESSION_DIR / f"{session_id}.part"
+
+
+def session_lock_path(session_id) -> Path:
+    return UPLOAD_SESSION_DIR / f"{session_id}.lock"
+
+
+def remove_session_files(session_id) -> None:
+    session_part_path(session_id).unlink(missing_ok=True)
+    session_lock_path(session_id).unlink(missing_ok=True)
+
+
+def _open_at(path: Path, offset: int) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    # Bytes past the committed offset are left over from an interrupted chunk
+    os.ftruncate(fd, offset)
+    return fd
+
+
+async def write_chunk(path: Path, offset: int, body: AsyncIterator[bytes], limit: int) -> int:
+    """Write a request body into the partial file at `offset`; returns the bytes written.
+
+    Raises ChunkTooLarge once more than `limit` bytes arrive.
+    """
+    fd = await asyncio.to_thread(_open_at, path, offset)
+    written = 0
+    try:
+        async for chunk in body:
+            if not chunk:
+                continue
+            if written + len(chunk) > limit:
+                raise ChunkTooLarge()
+            await asyncio.to_thread(os.pwrite, fd, chunk, offset + written)
+            written += len(chunk)
+        await asyncio.to_thread(os.fsync, fd)
+    finally:
+        os.close(fd)
+    return written
+
+
+def _open_lock_file(path: Path) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+
+def _try_flock(fd: int) -> bool:
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+class SessionLocks:
+    """Exclusive access to one upload session across every worker process.
+
+    Requests in this process queue on an asyncio lock; across processes the
+    holder also takes flock(2) on the session's lock file, so a PATCH retried
+    on another worker waits until the first has written its chunk and
+    committed the new offset. UPLOAD_SESSION_DIR must be on a filesystem
+    shared by the workers with working flock (a local disk, not NFS).
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, session_id):
+        """Hold the session's lock; session_id must already be a validated UUID"""
+        key = str(session_id)
+        lock, holders = self._locks.get(key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[key] = (lock, holders + 1)
+        try:
+            async with lock:
+                fd = await asyncio.to_thread(_open_lock_file, session_lock_path(key))
+                try:
+                    # Polled rather than blocking on a thread, so a cancelled request never acquires it late
+                    while not _try_flock(fd):
+                        await asyncio.sleep(UPLOAD_SESSION_LOCK_POLL_SECONDS)
+                    yield
+                finally:
+                    # Closing the descriptor releases the flock
+                    os.close(fd)
+        finally:
+            lock, holders = self._locks[key]
+            if holders == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, holders - 1)
+
+
+upload_session_locks = SessionLocks()
@@ -0,0 +1,73 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Authorization data may be this stale in workers that did not perform the write
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+# cache_versions row bumped by bulk users writes (points compaction), polled by every worker
+AUTH_USER_CACHE = "auth_users"
+AUTH_USER_CACHE_VERSION_SECONDS = float(os.getenv("AUTH_USER_CACHE_VERSION_SECONDS", "5"))
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire ttl seconds after being stored.
+
+    Loads that overlap an invalidation are dropped: take a token with
+    begin_load() before reading the source and pass it to set().
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generation = 0
+        self._version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def begin_load(self) -> int:
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, token: Optional[int] = None) -> None:
+        if token is not None and token != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def sync_version(self, version: int) -> bool:
+        """Clear the cache if a shared version counter moved since the last call; returns whether it did"""
+        changed = self._version is not None and version != self._version
+        if changed:
+            self.clear()
+        self._version = version
+        return changed
+
+
+# users row fields keyed by str(user_id), consulted by get_current_user
+auth_user_cache = TTLCache(AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL_SECONDS)
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import re
+import tempfile
+import zipfile
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import AsyncIterator, List, Optional, Set
+
+_UNSAFE_NAME_CHARACTERS = re.compile(r'[\x00-\x1f/\\:*?"<>|]+')
+# ZIP timestamps cannot predate 1980
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+PARTIAL_SUFFIX = ".partial"
+# Entries are spooled before they are written; larger files spill to a temporary file
+ZIP_SPOOL_MEMORY_BYTES = int(os.getenv("ZIP_SPOOL_MEMORY_BYTES", str(8 * 1024 * 1024)))
+ZIP_SPOOL_CHUNK_SIZE = 256 * 1024
+
+
+def safe_name(part: Optional[str], fallback: str) -> str:
+    """One path component of an archive entry name, stripped of separators and control characters"""
+    cleaned = _UNSAFE_NAME_CHARACTERS.sub("_", part or "").strip(" .")
+    return cleaned[:100] or fallback
+
+
+class TruncatedEntryError(Exception):
+    """A source failed after its entry was started; the entry holds what was read before the failure"""
+
+    def __init__(self, name: str, cause: Exception):
+        super().__init__(f"{name} is truncated: {cause}")
+        self.name = name
+        self.cause = cause
+
+
+class _ChunkSink:
+    """Write-only file object collecting what ZipFile writes until it is drained.
+
+    It has no tell() or seek(), so ZipFile treats it as unseekable: sizes and
+    CRCs go in a data descriptor after each entry instead of being patched
+    into its header, and nothing written ever has to be revisited.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStreamWriter:
+    """Builds a ZIP archive incrementally for a streaming response.
+
+    Entries are stored uncompressed; submission files are photos, videos and
+    PDFs that are already compressed. Only the central directory (one record
+    per entry) is held until the end, and each entry is spooled to disk past
+    a fixed size, so memory does not grow with file size.
+    """
+
+    def __init__(self):
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self._names: Set[str] = set()
+
+    def _unique_name(self, name: str) -> str:
+        candidate = name
+        path = PurePosixPath(name)
+        counter = 2
+        while candidate in self._names:
+            candidate = str(path.with_name(f"{path.stem} ({counter}){path.suffix}"))
+            counter += 1
+        self._names.add(candidate)
+        return candidate
+
+    def _entry_info(self, name: str, modified: Optional[datetime]) -> zipfile.ZipInfo:
+        date_time = modified.timetuple()[:6] if modified else datetime.utcnow().timetuple()[:6]
+        info = zipfile.ZipInfo(self._unique_name(name), date_time=max(date_time, _ZIP_EPOCH))
+        info.compress_type = zipfile.ZIP_STORED
+        info.external_attr = 0o644 << 16
+        return info
+
+    async def add(
+        self,
+        name: str,
+        chunks: AsyncIterator[bytes],
+        modified: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """Append an entry from an async byte source, yielding archive bytes as they are produced.
+
+        The source is spooled first (to disk past ZIP_SPOOL_MEMORY_BYTES), since
+        an entry's name cannot change once its header is sent. A source that
+        fails before its first byte adds nothing and re-raises; one that fails
+        later is added as "<name>.partial" and raises TruncatedEntryError.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MEMORY_BYTES)
+        try:
+            failure = None
+            try:
+                async for chunk in chunks:
+                    await asyncio.to_thread(spool.write, chunk)
+            except Exception as e:
+                if not spool.tell():
+                    raise
+                failure = e
+
+            info = self._entry_info(name + PARTIAL_SUFFIX if failure else name, modified)
+            info.file_size = spool.tell()
+            await asyncio.to_thread(spool.seek, 0)
+            with self._zip.open(info, "w") as entry:
+                while chunk := await asyncio.to_thread(spool.read, ZIP_SPOOL_CHUNK_SIZE):
+                    entry.write(chunk)
+                    if data := self._sink.drain():
+                        yield data
+            if data := self._sink.drain():
+                yield data
+        finally:
+            spool.close()
+
+        if failure:
+            raise TruncatedEntryError(info.filename, failure) from failure
+
+    def add_bytes(self, name: str, data: bytes) -> bytes:
+        self._zip.writestr(self._entry_info(name, None), data)
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        """Write the central directory and return the archive's final bytes"""
+        self._zip.close()
+        return self._sink.drain()
+
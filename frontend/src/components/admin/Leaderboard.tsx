@@ -94,20 +94,29 @@ const Leaderboard: React.FC = () => {
         const ambassadorsData = await ambassadorsResponse.json();
         console.log('Fetched ambassadors for leaderboard:', ambassadorsData);
 
-        // Fetch submissions to calculate more accurate stats
-        const submissionsResponse = await fetch(`${BACKEND_URL}/api/admin/submissions`, { headers });
+        // Fetch last week's submissions to find ambassadors active this week
+        const submissionsSince = new Date();
+        submissionsSince.setDate(submissionsSince.getDate() - 7);
+        // The endpoint pages its results, so follow X-Next-Cursor until the week is covered
         let submissionsData: any[] = [];
+        let submissionsCursor: string | null = null;
+        do {
+          const submissionsParams = new URLSearchParams({ start_date: submissionsSince.toISOString(), limit: '500' });
+          if (submissionsCursor) {
+            submissionsParams.append('cursor', submissionsCursor);
+          }
+          const submissionsResponse = await fetch(`${BACKEND_URL}/api/admin/submissions?${submissionsParams}`, { headers });
+          if (!submissionsResponse.ok) break;
 
-        if (submissionsResponse.ok) {
-          submissionsData = await submissionsResponse.json();
-          console.log('Fetched submissions for leaderboard stats:', submissionsData);
-        }
+          submissionsData = submissionsData.concat(await submissionsResponse.json());
+          submissionsCursor = submissionsResponse.headers.get('X-Next-Cursor');
+        } while (submissionsCursor);
+        console.log('Fetched submissions for leaderboard stats:', submissionsData);
 
         // Transform ambassador data to match our interface
         const transformedAmbassadors: Ambassador[] = ambassadorsData.map((amb: any) => {
-          // Calculate tasks completed from submissions
-          const userSubmissions = submissionsData.filter((sub: any) => sub.user_id === amb.id || sub.user_id === amb.user_id);
-          const tasksCompleted = userSubmissions.length;
+          // Submission totals are aggregated server-side by /admin/ambassadors
+          const tasksCompleted = amb.total_submissions || 0;
 
           // Calculate completion rate based on campaign days
           const campaignDays = amb.campaign_days || amb.current_day || 0;
@@ -76,6 +76,13 @@ interface ReportData {
   ambassadors: Ambassador[];
 }
 
+// Totals over every submission matching the filters, not just the pages loaded so far
+interface ReportTotals {
+  total_submissions: number;
+  totalPoints: number;
+  totalPeopleConnected: number;
+}
+
 interface SystemMetrics {
   total_ambassadors: number;
   active_ambassadors: number;
@@ -92,6 +99,9 @@ const Reports: React.FC = () => {
   const [dateRange, setDateRange] = useState({ start: '', end: '' });
   const [submissions, setSubmissions] = useState<TaskSubmission[]>([]);
   const [filteredSubmissions, setFilteredSubmissions] = useState<TaskSubmission[]>([]);
+  const [submissionsCursor, setSubmissionsCursor] = useState<string | null>(null);
+  const [reportTotals, setReportTotals] = useState<ReportTotals | null>(null);
+  const [exporting, setExporting] = useState(false);
   const [ambassadors, setAmbassadors] = useState<Ambassador[]>([]);
   const [selectedUser, setSelectedUser] = useState<Ambassador | null>(null);
   const [selectedUserSubmissions, setSelectedUserSubmissions] = useState<TaskSubmission[]>([]);
@@ -175,7 +185,101 @@ const Reports: React.FC = () => {
     }
   };
 
-  const fetchSubmissions = async () => {
+  // Transform submissions data to match our interface
+  const transformSubmission = (sub: any): TaskSubmission => ({
+    id: sub.id,
+    task_id: sub.task_id,
+    task_title: sub.task_title || `Day ${sub.task_day || sub.day} Task`,
+    task_day: sub.task_day || sub.day || 1,
+    user_id: sub.user_id,
+    user_name: sub.user_name || sub.name,
+    user_email: sub.user_email || sub.email,
+    user_college: sub.user_college || sub.college,
+    group_leader_name: sub.group_leader_name || 'No Group Leader',
+    status_text: sub.status_text || sub.status || 'completed',
+    people_connected: sub.people_connected || 0,
+    points_earned: sub.points_earned || sub.points || 0,
+    submission_date: sub.submission_date || sub.created_at || sub.submitted_at,
+    is_completed: sub.is_completed !== false,
+    image_url: sub.image_url || sub.proof_image || null,
+    submission_text: sub.submission_text || sub.status_text
+  });
+
+  // Query parameters for the current filters, shared by the submissions pages and the totals
+  const buildFilterParams = () => {
+    const params = new URLSearchParams();
+    if (selectedGroupLeader !== 'all') {
+      params.append('group_leader', selectedGroupLeader);
+    }
+    if (dateRange.start) {
+      params.append('start_date', dateRange.start);
+    }
+    if (dateRange.end) {
+      params.append('end_date', dateRange.end);
+    }
+    return params;
+  };
+
+  const fetchSubmissionsPage = async (
+    headers: Record<string, string>,
+    cursor: string | null,
+    limit?: number
+  ): Promise<{ submissions: TaskSubmission[]; nextCursor: string | null }> => {
+    const params = buildFilterParams();
+    if (cursor) {
+      params.append('cursor', cursor);
+    }
+    if (limit) {
+      params.append('limit', String(limit));
+    }
+
+    const submissionsResponse = await fetch(`${BACKEND_URL}/api/admin/reports/submissions?${params}`, { headers });
+    if (!submissionsResponse.ok) {
+      throw new Error(`Submissions API failed: ${submissionsResponse.status}`);
+    }
+
+    const submissionsData = await submissionsResponse.json();
+    return {
+      submissions: submissionsData.map(transformSubmission),
+      // The backend pages results; the cursor for the next page comes back in a header
+      nextCursor: submissionsResponse.headers.get('X-Next-Cursor')
+    };
+  };
+
+  // Every submission matching the filters, following the cursor until the last page
+  const fetchAllSubmissions = async (): Promise<TaskSubmission[]> => {
+    const token = localStorage.getItem('token');
+    if (!token) return [];
+
+    const headers = {
+      'Authorization': `Bearer ${token}`,
+      'Content-Type': 'application/json'
+    };
+
+    const allSubmissions: TaskSubmission[] = [];
+    let cursor: string | null = null;
+    do {
+      const page = await fetchSubmissionsPage(headers, cursor, 500);
+      allSubmissions.push(...page.submissions);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return allSubmissions;
+  };
+
+  const fetchReportTotals = async (headers: Record<string, string>): Promise<ReportTotals> => {
+    const metricsResponse = await fetch(`${BACKEND_URL}/api/admin/reports/metrics?${buildFilterParams()}`, { headers });
+    if (!metricsResponse.ok) {
+      throw new Error(`Metrics API failed: ${metricsResponse.status}`);
+    }
+    const metricsData = await metricsResponse.json();
+    return {
+      total_submissions: metricsData.total_submissions || 0,
+      totalPoints: metricsData.totalPoints || 0,
+      totalPeopleConnected: metricsData.totalPeopleConnected || 0
+    };
+  };
+
+  const fetchSubmissions = async (cursor: string | null = null) => {
     try {
       const token = localStorage.getItem('token');
       if (!token) return;
@@ -185,45 +289,16 @@ const Reports: React.FC = () => {
         'Content-Type': 'application/json'
       };
 
-      // Build query parameters
-      const params = new URLSearchParams();
-      if (selectedGroupLeader !== 'all') {
-        params.append('group_leader', selectedGroupLeader);
-      }
-      if (dateRange.start) {
-        params.append('start_date', dateRange.start);
-      }
-      if (dateRange.end) {
-        params.append('end_date', dateRange.end);
-      }
+      const page = await fetchSubmissionsPage(headers, cursor);
+      console.log('Fetched submissions:', page.submissions);
+      setSubmissionsCursor(page.nextCursor);
 
-      const submissionsResponse = await fetch(`${BACKEND_URL}/api/admin/reports/submissions?${params}`, { headers });
-      if (!submissionsResponse.ok) {
-        throw new Error(`Submissions API failed: ${submissionsResponse.status}`);
-      }
+      // Totals change with the filters only, so later pages reuse them
+      const totals = cursor && reportTotals ? reportTotals : await fetchReportTotals(headers);
+      setReportTotals(totals);
 
-      const submissionsData = await submissionsResponse.json();
-      console.log('Fetched submissions:', submissionsData);
-
-      // Transform submissions data to match our interface
-      const transformedSubmissions: TaskSubmission[] = submissionsData.map((sub: any) => ({
-        id: sub.id,
-        task_id: sub.task_id,
-        task_title: sub.task_title || `Day ${sub.task_day || sub.day} Task`,
-        task_day: sub.task_day || sub.day || 1,
-        user_id: sub.user_id,
-        user_name: sub.user_name || sub.name,
-        user_email: sub.user_email || sub.email,
-        user_college: sub.user_college || sub.college,
-        group_leader_name: sub.group_leader_name || 'No Group Leader',
-        status_text: sub.status_text || sub.status || 'completed',
-        people_connected: sub.people_connected || 0,
-        points_earned: sub.points_earned || sub.points || 0,
-        submission_date: sub.submission_date || sub.created_at || sub.submitted_at,
-        is_completed: sub.is_completed !== false,
-        image_url: sub.image_url || sub.proof_image || null,
-        submission_text: sub.submission_text || sub.status_text
-      }));
+      const pageSubmissions = page.submissions;
+      const transformedSubmissions = cursor ? [...submissions, ...pageSubmissions] : pageSubmissions;
 
       setSubmissions(transformedSubmissions);
       setFilteredSubmissions(transformedSubmissions);
@@ -233,15 +308,15 @@ const Reports: React.FC = () => {
         ? ambassadors
         : ambassadors.filter(amb => amb.group_leader_name === selectedGroupLeader);
 
-      // Update metrics based on real data
-      const totalPoints = transformedSubmissions.reduce((sum, sub) => sum + sub.points_earned, 0);
-      const totalPeopleConnected = transformedSubmissions.reduce((sum, sub) => sum + sub.people_connected, 0);
+      // Headline numbers cover every matching submission, not just the loaded pages
+      const totalPoints = totals.totalPoints;
+      const totalPeopleConnected = totals.totalPeopleConnected;
       const activeAmbassadors = filteredAmbassadors.filter(amb => amb.status === 'active');
 
       setMetrics({
         total_ambassadors: filteredAmbassadors.length,
         active_ambassadors: activeAmbassadors.length,
-        total_submissions: transformedSubmissions.length,
+        total_submissions: totals.total_submissions,
         total_points: totalPoints
       });
 
@@ -250,11 +325,11 @@ const Reports: React.FC = () => {
 
       setReportData({
         totalAmbassadors: filteredAmbassadors.length,
-        totalTasks: transformedSubmissions.length,
+        totalTasks: totals.total_submissions,
         totalPoints: totalPoints,
         totalPeopleConnected: totalPeopleConnected,
         averageTaskTime: '2.5 hours', // Static for now
-        completionRate: filteredAmbassadors.length > 0 ? (transformedSubmissions.length / (filteredAmbassadors.length * 30)) * 100 : 0,
+        completionRate: filteredAmbassadors.length > 0 ? (totals.total_submissions / (filteredAmbassadors.length * 30)) * 100 : 0,
         submissions: transformedSubmissions,
         monthlyProgress: monthlyProgress,
         ambassadors: filteredAmbassadors
@@ -340,8 +415,26 @@ const Reports: React.FC = () => {
 
 
 
+  // Exports cover every matching submission; pages the table has not loaded yet are fetched first
+  const loadExportSubmissions = async (): Promise<TaskSubmission[]> => {
+    if (!reportData) return [];
+    return submissionsCursor ? fetchAllSubmissions() : reportData.submissions;
+  };
+
+  const runExport = async (exporter: (allSubmissions: TaskSubmission[]) => void) => {
+    setExporting(true);
+    try {
+      exporter(await loadExportSubmissions());
+    } catch (error) {
+      console.error('Error exporting report:', error);
+      alert('Export failed while loading submissions. Please try again.');
+    } finally {
+      setExporting(false);
+    }
+  };
+
   // Export functions
-  const exportToExcel = () => {
+  const exportToExcel = (allSubmissions: TaskSubmission[]) => {
     if (!reportData) return;
 
     const workbook = XLSX.utils.book_new();
@@ -398,7 +491,7 @@ const Reports: React.FC = () => {
         'Month',
         'Quarter'
       ],
-      ...reportData.submissions.map(sub => {
+      ...allSubmissions.map(sub => {
         const submissionDate = new Date(sub.submission_date);
         const weekOfYear = Math.ceil((submissionDate.getTime() - new Date(submissionDate.getFullYear(), 0, 1).getTime()) / (7 * 24 * 60 * 60 * 1000));
         const quarter = Math.ceil((submissionDate.getMonth() + 1) / 3);
@@ -432,7 +525,7 @@ const Reports: React.FC = () => {
     const monthlyData = [
       ['Monthly Progress Analysis', ''],
       ['Month', 'Tasks Completed', 'Points Earned', 'Average Points per Task'],
-      ...reportData.monthlyProgress.map(month => [
+      ...generateMonthlyProgress(allSubmissions).map(month => [
         month.month,
         month.tasks,
         month.points,
@@ -501,12 +594,12 @@ const Reports: React.FC = () => {
     XLSX.writeFile(workbook, fileName);
   };
 
-  const exportToCSV = () => {
+  const exportToCSV = (allSubmissions: TaskSubmission[]) => {
     if (!reportData) return;
 
     const csvData = [
       ['Ambassador Name', 'College', 'Group Leader', 'Task ID', 'Task Title', 'Submission Date', 'Points', 'People Connected', 'Status'],
-      ...reportData.submissions.map(sub => [
+      ...allSubmissions.map(sub => [
         sub.user_name,
         sub.user_college,
         sub.group_leader_name,
@@ -534,7 +627,7 @@ const Reports: React.FC = () => {
     window.URL.revokeObjectURL(url);
   };
 
-  const exportToJSON = () => {
+  const exportToJSON = (allSubmissions: TaskSubmission[]) => {
     if (!reportData) return;
 
     const jsonData = {
@@ -549,8 +642,8 @@ const Reports: React.FC = () => {
         completionRate: reportData.completionRate
       },
       ambassadors: reportData.ambassadors,
-      submissions: reportData.submissions,
-      monthlyProgress: reportData.monthlyProgress
+      submissions: allSubmissions,
+      monthlyProgress: generateMonthlyProgress(allSubmissions)
     };
 
     const blob = new Blob([JSON.stringify(jsonData, null, 2)], { type: 'application/json' });
@@ -780,15 +873,15 @@ const Reports: React.FC = () => {
                   <p className="text-gray-400 text-xs mb-4">{option.details}</p>
                   <Button
                     onClick={() => {
-                      if (option.name === 'Excel') exportToExcel();
-                      else if (option.name === 'CSV') exportToCSV();
-                      else if (option.name === 'JSON') exportToJSON();
+                      if (option.name === 'Excel') runExport(exportToExcel);
+                      else if (option.name === 'CSV') runExport(exportToCSV);
+                      else if (option.name === 'JSON') runExport(exportToJSON);
                     }}
                     className={`w-full ${option.color} hover:opacity-90`}
-                    disabled={!reportData}
+                    disabled={!reportData || exporting}
                   >
                     <Download className="h-4 w-4 mr-2" />
-                    Export {option.name}
+                    {exporting ? 'Preparing export...' : `Export ${option.name}`}
                   </Button>
                 </div>
               ))}
@@ -958,6 +1051,21 @@ const Reports: React.FC = () => {
                       Showing first 50 of {userSummaries.length} ambassadors. Download Excel report for complete data.
                     </div>
                   )}
+                  {submissionsCursor && (
+                    <div className="mt-4 text-center">
+                      <div className="mb-2 text-gray-400">
+                        Showing {submissions.length} of {metrics?.total_submissions ?? submissions.length} submissions. Exports include all of them.
+                      </div>
+                      <Button
+                        onClick={() => fetchSubmissions(submissionsCursor)}
+                        variant="outline"
+                        size="sm"
+                        className="border-gray-600 text-gray-300 hover:bg-gray-700"
+                      >
+                        Load more submissions
+                      </Button>
+                    </div>
+                  )}
                 </div>
               </CardContent>
             </Card>
@@ -135,9 +135,24 @@ const Reports: React.FC = () => {
         params.append('end_date', dateRange.end);
       }
 
-      const response = await fetch(`${BACKEND_URL}/api/admin/submissions?${params}`, { headers });
+      // The endpoint pages its results, so follow X-Next-Cursor until every submission is loaded
+      params.append('limit', '500');
+      const submissions: any[] = [];
+      let cursor: string | null = null;
+      let response: Response;
+      do {
+        const pageParams = new URLSearchParams(params);
+        if (cursor) {
+          pageParams.append('cursor', cursor);
+        }
+        response = await fetch(`${BACKEND_URL}/api/admin/submissions?${pageParams}`, { headers });
+        if (!response.ok) break;
+
+        submissions.push(...await response.json());
+        cursor = response.headers.get('X-Next-Cursor');
+      } while (cursor);
+
       if (response.ok) {
-        const submissions = await response.json();
         const formattedSubmissions = submissions.map((sub: any) => ({
           id: sub.id,
           taskId: sub.task_id,
@@ -0,0 +1,97 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from services.leaderboard_index import IndexableSkipList, LeaderboardIndex
+
+
+def test_skiplist_matches_a_sorted_list():
+    rng = random.Random(3)
+    skiplist = IndexableSkipList()
+    expected = []
+    for _ in range(2000):
+        key = rng.randrange(500)
+        if key in expected and rng.random() < 0.5:
+            skiplist.remove(key)
+            expected.remove(key)
+        elif key not in expected:
+            skiplist.insert(key, f"v{key}")
+            expected.append(key)
+            expected.sort()
+
+    assert len(skiplist) == len(expected)
+    assert skiplist.slice(0, len(expected)) == [f"v{key}" for key in expected]
+    for position, key in enumerate(expected):
+        assert skiplist.index_of(key) == position
+    assert skiplist.slice(10, 15) == [f"v{key}" for key in expected[10:15]]
+
+
+def test_skiplist_missing_keys():
+    skiplist = IndexableSkipList()
+    skiplist.insert(1, "one")
+    assert skiplist.index_of(2) is None
+    assert skiplist.slice(1, 5) == []
+    assert skiplist.slice(0, 0) == []
+    with pytest.raises(KeyError):
+        skiplist.remove(2)
+
+
+def user(user_id, points, referrals=0, role="ambassador", is_active=True):
+    return SimpleNamespace(
+        id=user_id, name=user_id, college="", group_leader_name=None,
+        total_points=points, total_referrals=referrals, role=role, is_active=is_active
+    )
+
+
+def reconcile(index, rows):
+    index.begin_reconcile()
+    return index.finish_reconcile(index.snapshot_entries(rows))
+
+
+def test_leaderboard_orders_by_points_referrals_then_id():
+    index = LeaderboardIndex()
+    reconcile(index, [user("b", 10), user("a", 10), user("c", 10, referrals=1), user("d", 50), user("admin", 99, role="admin")])
+
+    assert [entry["id"] for entry in index.top(10)] == ["d", "c", "a", "b"]
+    assert index.rank("a") == 3
+    assert index.rank("admin") is None
+    assert [entry["rank"] for entry in index.top(2, offset=1)] == [2, 3]
+
+
+def test_apply_delta_moves_a_user():
+    index = LeaderboardIndex()
+    reconcile(index, [user("a", 10), user("b", 20)])
+    index.apply_delta("a", 15)
+    assert index.rank("a") == 1
+    index.apply_delta("missing", 100)
+    assert len(index) == 2
+
+
+def test_totals_follow_deltas_and_skip_unlisted_users():
+    index = LeaderboardIndex()
+    reconcile(index, [user("a", 10, referrals=2), user("admin", 99, role="admin")])
+    index.apply_delta("a", 5, 1)
+    assert index.totals("a") == (15, 3)
+    assert index.totals("admin") is None
+
+
+def test_reconcile_only_counts_drifted_entries():
+    index = LeaderboardIndex()
+    assert reconcile(index, [user("a", 10), user("b", 20)]) == 2
+    assert reconcile(index, [user("a", 10), user("b", 20)]) == 0
+    assert reconcile(index, [user("a", 30), user("c", 5)]) == 3
+    assert [entry["id"] for entry in index.top(10)] == ["a", "c"]
+
+
+def test_reconcile_keeps_writes_made_during_the_snapshot():
+    index = LeaderboardIndex()
+    reconcile(index, [user("a", 10), user("b", 20)])
+
+    index.begin_reconcile()
+    snapshot = index.snapshot_entries([user("a", 10), user("b", 20)])
+    index.apply_delta("a", 50)
+    index.remove_user("b")
+    index.finish_reconcile(snapshot)
+
+    assert [(entry["id"], entry["total_points"]) for entry in index.top(10)] == [("a", 60)]
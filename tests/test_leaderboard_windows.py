@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+
+from services.leaderboard_windows import MAX_CUSTOM_WINDOW_DAYS, resolve_window
+
+# A Wednesday afternoon
+NOW = datetime(2026, 3, 18, 15, 30)
+
+
+def test_all_time_has_no_period():
+    assert resolve_window("all", now=NOW) == (None, None, None)
+
+
+def test_week_starts_on_monday():
+    assert resolve_window("week", now=NOW) == ("week", datetime(2026, 3, 16), datetime(2026, 3, 23))
+
+
+def test_month_covers_the_calendar_month():
+    assert resolve_window("month", now=NOW) == ("month", datetime(2026, 3, 1), datetime(2026, 4, 1))
+    assert resolve_window("month", now=datetime(2026, 12, 31, 23, 59)) == (
+        "month", datetime(2026, 12, 1), datetime(2027, 1, 1)
+    )
+
+
+def test_custom_window_covers_whole_days():
+    assert resolve_window("custom", "2026-03-01", "2026-03-10", now=NOW) == (
+        "day", datetime(2026, 3, 1), datetime(2026, 3, 11)
+    )
+    assert resolve_window("custom", "2026-03-01T22:00:00Z", now=NOW) == (
+        "day", datetime(2026, 3, 1), datetime(2026, 3, 19)
+    )
+
+
+@pytest.mark.parametrize("start, end", [
+    (None, None),
+    ("yesterday", None),
+    ("2026-03-10", "2026-03-01"),
+    ("2024-01-01", "2025-06-01"),
+])
+def test_invalid_custom_windows(start, end):
+    with pytest.raises(ValueError):
+        resolve_window("custom", start, end, now=NOW)
+
+
+def test_custom_window_limit_is_inclusive():
+    period, start, end = resolve_window("custom", "2025-01-01", "2026-01-01", now=NOW)
+    assert (end - start).days == MAX_CUSTOM_WINDOW_DAYS
+
+
+def test_unknown_window():
+    with pytest.raises(ValueError):
+        resolve_window("year", now=NOW)
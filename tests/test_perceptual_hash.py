@@ -0,0 +1,63 @@
+import random
+
+from services.perceptual_hash import DuplicateImageIndex, MultiIndexHashTable, hamming_distance
+
+
+def flip(value: int, *bits: int) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(7)
+    table = MultiIndexHashTable()
+    values = [rng.getrandbits(64) for _ in range(500)]
+    # Near neighbours of the first value, spread over different chunks
+    values += [flip(values[0], 1, 20, 40, 60), flip(values[0], 3, 4, 5, 6, 7, 8), flip(values[0], *range(7))]
+    for position, value in enumerate(values):
+        table.add(value, position)
+
+    for query in (values[0], values[100], rng.getrandbits(64)):
+        expected = sorted(
+            (hamming_distance(query, value), position)
+            for position, value in enumerate(values)
+            if hamming_distance(query, value) <= 6
+        )
+        assert sorted(table.search(query, 6)) == expected
+
+
+def test_search_handles_signed_hashes():
+    table = MultiIndexHashTable()
+    table.add(-1, "all ones")
+    assert table.search((1 << 64) - 2, 1) == [(1, "all ones")]
+
+
+def test_removed_entries_are_not_found():
+    table = MultiIndexHashTable()
+    first = table.add(0b1010, "first")
+    table.add(0b1011, "second")
+    table.remove(first)
+    assert len(table) == 1
+    assert table.search(0b1010, 2) == [(1, "second")]
+
+
+def test_duplicate_index_skips_own_submission_and_keeps_the_closest_file():
+    index = DuplicateImageIndex()
+    index.add("f1", "s1", 0)
+    index.add("f2", "s2", flip(0, 1, 2))
+    index.add("f3", "s2", flip(0, 5))
+    index.add("f4", "s3", flip(0, *range(20)))
+
+    assert index.find_duplicates(0, "s1") == [{"submission_id": "s2", "file_id": "f3", "distance": 1}]
+
+
+def test_duplicate_index_remove_by_file_id():
+    index = DuplicateImageIndex()
+    index.add("f1", "s1", 0)
+    index.add("f2", "s2", 1)
+    index.remove("f2")
+    index.remove("unknown")
+
+    assert len(index) == 1
+    assert index.find_duplicates(0, "s3") == [{"submission_id": "s1", "file_id": "f1", "distance": 0}]
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+from services.scheduler import CronTrigger
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("* * * * *", datetime(2026, 3, 18, 15, 30, 45), datetime(2026, 3, 18, 15, 31)),
+    ("5 * * * *", datetime(2026, 3, 18, 15, 5), datetime(2026, 3, 18, 16, 5)),
+    ("*/15 * * * *", datetime(2026, 3, 18, 15, 31), datetime(2026, 3, 18, 15, 45)),
+    ("0 0 * * *", datetime(2026, 12, 31, 23, 59), datetime(2027, 1, 1, 0, 0)),
+    ("30 2 1 * *", datetime(2026, 1, 31, 12, 0), datetime(2026, 2, 1, 2, 30)),
+    ("0 9 * * 1-5", datetime(2026, 3, 20, 10, 0), datetime(2026, 3, 23, 9, 0)),
+    ("0 0 * * 7", datetime(2026, 3, 18, 0, 0), datetime(2026, 3, 22, 0, 0)),
+    ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29, 0, 0)),
+    ("0 12 10-20/5 * *", datetime(2026, 3, 15, 12, 0), datetime(2026, 3, 20, 12, 0)),
+])
+def test_next_fire(expression, after, expected):
+    assert CronTrigger(expression).next_fire(after) == expected
+
+
+def test_restricted_day_fields_match_either():
+    # The 1st of the month or any Monday
+    trigger = CronTrigger("0 0 1 * 1")
+    assert trigger.next_fire(datetime(2026, 3, 18)) == datetime(2026, 3, 23)
+    assert trigger.next_fire(datetime(2026, 3, 30)) == datetime(2026, 4, 1)
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",
+    "60 * * * *",
+    "* 24 * * *",
+    "* * 0 * *",
+    "*/0 * * * *",
+    "5-1 * * * *",
+    "x * * * *",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronTrigger(expression)
+
+
+def test_expression_that_never_fires():
+    with pytest.raises(ValueError):
+        CronTrigger("0 0 31 2 *").next_fire(datetime(2026, 1, 1))
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from boto3.s3.transfer import TransferConfig
+
+from services import storage_backends
+from services.blob_store import LocalBlobStore, hash_file
+from services.storage_backends import LocalStorageBackend, S3StorageBackend, StorageBackend
+
+
+def s3_backend(**kwargs):
+    options = {"bucket": "submissions", "access_key_id": "test", "secret_access_key": "test", "region": "us-east-1"}
+    options.update(kwargs)
+    return S3StorageBackend(**options)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """S3 backend talking to moto's in-process S3, with an existing bucket"""
+    moto = pytest.importorskip("moto")
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN", "AWS_PROFILE"):
+        monkeypatch.delenv(name, raising=False)
+    with moto.mock_aws():
+        backend = s3_backend()
+        backend.client.create_bucket(Bucket="submissions")
+        yield backend
+        backend.shutdown()
+
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+
+def test_s3_url_defaults_to_the_aws_bucket_url():
+    backend = s3_backend()
+    assert backend.public_url("a b/c.jpg") == "https://submissions.s3.us-east-1.amazonaws.com/a%20b/c.jpg"
+    backend.shutdown()
+
+
+def test_s3_url_uses_the_endpoint_with_path_addressing():
+    backend = s3_backend(endpoint_url="http://minio:9000/")
+    assert backend.public_url("x.png") == "http://minio:9000/submissions/x.png"
+    backend.shutdown()
+
+
+def test_s3_public_url_round_trips_to_the_key():
+    backend = s3_backend(public_url="https://cdn.example.com/")
+    url = backend.public_url("derivatives/ab cd.thumb.webp")
+    assert url == "https://cdn.example.com/derivatives/ab%20cd.thumb.webp"
+    assert backend._key_for(url) == "derivatives/ab cd.thumb.webp"
+    assert backend._key_for("https://elsewhere.example.com/x.png") is None
+    backend.shutdown()
+
+
+def test_local_upload_stores_the_file_under_its_hash(tmp_path):
+    backend = LocalStorageBackend(LocalBlobStore(tmp_path / "blobs", "/uploads/blobs"))
+    staged = tmp_path / "staged"
+    staged.write_bytes(b"content")
+    content_hash, _ = hash_file(staged)
+
+    url = asyncio.run(backend.upload_file("ignored.txt", staged, "text/plain", content_hash))
+
+    assert url == f"/uploads/blobs/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+    assert backend.blobs.path_for(content_hash).read_bytes() == b"content"
+    assert not staged.exists()
+    # A retry after the file was moved points at the stored blob
+    assert asyncio.run(backend.upload_file("ignored.txt", staged, "text/plain", content_hash)) == url
+
+
+def test_local_upload_of_a_missing_file_without_a_hash_fails(tmp_path):
+    backend = LocalStorageBackend(LocalBlobStore(tmp_path / "blobs", "/uploads/blobs"))
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(backend.upload_file("missing.txt", tmp_path / "missing", "text/plain"))
+
+
+def test_local_read_outside_uploads_fails(tmp_path):
+    backend = LocalStorageBackend(LocalBlobStore(tmp_path / "blobs", "/uploads/blobs"))
+
+    async def read_all():
+        return [chunk async for chunk in backend.read("https://example.com/x.png")]
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(read_all())
+
+
+def test_s3_single_part_upload(s3, tmp_path):
+    staged = tmp_path / "photo.jpg"
+    staged.write_bytes(b"jpeg bytes")
+
+    url = asyncio.run(s3.upload_file("uploads/photo.jpg", staged, "image/jpeg"))
+
+    assert url == s3.public_url("uploads/photo.jpg")
+    stored = s3.client.get_object(Bucket="submissions", Key="uploads/photo.jpg")
+    assert stored["Body"].read() == b"jpeg bytes"
+    assert stored["ContentType"] == "image/jpeg"
+    assert "-" not in stored["ETag"]
+    assert s3.get_metrics()["bucket"] == "submissions"
+
+
+def test_s3_multipart_upload_above_the_threshold(s3, tmp_path):
+    part_size = 5 * 1024 * 1024  # smallest part S3 accepts
+    s3.transfer_config = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size, max_concurrency=2)
+    content = bytes(range(256)) * (part_size * 2 // 256 + 1)
+    staged = tmp_path / "video.mp4"
+    staged.write_bytes(content)
+
+    asyncio.run(s3.upload_file("uploads/video.mp4", staged, "video/mp4"))
+
+    stored = s3.client.get_object(Bucket="submissions", Key="uploads/video.mp4")
+    assert stored["Body"].read() == content
+    # Multipart ETags end in -<number of parts>
+    assert stored["ETag"].strip('"').endswith("-3")
+
+
+def test_s3_read_streams_the_object_in_chunks(s3, monkeypatch):
+    monkeypatch.setattr(storage_backends, "STORAGE_READ_CHUNK_SIZE", 4)
+    s3.client.put_object(Bucket="submissions", Key="a b.txt", Body=b"0123456789")
+
+    async def read_all():
+        return [chunk async for chunk in s3.read(s3.public_url("a b.txt"))]
+
+    assert asyncio.run(read_all()) == [b"0123", b"4567", b"89"]
+
+
+def test_s3_delete_removes_the_object(s3):
+    s3.client.put_object(Bucket="submissions", Key="old.png", Body=b"png")
+
+    asyncio.run(s3.delete("old.png"))
+    # Deleting what is already gone is not an error
+    asyncio.run(s3.delete("old.png"))
+
+    assert s3.client.list_objects_v2(Bucket="submissions").get("KeyCount") == 0
+
+
+def test_local_delete_removes_the_blob(tmp_path):
+    backend = LocalStorageBackend(LocalBlobStore(tmp_path / "blobs", "/uploads/blobs"))
+    staged = tmp_path / "staged"
+    staged.write_bytes(b"content")
+    content_hash, _ = hash_file(staged)
+    asyncio.run(backend.upload_file("ignored.txt", staged, "text/plain", content_hash))
+
+    asyncio.run(backend.delete(content_hash))
+
+    assert not backend.blobs.path_for(content_hash).exists()
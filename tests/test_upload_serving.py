@@ -0,0 +1,56 @@
+import pytest
+
+from services.upload_serving import RangeNotSatisfiable, content_headers, etag_matches, parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    (" bytes=0-0 ", (0, 0)),
+    ("bytes=-", None),
+    ("bytes=0-9,20-29", None),
+    ("items=0-9", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=5-3", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+    ("bytes=0-", 0),
+])
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ('"abcd"', False),
+    ("abc", False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+@pytest.mark.parametrize("media_type", ["image/png", "image/jpeg", "IMAGE/WEBP", "image/gif; charset=binary"])
+def test_raster_images_are_served_inline(media_type):
+    assert content_headers(media_type) == {}
+
+
+@pytest.mark.parametrize("media_type", ["text/html", "image/svg+xml", "application/pdf", "application/octet-stream"])
+def test_other_types_are_sandboxed_downloads(media_type):
+    assert content_headers(media_type) == {"Content-Disposition": "attachment", "Content-Security-Policy": "sandbox"}
@@ -0,0 +1,106 @@
+import asyncio
+import fcntl
+import os
+import uuid
+
+import pytest
+
+from services import upload_sessions
+from services.upload_sessions import ChunkTooLarge, SessionLocks, session_lock_path, write_chunk
+
+
+@pytest.fixture(autouse=True)
+def session_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_sessions, "UPLOAD_SESSION_DIR", tmp_path)
+    return tmp_path
+
+
+async def body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_holders_of_one_session_run_one_at_a_time():
+    locks = SessionLocks()
+    session_id = uuid.uuid4()
+    events = []
+
+    async def hold(name):
+        async with locks.hold(session_id):
+            events.append(f"{name} in")
+            await asyncio.sleep(0.01)
+            events.append(f"{name} out")
+
+    async def main():
+        await asyncio.gather(hold("a"), hold("b"), hold("c"))
+
+    asyncio.run(main())
+    assert events == ["a in", "a out", "b in", "b out", "c in", "c out"]
+    assert locks._locks == {}
+
+
+def test_different_sessions_do_not_wait_for_each_other():
+    locks = SessionLocks()
+
+    async def main():
+        async with locks.hold(uuid.uuid4()):
+            async with locks.hold(uuid.uuid4()):
+                return True
+
+    assert asyncio.run(asyncio.wait_for(main(), timeout=1))
+
+
+def test_hold_waits_for_a_flock_held_elsewhere():
+    locks = SessionLocks()
+    session_id = uuid.uuid4()
+    path = session_lock_path(session_id)
+    # flock is per open file description, so this stands in for another worker process
+    other = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(other, fcntl.LOCK_EX)
+
+    async def main():
+        acquired = asyncio.Event()
+
+        async def hold():
+            async with locks.hold(session_id):
+                acquired.set()
+
+        task = asyncio.create_task(hold())
+        await asyncio.sleep(0.2)
+        assert not acquired.is_set()
+        os.close(other)
+        await asyncio.wait_for(task, timeout=1)
+        assert acquired.is_set()
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_releases_its_slot():
+    locks = SessionLocks()
+    session_id = uuid.uuid4()
+
+    async def main():
+        async with locks.hold(session_id):
+            waiter = asyncio.create_task(locks.hold(session_id).__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        assert locks._locks == {}
+
+    asyncio.run(main())
+
+
+def test_write_chunk_truncates_leftovers_past_the_offset(session_dir):
+    path = session_dir / "s.part"
+    path.write_bytes(b"0123456789")
+
+    written = asyncio.run(write_chunk(path, 4, body(b"ab", b"", b"c"), limit=10))
+
+    assert written == 3
+    assert path.read_bytes() == b"0123abc"
+
+
+def test_write_chunk_enforces_the_limit(session_dir):
+    with pytest.raises(ChunkTooLarge):
+        asyncio.run(write_chunk(session_dir / "s.part", 0, body(b"abc", b"def"), limit=4))
@@ -0,0 +1,68 @@
+from services import user_cache
+from services.user_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(user_cache.time, "monotonic", clock.monotonic)
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_load_overlapping_an_invalidation_is_dropped():
+    cache = TTLCache(maxsize=10, ttl=60)
+    token = cache.begin_load()
+    cache.invalidate("a")
+    cache.set("a", "stale", token)
+    assert cache.get("a") is None
+
+    token = cache.begin_load()
+    cache.set("a", "fresh", token)
+    assert cache.get("a") == "fresh"
+
+
+def test_clear_drops_entries_and_pending_loads():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    token = cache.begin_load()
+    cache.clear()
+    cache.set("b", 2, token)
+    assert len(cache) == 0
+
+
+def test_sync_version_clears_only_when_the_version_moves():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    assert cache.sync_version(3) is False
+    assert cache.sync_version(3) is False
+    assert cache.get("a") == 1
+
+    assert cache.sync_version(4) is True
+    assert cache.get("a") is None
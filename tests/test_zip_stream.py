@@ -0,0 +1,100 @@
+import asyncio
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from services.zip_stream import TruncatedEntryError, ZipStreamWriter, safe_name
+
+
+async def source(*chunks, fail_after=None):
+    for i, chunk in enumerate(chunks):
+        if i == fail_after:
+            raise OSError("connection reset")
+        yield chunk
+
+
+async def collect(writer, name, chunks, modified=None):
+    return b"".join([data async for data in writer.add(name, chunks, modified)])
+
+
+def test_archive_round_trips():
+    async def build():
+        writer = ZipStreamWriter()
+        parts = [
+            await collect(writer, "a/one.txt", source(b"hello ", b"world"), datetime(2026, 3, 18, 12, 0)),
+            await collect(writer, "a/one.txt", source(b"second")),
+            await collect(writer, "empty.bin", source()),
+            writer.add_bytes("notes.txt", b"notes"),
+            writer.finish(),
+        ]
+        return b"".join(parts)
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(build())))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["a/one.txt", "a/one (2).txt", "empty.bin", "notes.txt"]
+    assert archive.read("a/one.txt") == b"hello world"
+    assert archive.read("a/one (2).txt") == b"second"
+    assert archive.read("empty.bin") == b""
+    assert archive.getinfo("a/one.txt").date_time == (2026, 3, 18, 12, 0, 0)
+
+
+def test_old_timestamps_are_clamped_to_1980():
+    async def build():
+        writer = ZipStreamWriter()
+        return await collect(writer, "old.txt", source(b"x"), datetime(1970, 1, 1)) + writer.finish()
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(build())))
+    assert archive.getinfo("old.txt").date_time == (1980, 1, 1, 0, 0, 0)
+
+
+def test_source_failing_before_its_first_byte_adds_no_entry():
+    async def build():
+        writer = ZipStreamWriter()
+        with pytest.raises(OSError):
+            await collect(writer, "missing.txt", source(b"x", fail_after=0))
+        return await collect(writer, "ok.txt", source(b"ok")) + writer.finish()
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(build())))
+    assert archive.namelist() == ["ok.txt"]
+
+
+def test_source_failing_midway_is_kept_as_partial():
+    async def build():
+        writer = ZipStreamWriter()
+        with pytest.raises(TruncatedEntryError) as error:
+            await collect(writer, "video.mp4", source(b"abc", b"def", fail_after=1))
+        return error.value, writer.finish()
+
+    error, tail = asyncio.run(build())
+    assert error.name == "video.mp4.partial"
+    assert isinstance(error.cause, OSError)
+
+
+def test_partial_entry_is_readable():
+    async def build():
+        writer = ZipStreamWriter()
+        data = b""
+        try:
+            async for chunk in writer.add("video.mp4", source(b"abc", b"def", fail_after=1)):
+                data += chunk
+        except TruncatedEntryError:
+            pass
+        return data + writer.finish()
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(build())))
+    assert archive.testzip() is None
+    assert archive.read("video.mp4.partial") == b"abc"
+
+
+@pytest.mark.parametrize("part, expected", [
+    ("Jane Doe", "Jane Doe"),
+    ("../etc/passwd", "_etc_passwd"),
+    ('a:b*c?"d"<e>|f', "a_b_c_d_e_f"),
+    ("  . ", "fallback"),
+    (None, "fallback"),
+    ("x" * 150, "x" * 100),
+])
+def test_safe_name(part, expected):
+    assert safe_name(part, "fallback") == expected